@@ -0,0 +1,59 @@
+"""
+Compare per-item put_item calls with materials_db.bulk.put_items.
+
+Usage:
+    export AWS_ENDPOINT_URL_DYNAMODB=http://localhost:8000
+    python benchmarks/bulk_load.py --rows 20000 --concurrency 1 4 8
+"""
+
+import argparse
+import time
+from uuid import uuid4
+
+from common import ensure_table, require_local_endpoint
+
+import boto3
+
+from materials_db.bulk import put_items
+
+TABLE_NAME = 'MaterialsSelection-Products'
+
+
+def make_products(count):
+    for i in range(count):
+        yield {
+            'id': str(uuid4()),
+            'manufacturerId': f'mfr-{i % 40}',
+            'name': f'Catalog SKU {i}',
+            'modelNumber': f'K-{i:07d}-2MB',
+            'description': 'Manufacturer catalog onboarding row',
+            'category': 'Plumbing',
+            'imageUrl': '',
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--single-rows', type=int, default=2000,
+                        help='Rows for the put_item baseline (it is slow)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8])
+    args = parser.parse_args()
+
+    require_local_endpoint()
+    table = ensure_table(boto3.resource('dynamodb'), TABLE_NAME)
+
+    start = time.perf_counter()
+    for item in make_products(args.single_rows):
+        table.put_item(Item=item)
+    elapsed = time.perf_counter() - start
+    print(f'put_item loop:        {args.single_rows / elapsed:>10,.0f} rows/s')
+
+    for concurrency in args.concurrency:
+        stats = put_items(table, make_products(args.rows), concurrency=concurrency)
+        print(f'put_items x{concurrency:<2}        {stats.rows_per_second:>10,.0f} rows/s  '
+              f'({stats.summary()})')
+
+
+if __name__ == '__main__':
+    main()
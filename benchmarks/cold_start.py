@@ -0,0 +1,122 @@
+"""
+Benchmark: GetProjects cold and warm invocations in fresh interpreters.
+
+Every run starts a new Python process, imports the Lambda handler module,
+invokes it once (cold) and again (warm), and reports the phases the
+handler's ColdStart recorded. Each STARTUP_MODE x DDB_CLIENT combination
+is run --runs times and summarised as median and p90.
+
+Usage:
+    AWS_ENDPOINT_URL_DYNAMODB=http://localhost:8000 python benchmarks/cold_start.py --runs 10
+    python benchmarks/cold_start.py --json results.json --max-cold-ms 1500
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+import common
+from common import ensure_table, require_local_endpoint
+
+MODES = [('eager', 'light'), ('eager', 'resource'), ('lazy', 'light'), ('lazy', 'resource')]
+FIELDS = ['ImportMs', 'ClientInitMs', 'InitMs', 'FirstRequestMs', 'ColdTotalMs', 'WarmMs']
+
+# Runs inside the fresh interpreter; prints one JSON line of timings.
+CHILD = r'''
+import json, sys, time
+started = time.perf_counter()
+sys.path[:0] = sys.argv[1:3]
+import index
+loaded = time.perf_counter()
+response = index.lambda_handler({'queryStringParameters': {'limit': '25'}}, None)
+cold = time.perf_counter()
+assert response['statusCode'] == 200, response
+index.cache.invalidate()
+index.lambda_handler({'queryStringParameters': {'limit': '25'}}, None)
+warm = time.perf_counter()
+fields = dict(index.cold_start.phases)
+fields['ColdTotalMs'] = round((cold - started) * 1000, 2)
+fields['WarmMs'] = round((warm - cold) * 1000, 2)
+print('RESULT ' + json.dumps(fields))
+'''
+
+
+def seed(count):
+    from materials_db.repository import get_resource, table_name
+
+    table = ensure_table(get_resource(), table_name('Projects'))
+    with table.batch_writer() as batch:
+        for i in range(count):
+            batch.put_item(Item={'id': f'cold-start-{i}', 'name': f'Project {i}', 'status': 'in-progress'})
+
+
+def run_once(startup_mode, client):
+    env = dict(os.environ, STARTUP_MODE=startup_mode, DDB_CLIENT=client, COLD_START_METRICS='off')
+    result = subprocess.run([sys.executable, '-c', CHILD, common.ROOT, common.LAMBDA_DIR],
+                            env=env, capture_output=True, text=True, check=True)
+    for line in result.stdout.splitlines():
+        if line.startswith('RESULT '):
+            return json.loads(line[len('RESULT '):])
+    raise RuntimeError(f'No result from child process:\n{result.stdout}\n{result.stderr}')
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(runs):
+    summary = {}
+    for field in FIELDS:
+        values = [run[field] for run in runs if field in run]
+        if values:
+            summary[field] = {'median': round(statistics.median(values), 2),
+                              'p90': round(percentile(values, 0.9), 2)}
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10, help='Fresh interpreters per mode')
+    parser.add_argument('--projects', type=int, default=50, help='Projects to seed')
+    parser.add_argument('--json', help='Also write the results to this file')
+    parser.add_argument('--max-cold-ms', type=float,
+                        help='Exit non-zero if any mode\'s median ColdTotalMs exceeds this')
+    args = parser.parse_args()
+
+    require_local_endpoint()
+    seed(args.projects)
+
+    results = {}
+    for startup_mode, client in MODES:
+        label = f'{startup_mode}/{client}'
+        runs = [run_once(startup_mode, client) for _ in range(args.runs)]
+        results[label] = summarize(runs)
+
+    print(f"{'mode':<16}" + ''.join(f'{field:>22}' for field in FIELDS))
+    for label, summary in results.items():
+        cells = ''.join(
+            f"{summary[f]['median']:>12.1f} / {summary[f]['p90']:>7.1f}" if f in summary else f"{'-':>22}"
+            for f in FIELDS)
+        print(f'{label:<16}{cells}')
+    print('(median / p90 milliseconds)')
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'runs': args.runs, 'results': results}, f, indent=2)
+        print(f'✓ Wrote {args.json}')
+
+    if args.max_cold_ms is not None:
+        slow = [label for label, summary in results.items()
+                if summary['ColdTotalMs']['median'] > args.max_cold_ms]
+        if slow:
+            print(f"✗ Median cold start over {args.max_cold_ms:.0f} ms: {', '.join(slow)}")
+            sys.exit(1)
+        print(f'✓ Every mode under {args.max_cold_ms:.0f} ms median cold start')
+
+
+if __name__ == '__main__':
+    main()
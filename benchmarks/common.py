@@ -0,0 +1,55 @@
+"""Shared setup for the local DynamoDB benchmarks."""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDA_DIR = os.path.join(ROOT, 'lambda-getprojects-fix')
+
+for path in (ROOT, LAMBDA_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def require_local_endpoint():
+    """Refuse to run against real AWS; benchmarks create and fill tables."""
+    if not os.environ.get('AWS_ENDPOINT_URL_DYNAMODB'):
+        sys.exit('Set AWS_ENDPOINT_URL_DYNAMODB to a local DynamoDB endpoint first')
+
+
+def drop_table(dynamodb, name):
+    """Delete a table if it exists and wait until it is gone."""
+    if name not in [t.name for t in dynamodb.tables.all()]:
+        return
+    table = dynamodb.Table(name)
+    table.delete()
+    table.wait_until_not_exists()
+
+
+def ensure_table(dynamodb, name, indexes=()):
+    """
+    Create a pay-per-request table keyed on `id` if it does not exist.
+
+    `indexes` is a sequence of (index_name, partition_key) pairs, matching
+    the single-key GSIs described in docs/DATABASE_SCHEMA.md.
+    """
+    if name in [t.name for t in dynamodb.tables.all()]:
+        return dynamodb.Table(name)
+    attributes = {'id'} | {key for _, key in indexes}
+    kwargs = {
+        'TableName': name,
+        'KeySchema': [{'AttributeName': 'id', 'KeyType': 'HASH'}],
+        'AttributeDefinitions': [
+            {'AttributeName': attribute, 'AttributeType': 'S'} for attribute in sorted(attributes)
+        ],
+        'BillingMode': 'PAY_PER_REQUEST',
+    }
+    if indexes:
+        kwargs['GlobalSecondaryIndexes'] = [{
+            'IndexName': index_name,
+            'KeySchema': [{'AttributeName': key, 'KeyType': 'HASH'}],
+            'Projection': {'ProjectionType': 'ALL'},
+        } for index_name, key in indexes]
+    table = dynamodb.create_table(**kwargs)
+    table.wait_until_exists()
+    return table
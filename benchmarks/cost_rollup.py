@@ -0,0 +1,105 @@
+"""
+Benchmark: per-item Decimal budget sums vs materials_db.rollup.CostRollup
+and DecimalRollup.
+
+Runs in-process on synthetic line items spread over projects of ~40 items
+per category and 12 categories; no DynamoDB needed.
+
+Usage:
+    python benchmarks/cost_rollup.py --sizes 1000 100000 1000000
+"""
+
+import argparse
+import random
+import time
+import timeit
+from decimal import Decimal
+
+import common  # noqa: F401  (puts the repository root on sys.path)
+
+from materials_db.rollup import CostRollup, DecimalRollup
+
+CATEGORIES_PER_PROJECT = 12
+ITEMS_PER_CATEGORY = 40
+
+
+def make_data(count, seed=7):
+    rng = random.Random(seed)
+    category_count = max(1, count // ITEMS_PER_CATEGORY)
+    categories = [{
+        'id': f'cat-{c}',
+        'projectId': f'proj-{c // CATEGORIES_PER_PROJECT}',
+        'name': f'Category {c}',
+        'allowance': Decimal(rng.randrange(50000, 500000)).scaleb(-2) if c % 3 else None,
+    } for c in range(category_count)]
+    items = []
+    for i in range(count):
+        category = categories[i % category_count]
+        quantity = rng.randrange(1, 20)
+        unit_cost = Decimal(rng.randrange(100, 50000)).scaleb(-2)
+        items.append({
+            'id': f'item-{i}',
+            'projectId': category['projectId'],
+            'categoryId': category['id'],
+            'quantity': Decimal(quantity),
+            'unitCost': unit_cost,
+            'totalCost': unit_cost * quantity,
+            'allowance': Decimal(rng.randrange(0, 60000)).scaleb(-2),
+        })
+    return categories, items
+
+
+def loop_rollup(items, categories):
+    """What the budget views do today: walk every item and add Decimals."""
+    category_cost, category_allowance, project_cost = {}, {}, {}
+    for item in items:
+        category_cost[item['categoryId']] = category_cost.get(item['categoryId'], 0) + item['totalCost']
+        category_allowance[item['categoryId']] = (category_allowance.get(item['categoryId'], 0)
+                                                  + (item.get('allowance') or 0))
+        project_cost[item['projectId']] = project_cost.get(item['projectId'], 0) + item['totalCost']
+    variance = {}
+    for category in categories:
+        allowance = category['allowance']
+        if allowance is None:
+            allowance = category_allowance.get(category['id'], 0)
+        variance[category['id']] = allowance - category_cost.get(category['id'], 0)
+    return category_cost, project_cost, variance
+
+
+def best_of(fn, repeat):
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--updates', type=int, default=10000, help='Single-item edits to time')
+    args = parser.parse_args()
+
+    print(f"{'items':>9}  {'case':<28} {'ms':>10}")
+    for size in args.sizes:
+        categories, items = make_data(size)
+        rollup = CostRollup(items, categories)
+        cases = [
+            ('Decimal loop (full)', lambda: loop_rollup(items, categories)),
+            ('DecimalRollup (one-shot)', lambda: DecimalRollup(items, categories).project_totals()),
+            ('CostRollup load + totals', lambda: CostRollup(items, categories).project_arrays()),
+            ('CostRollup totals only', rollup.project_arrays),
+        ]
+        for label, fn in cases:
+            print(f'{size:>9}  {label:<28} {best_of(fn, args.repeat) * 1000:>10.2f}')
+
+        rng = random.Random(size)
+        edits = [dict(items[rng.randrange(size)], totalCost=Decimal(rng.randrange(100, 90000)).scaleb(-2))
+                 for _ in range(args.updates)]
+        start = time.perf_counter()
+        for item in edits:
+            rollup.upsert(item)
+        per_edit = (time.perf_counter() - start) / len(edits)
+        print(f'{size:>9}  {"upsert one item":<28} {per_edit * 1000:>10.4f}')
+        print()
+
+
+if __name__ == '__main__':
+    main()
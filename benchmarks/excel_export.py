@@ -0,0 +1,150 @@
+"""
+Benchmark: memory and time of materials_db.excel_export per project size.
+
+Loads synthetic projects of --sizes line items each (spread over a dozen
+categories, with vendors, dates and staging locations) into a local
+DynamoDB, then exports each one two ways and reports wall time and the
+peak memory traced while exporting:
+
+- loaded: every category and line item read into lists first and written
+  to a regular openpyxl Workbook (cells held in memory until save);
+- streaming: export_project(), write-only workbook fed page by page.
+
+Each streamed workbook is read back with materials_db.excel_import to
+check that every line item round-trips. Finally all projects are exported
+at once with export_projects() for --workers 1 and the default pool size.
+Local emulators answer each per-category GSI query by scanning the table,
+so streaming's wall time there overstates what it costs on DynamoDB.
+
+Usage:
+    export AWS_ENDPOINT_URL_DYNAMODB=http://localhost:8000
+    python benchmarks/excel_export.py --sizes 1000 5000 20000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from decimal import Decimal
+
+from common import ensure_table, require_local_endpoint
+
+from openpyxl import Workbook
+
+from materials_db.bulk import put_items
+from materials_db.excel_export import COLUMNS, export_project, export_projects, load_vendor_names
+from materials_db.excel_import import iter_sheet_records
+from materials_db.pagination import query_index
+from materials_db.repository import get_resource, table_name
+from materials_db.synthetic import CATEGORY_NAMES, TABLE_INDEXES
+
+TABLES = ('Projects', 'Categories', 'LineItems', 'Vendors')
+STAGING = ('Garage', 'Basement', 'Shop', 'Site trailer')
+
+
+def project_data(size, number, rng):
+    project_id = f'bench-export-{number:03d}'
+    project = {'id': project_id, 'name': f'Export Bench {size} items', 'status': 'in-progress'}
+    categories = [{'id': f'{project_id}-cat-{c:02d}', 'projectId': project_id, 'name': name,
+                   'createdAt': f'2026-01-01T00:00:{c:02d}'} for c, name in enumerate(CATEGORY_NAMES[:12])]
+    items = []
+    for i in range(size):
+        cost = Decimal(rng.randrange(500, 250000)).scaleb(-2)
+        item = {'id': f'{project_id}-item-{i:06d}', 'projectId': project_id,
+                'categoryId': rng.choice(categories)['id'], 'name': f'Selection item {i}',
+                'modelNumber': f'K-{rng.randrange(10000, 99999)}-2MB', 'quantity': Decimal(1),
+                'unitCost': cost, 'totalCost': cost, 'allowance': (cost * Decimal('1.1')).quantize(Decimal('0.01')),
+                'vendorId': f'vendor-{rng.randrange(20):05d}'}
+        if rng.random() < 0.7:
+            ordered = date(2026, 1, 1) + timedelta(days=rng.randrange(120))
+            item['orderedDate'] = ordered.isoformat()
+            if rng.random() < 0.6:
+                item['receivedDate'] = (ordered + timedelta(days=rng.randrange(2, 30))).isoformat()
+                item['stagingLocation'] = rng.choice(STAGING)
+        items.append(item)
+    return project, categories, items
+
+
+def export_loaded(tables, project_id, path, vendor_names):
+    """The straightforward version: read everything, then build a regular workbook."""
+    project = tables['Projects'].get_item(Key={'id': project_id})['Item']
+    categories = list(query_index(tables['Categories'], 'ProjectIdIndex', 'projectId', project_id))
+    items = list(query_index(tables['LineItems'], 'ProjectIdIndex', 'projectId', project_id))
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append([project['name']])
+    sheet.append([header for header, _, _, _ in COLUMNS])
+    by_category = {}
+    for item in items:
+        by_category.setdefault(item['categoryId'], []).append(item)
+    for category in categories:
+        sheet.append([category['name']])
+        for item in by_category.get(category['id'], ()):
+            sheet.append([None, item['name'], item.get('modelNumber'), item.get('allowance'), item.get('totalCost'),
+                          vendor_names.get(item.get('vendorId')), item.get('orderedDate'),
+                          item.get('receivedDate'), item.get('stagingLocation'), item.get('returnNotes')])
+    workbook.save(path)
+
+
+def measure(fn):
+    """(seconds, peak traced MB) of fn(); timed in a separate untraced run."""
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000],
+                        help='Line items per project')
+    args = parser.parse_args()
+
+    require_local_endpoint()
+    dynamodb = get_resource()
+    tables = {name: ensure_table(dynamodb, table_name(name), TABLE_INDEXES[name]) for name in TABLES}
+    rng = random.Random(11)
+    put_items(tables['Vendors'], [{'id': f'vendor-{v:05d}', 'name': f'Vendor {v}'} for v in range(20)])
+    project_ids = []
+    for number, size in enumerate(args.sizes):
+        project, categories, items = project_data(size, number, rng)
+        put_items(tables['Projects'], [project])
+        put_items(tables['Categories'], categories)
+        put_items(tables['LineItems'], items)
+        project_ids.append(project['id'])
+    vendor_names = load_vendor_names(tables['Vendors'])
+
+    out_dir = tempfile.mkdtemp(prefix='excel-export-')
+    try:
+        print(f"{'items':>7} {'loaded s':>9} {'loaded MB':>10} {'stream s':>9} {'stream MB':>10} "
+              f"{'file KB':>8}  round trip")
+        for size, project_id in zip(args.sizes, project_ids):
+            loaded_path = os.path.join(out_dir, f'loaded-{size}.xlsx')
+            stream_path = os.path.join(out_dir, f'stream-{size}.xlsx')
+            loaded = measure(lambda: export_loaded(tables, project_id, loaded_path, vendor_names))
+            stream = measure(lambda: export_project(tables, project_id, stream_path, vendor_names))
+            rows = sum(1 for _ in iter_sheet_records(stream_path, exclude=None))
+            check = '✓' if rows == size else f'✗ {rows} rows'
+            print(f'{size:>7,} {loaded[0]:>9.2f} {loaded[1]:>10.1f} {stream[0]:>9.2f} {stream[1]:>10.1f} '
+                  f'{os.path.getsize(stream_path) / 1e3:>8,.0f}  {check}')
+
+        print()
+        for workers in (1, None):
+            report = export_projects(project_ids, os.path.join(out_dir, f'all-{workers}'), workers=workers,
+                                     log=lambda line: None)
+            print(f"export_projects workers={report['workers']}: {report['projects']} workbooks, "
+                  f"{report['lineItems']:,} line items in {report['elapsedSeconds']:.2f}s")
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
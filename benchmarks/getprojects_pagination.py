@@ -0,0 +1,124 @@
+"""
+Load a local DynamoDB stand-in with synthetic projects and check that the
+GetProjects handler returns all of them, in full and paginated mode, with
+bounded peak memory.
+
+Full mode must either return every project or, once the body would pass
+the handler's MAX_FULL_BODY_BYTES (Lambda's 6 MB response limit), answer
+413 and point to limit/cursor. Either way, and for the paginated walk,
+the peak traced memory must stay under --max-peak-mb, or the run fails.
+
+Usage:
+    export AWS_ENDPOINT_URL_DYNAMODB=http://localhost:8000
+    python benchmarks/getprojects_pagination.py --projects 100000
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from uuid import uuid4
+
+from common import ensure_table, require_local_endpoint
+
+import boto3
+
+TABLE_NAME = 'MaterialsSelection-Projects'
+
+
+def load_projects(table, count):
+    start = time.perf_counter()
+    with table.batch_writer() as batch:
+        for i in range(count):
+            batch.put_item(Item={
+                'id': str(uuid4()),
+                'name': f'Project {i:06d}',
+                'description': 'Synthetic project for pagination benchmark ' * 3,
+                'status': 'in-progress',
+                'type': 'bath',
+                'createdAt': '2026-01-01T00:00:00',
+                'updatedAt': '2026-01-01T00:00:00',
+            })
+    print(f'Loaded {count} projects in {time.perf_counter() - start:.1f}s')
+
+
+def measure(label, fn):
+    """(result, peak traced MB) of fn()."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    peak /= 1024 * 1024
+    print(f'{label}: {elapsed:.2f}s, peak traced memory {peak:.1f} MB')
+    return result, peak
+
+
+def run_full(index):
+    """Number of projects returned, or None when the handler refused with 413."""
+    response = index.lambda_handler({}, None)
+    if response['statusCode'] == 413:
+        error = json.loads(response['body'])['error']
+        assert 'cursor' in error, error
+        return None
+    assert response['statusCode'] == 200, response['body']
+    return len(json.loads(response['body'])['projects'])
+
+
+def run_paginated(index, limit):
+    total = 0
+    cursor = None
+    seen = set()
+    while True:
+        params = {'limit': str(limit)}
+        if cursor:
+            params['cursor'] = cursor
+        response = index.lambda_handler({'queryStringParameters': params}, None)
+        assert response['statusCode'] == 200, response['body']
+        body = json.loads(response['body'])
+        for project in body['projects']:
+            seen.add(project['id'])
+        total += len(body['projects'])
+        cursor = body['nextCursor']
+        if not cursor:
+            return total, len(seen)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--projects', type=int, default=100000)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--skip-load', action='store_true')
+    parser.add_argument('--max-peak-mb', type=float, default=64,
+                        help='Fail if either mode traces more memory than this')
+    args = parser.parse_args()
+
+    require_local_endpoint()
+    dynamodb = boto3.resource('dynamodb')
+    table = ensure_table(dynamodb, TABLE_NAME)
+    if not args.skip_load:
+        load_projects(table, args.projects)
+
+    import index
+
+    full_count, full_peak = measure('full mode', lambda: run_full(index))
+    (paged_count, unique), paged_peak = measure(
+        f'paginated mode (limit={args.page_size})',
+        lambda: run_paginated(index, args.page_size))
+
+    print(f'full={"413 (too large)" if full_count is None else full_count} '
+          f'paginated={paged_count} unique={unique}')
+    if not (paged_count == unique >= args.projects):
+        sys.exit('✗ Paginated mode did not return every project exactly once')
+    if full_count is not None and full_count != paged_count:
+        sys.exit('✗ Full and paginated counts do not match')
+    if max(full_peak, paged_peak) > args.max_peak_mb:
+        sys.exit(f'✗ Peak memory {max(full_peak, paged_peak):.1f} MB is over the {args.max_peak_mb:.0f} MB bound')
+    print('✅ All projects returned' + (' in both modes' if full_count is not None else
+                                       '; full mode refused with 413 as the body passed the response limit'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: resolve spreadsheet model numbers against a large catalog.
+
+Builds a synthetic catalog of --skus model numbers, then matches --rows
+incoming values: most are re-spelled catalog SKUs (case, spaces,
+hyphens), some carry a typo or a dropped suffix, the rest are unknown.
+Reports index build time, match time and how many rows resolved to the
+SKU they were derived from. No DynamoDB needed.
+
+Usage:
+    python benchmarks/model_matching.py --skus 1000000 --rows 100000
+"""
+
+import argparse
+import random
+import time
+
+import common  # noqa: F401  (puts the repository root on sys.path)
+
+from materials_db.model_numbers import ModelIndex
+
+PREFIXES = ['K', 'M', 'D', 'AS', 'FV', 'DT', 'WW', 'S', 'GE', 'MX']
+SUFFIXES = ['2MB', 'BN', 'CP', '0', 'BLG', 'SRS', 'WHT', 'GRY', 'CG', 'NA']
+
+
+def make_catalog(count, seed=11):
+    rng = random.Random(seed)
+    catalog = []
+    for i in range(count):
+        model = f'{rng.choice(PREFIXES)}-{rng.randrange(10 ** 6):06d}-{rng.choice(SUFFIXES)}'
+        catalog.append({'id': f'prod-{i:07d}', 'modelNumber': model})
+    return catalog
+
+
+def respell(rng, model):
+    kind = rng.random()
+    if kind < 0.7:
+        return model.replace('-', rng.choice(['', ' ', '-', '_'])).lower() if rng.random() < 0.5 else model, 'exact'
+    if kind < 0.9:
+        chars = list(model)
+        position = rng.randrange(len(chars))
+        if chars[position].isdigit():
+            chars[position] = str((int(chars[position]) + 1) % 10)
+        else:
+            del chars[position]
+        return ''.join(chars), 'fuzzy'
+    return f'ZZ{rng.randrange(10 ** 8)}Q', 'unknown'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--skus', type=int, default=1000000)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--min-score', type=float, default=0.6)
+    args = parser.parse_args()
+
+    catalog = make_catalog(args.skus)
+    rng = random.Random(5)
+    sources = [rng.randrange(args.skus) for _ in range(args.rows)]
+    rows, kinds = zip(*(respell(rng, catalog[source]['modelNumber']) for source in sources))
+
+    start = time.perf_counter()
+    index = ModelIndex(catalog)
+    loaded = time.perf_counter()
+    index.match('warm-up-000')  # builds the 4-gram postings
+    built = time.perf_counter()
+    matches = index.match_many(list(rows), args.min_score)
+    matched = time.perf_counter()
+
+    print(f'catalog load          {loaded - start:>8.2f}s  ({len(index):,} SKUs)')
+    print(f'4-gram index build    {built - loaded:>8.2f}s')
+    print(f'match {len(rows):,} rows    {matched - built:>8.2f}s')
+    for kind in ('exact', 'fuzzy', 'unknown'):
+        positions = [i for i, k in enumerate(kinds) if k == kind]
+        found = sum(1 for i in positions if matches[i])
+        correct = sum(1 for i in positions if matches[i] and matches[i].productId == catalog[sources[i]]['id'])
+        print(f'  {kind:<8} {len(positions):>7,} rows  {found:>7,} matched  {correct:>7,} to the source SKU')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Time a cold full-table read at increasing segment counts.
+
+Usage:
+    export AWS_ENDPOINT_URL_DYNAMODB=http://localhost:8000
+    python benchmarks/parallel_scan.py --items 200000 --segments 1 2 4 8 16
+"""
+
+import argparse
+import time
+from uuid import uuid4
+
+from common import ensure_table, require_local_endpoint
+
+import boto3
+
+from materials_db.scan import scan_all
+
+TABLE_NAME = 'MaterialsSelection-Products'
+
+
+def load_products(table, count):
+    with table.batch_writer() as batch:
+        for i in range(count):
+            batch.put_item(Item={
+                'id': str(uuid4()),
+                'manufacturerId': f'mfr-{i % 50}',
+                'name': f'Product {i}',
+                'modelNumber': f'MDL-{i:07d}',
+                'description': 'Synthetic catalog entry for scan benchmark ' * 4,
+                'category': 'Plumbing',
+            })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=200000)
+    parser.add_argument('--segments', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--projection', nargs='*', default=None,
+                        help='Attribute names to project (default: whole items)')
+    parser.add_argument('--consistent', action='store_true')
+    parser.add_argument('--skip-load', action='store_true')
+    args = parser.parse_args()
+
+    require_local_endpoint()
+    table = ensure_table(boto3.resource('dynamodb'), TABLE_NAME)
+    if not args.skip_load:
+        load_products(table, args.items)
+
+    baseline = None
+    print(f"{'segments':>8}  {'items':>8}  {'seconds':>8}  {'speedup':>7}")
+    for segments in args.segments:
+        start = time.perf_counter()
+        items = scan_all(table, segments, projection=args.projection,
+                         consistent_read=args.consistent)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f'{segments:>8}  {len(items):>8}  {elapsed:>8.2f}  {baseline / elapsed:>6.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark: type-ahead product search over a large catalog.
+
+Builds a synthetic catalog of --skus products with realistic names, model
+numbers and descriptions, writes the materials_db.search index, then
+times:
+
+- the full build and an incremental rebuild after --changed products
+  are edited;
+- opening the index (what a Lambda cold start pays, excluding imports);
+- type-ahead queries, one per keystroke, over product names and model
+  numbers, with and without a category filter (p50 / p99 / max).
+
+No DynamoDB needed.
+
+Usage:
+    python benchmarks/product_search.py --skus 300000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import common  # noqa: F401  (puts the repository root on sys.path)
+
+from materials_db.search import SearchIndex, build_index
+
+TYPES = ['Faucet', 'Sink', 'Toilet', 'Vanity', 'Mirror', 'Sconce', 'Pendant', 'Exhaust Fan', 'Towel Ring',
+         'Towel Bar', 'Shower Trim', 'Tub Spout', 'Drawer Pull', 'Cabinet Knob', 'Floor Tile', 'Wall Tile',
+         'Mosaic Tile', 'Medicine Cabinet', 'Paper Holder', 'Robe Hook', 'Drain', 'Valve', 'Showerhead']
+FINISHES = ['Matte Black', 'Brushed Nickel', 'Polished Chrome', 'Brushed Gold', 'Oil-Rubbed Bronze', 'White',
+            'Stainless Steel', 'Gray', 'Champagne Bronze', 'Satin Brass']
+STYLES = ['Margaux', 'Composed', 'Corbelle', 'Caxton', 'Monitor', 'Posi-Temp', 'Magnetix', 'Retrospect',
+          'Champion', 'Purist', 'Artifacts', 'Devonshire', 'Lyndon', 'Trinsic', 'Align', 'Voss']
+CATEGORIES = ['Plumbing', 'Lighting', 'Hardware', 'Accessories', 'Flooring', 'Wall Tile', 'Storage',
+              'Ventilation', 'Cabinetry']
+MANUFACTURERS = ['Kohler', 'Moen', 'Delta', 'American Standard', 'Panasonic', 'Daltile', 'Signature',
+                 'Pfister', 'Hansgrohe', 'Grohe']
+
+
+def make_catalog(count, seed=3):
+    rng = random.Random(seed)
+    products = []
+    for i in range(count):
+        kind, finish, style = rng.choice(TYPES), rng.choice(FINISHES), rng.choice(STYLES)
+        maker = rng.randrange(len(MANUFACTURERS))
+        products.append({
+            'id': f'prod-{i:07d}',
+            'name': f'{style} {kind}',
+            'modelNumber': f'{MANUFACTURERS[maker][0]}-{rng.randrange(10 ** 6):06d}-{rng.choice(["2MB", "BN", "CP", "0"])}',
+            'description': f'{style} {kind.lower()} - {finish}, {rng.randrange(4, 60)}" {rng.choice(STYLES)} series',
+            'category': rng.choice(CATEGORIES),
+            'manufacturerId': f'mfr-{maker}',
+        })
+    return products
+
+
+def keystrokes(text):
+    return [text[:end] for end in range(2, len(text) + 1)]
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--skus', type=int, default=300000)
+    parser.add_argument('--changed', type=int, default=1000)
+    parser.add_argument('--queries', type=int, default=200, help='Products whose name/model is typed out')
+    args = parser.parse_args()
+
+    catalog = make_catalog(args.skus)
+    manufacturers = {f'mfr-{i}': name for i, name in enumerate(MANUFACTURERS)}
+    path = os.path.join(tempfile.mkdtemp(), 'products.idx')
+
+    stats = build_index(path, catalog, manufacturers, full=True)
+    print(f"full build          {stats['seconds']:>8.2f}s  {stats['docs']:,} products, {stats['terms']:,} terms, "
+          f"{stats['postings']:,} postings, {stats['bytes'] / 1e6:.1f} MB")
+    rng = random.Random(9)
+    for product in rng.sample(catalog, args.changed):
+        product['description'] += ' (updated)'
+    stats = build_index(path, catalog, manufacturers)
+    print(f"incremental build   {stats['seconds']:>8.2f}s  {stats['tokenized']:,} re-tokenized, "
+          f"{stats['reused']:,} reused")
+
+    start = time.perf_counter()
+    index = SearchIndex(path)
+    print(f"open (mmap)         {(time.perf_counter() - start) * 1000:>8.2f}ms")
+
+    samples = rng.sample(catalog, args.queries)
+    workloads = {
+        'name keystrokes': [(query, None) for product in samples
+                            for query in keystrokes(f"{manufacturers[product['manufacturerId']]} {product['name']}")],
+        'model keystrokes': [(query, None) for product in samples for query in keystrokes(product['modelNumber'])],
+        'name + category': [(query, product['category']) for product in samples
+                            for query in keystrokes(product['name'])],
+    }
+    for label, queries in workloads.items():
+        timings, found = [], 0
+        for query, category in queries:
+            start = time.perf_counter()
+            results = index.search(query, category=category)
+            timings.append((time.perf_counter() - start) * 1000)
+            found += bool(results)
+        print(f"{label:<19} {len(queries):>6} queries  p50 {statistics.median(timings):6.2f}ms  "
+              f"p99 {percentile(timings, 0.99):6.2f}ms  max {max(timings):6.2f}ms  ({found} with results)")
+
+
+if __name__ == '__main__':
+    main()
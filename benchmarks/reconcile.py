@@ -0,0 +1,56 @@
+"""
+Benchmark: order/receipt reconciliation at portfolio scale.
+
+Generates --projects synthetic projects (orders, order items, receipts and
+line items included) and runs materials_db.reconcile over them in memory,
+once per --partitions value, reporting time, rows joined per second and
+peak traced memory. No DynamoDB needed; the scans the nightly audit adds
+on top are measured by benchmarks/parallel_scan.py.
+
+Usage:
+    python benchmarks/reconcile.py --projects 20000 --partitions 1 4
+"""
+
+import argparse
+import time
+import tracemalloc
+from datetime import date
+
+import common  # noqa: F401  (puts the repository root on sys.path)
+
+from materials_db.reconcile import reconcile
+from materials_db.synthetic import counts, generate
+
+TABLES = ('Orders', 'OrderItems', 'Receipts', 'LineItems')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--projects', type=int, default=5000)
+    parser.add_argument('--items-per-project', type=int, default=60)
+    parser.add_argument('--partitions', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--no-tracemalloc', action='store_true', help='Time only (tracing slows the run)')
+    args = parser.parse_args()
+
+    data = generate(args.projects, args.items_per_project)
+    sizes = counts(data)
+    rows = sum(sizes[name] for name in TABLES)
+    print(', '.join(f'{sizes[name]:,} {name}' for name in TABLES))
+    sources = {name: (lambda name=name: iter(data[name])) for name in TABLES}
+
+    for partitions in args.partitions:
+        if not args.no_tracemalloc:
+            tracemalloc.start()
+        start = time.perf_counter()
+        reports = reconcile(sources, date(2026, 10, 1), args.days, partitions)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / 1e6 if tracemalloc.is_tracing() else float('nan')
+        tracemalloc.stop()
+        found = sum(len(report['discrepancies']) for report in reports.values())
+        print(f'partitions={partitions:<3} {elapsed:>7.2f}s  {rows / elapsed:>10,.0f} rows/s  '
+              f'peak {peak:>7.1f} MB  {len(reports):,} projects, {found:,} discrepancies')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+Benchmark: a background backfill next to live API traffic, with and without
+the capacity scheduler (materials_db.scheduler).
+
+Local DynamoDB never throttles, so the table is simulated in-process: a
+client whose writes draw from a provisioned WCU bucket and are rejected
+with ProvisionedThroughputExceededException (or handed back as
+UnprocessedItems) once it is empty. A "live" thread plays the API, sending
+single-item writes at --live-rate per second straight at the table, as the
+Lambda functions do. Meanwhile put_items() backfills --items rows, once
+unscheduled (BULK_RATE_LIMIT=off, the old behavior) and once scheduled at
+background priority. For each run it reports how many live writes were
+throttled, the backfill's throughput and throttles, and how well the ETA
+reported halfway through predicted the actual finish.
+
+Usage:
+    python benchmarks/scheduler.py
+    python benchmarks/scheduler.py --wcu 400 --live-rate 150 --items 12000 --business-hours
+"""
+
+import argparse
+import threading
+import time
+
+from common import ROOT  # noqa: F401 (puts the repo root on sys.path)
+
+from botocore.exceptions import ClientError
+
+from materials_db.bulk import put_items
+from materials_db.scheduler import BACKGROUND_SHARE, BUSINESS_SHARE, INTERACTIVE_SHARE, Scheduler, TokenBucket
+
+TABLE_NAME = 'MaterialsSelection-Backfill'
+LATENCY = 0.004  # seconds per simulated request
+
+
+class SimulatedClient:
+    """Just enough of a DynamoDB client for put_items() on a provisioned table."""
+
+    def __init__(self, wcu):
+        self.wcu = wcu
+        self.bucket = TokenBucket(wcu)
+        self.lock = threading.Lock()
+        self.throttled = {'live': 0, 'backfill': 0}
+
+    def describe_table(self, TableName):
+        return {'Table': {'TableName': TableName, 'BillingModeSummary': {'BillingMode': 'PROVISIONED'},
+                          'ProvisionedThroughput': {'ReadCapacityUnits': self.wcu, 'WriteCapacityUnits': self.wcu}}}
+
+    def _consume(self, units):
+        """Units the table accepts right now (all or nothing per item)."""
+        with self.lock:
+            self.bucket.refill()
+            accepted = min(units, max(0, int(self.bucket.tokens)))
+            self.bucket.take(accepted)
+            return accepted
+
+    def _throttle(self, operation):
+        raise ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException',
+                                     'Message': 'The level of configured provisioned throughput was exceeded'}},
+                          operation)
+
+    def put_item(self, TableName, Item):
+        time.sleep(LATENCY)
+        if not self._consume(1):
+            self.throttled['live'] += 1
+            self._throttle('PutItem')
+        return {}
+
+    def batch_write_item(self, RequestItems, ReturnConsumedCapacity=None):
+        time.sleep(LATENCY)
+        (table_name, requests), = RequestItems.items()
+        accepted = self._consume(len(requests))
+        if not accepted:
+            self.throttled['backfill'] += 1
+            self._throttle('BatchWriteItem')
+        response = {'ConsumedCapacity': [{'TableName': table_name, 'CapacityUnits': float(accepted)}]}
+        if accepted < len(requests):
+            self.throttled['backfill'] += 1
+            response['UnprocessedItems'] = {table_name: requests[accepted:]}
+        return response
+
+
+class SimulatedTable:
+    def __init__(self, client):
+        self.name = TABLE_NAME
+        self.meta = type('Meta', (), {'client': client})()
+
+
+def live_traffic(client, rate, stop, counts):
+    """Single-item writes at `rate` per second until `stop` is set."""
+    interval = 1.0 / rate
+    deadline = time.monotonic()
+    while not stop.is_set():
+        try:
+            client.put_item(TableName=TABLE_NAME, Item={'id': f'live-{counts["sent"]}'})
+        except ClientError:
+            pass
+        counts['sent'] += 1
+        deadline += interval
+        time.sleep(max(0.0, deadline - time.monotonic()))
+
+
+def run(label, scheduler, args):
+    client = SimulatedClient(args.wcu)
+    table = SimulatedTable(client)
+    stop, counts = threading.Event(), {'sent': 0}
+    live = threading.Thread(target=live_traffic, args=(client, args.live_rate, stop, counts), daemon=True)
+    live.start()
+    time.sleep(1.0)  # let the live traffic settle in first
+
+    items = [{'id': f'backfill-{i:06d}', 'name': 'Backfilled product'} for i in range(args.items)]
+    job = scheduler.job('backfill', table, total=len(items))
+    halfway = {}
+
+    def progress(stats):
+        if 'eta' not in halfway and job.done >= len(items) / 2:
+            halfway['eta'] = job.eta
+            halfway['at'] = job.elapsed
+
+    live_throttled = client.throttled['live']
+    stats = put_items(table, items, concurrency=args.concurrency, job=job, progress=progress)
+    job.finish()
+    stop.set()
+    live.join()
+
+    live_throttled = client.throttled['live'] - live_throttled
+    predicted = (halfway.get('eta') or 0.0) + halfway.get('at', 0.0)
+    print(f"{label:<12} {stats.elapsed:>8.1f} {stats.rows_per_second:>10,.0f} "
+          f"{client.throttled['backfill']:>10,} {stats.retries:>8,} {len(stats.unprocessed):>8,} "
+          f"{live_throttled:>6,}/{counts['sent']:<6,} {predicted:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--wcu', type=int, default=200, help='Provisioned write capacity of the table')
+    parser.add_argument('--live-rate', type=float, default=60, help='Live writes per second')
+    parser.add_argument('--items', type=int, default=4000, help='Rows to backfill')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--business-hours', action='store_true',
+                        help=f'Schedule background work at the business-hours share ({BUSINESS_SHARE:.0%})')
+    args = parser.parse_args()
+
+    background = BUSINESS_SHARE if args.business_hours else BACKGROUND_SHARE
+    shares = {'live': 1.0, 'interactive': INTERACTIVE_SHARE, 'background': background}
+    print(f'{args.wcu} WCU provisioned, {args.live_rate:.0f} live writes/s, {args.items:,} rows backfilled '
+          f'at {args.concurrency} threads; background share {background:.0%}\n')
+    print(f"{'mode':<12} {'seconds':>8} {'rows/s':>10} {'throttled':>10} {'retries':>8} {'unproc.':>8} "
+          f"{'live throttled':>13} {'predicted':>9}")
+    run('unscheduled', Scheduler(enabled=False), args)
+    run('scheduled', Scheduler(shares=shares), args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Microbenchmark: old DecimalEncoder vs materials_db.serialization.
+
+Runs in-process on synthetic project items; no DynamoDB needed.
+
+Usage:
+    python benchmarks/serialization.py --sizes 1000 10000 100000
+"""
+
+import argparse
+import gzip
+import json
+import timeit
+from decimal import Decimal
+
+import common  # noqa: F401  (puts the repository root on sys.path)
+
+from materials_db.serialization import compress, encode_item_pages, encode_json
+
+
+class DecimalEncoder(json.JSONEncoder):
+    """The encoder GetProjects used before materials_db.serialization."""
+
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return float(obj)
+        return super(DecimalEncoder, self).default(obj)
+
+
+def make_projects(count):
+    return [{
+        'id': f'00000000-0000-4000-8000-{i:012d}',
+        'name': f'Vance Bathroom Remodel {i}',
+        'description': 'Complete bathroom renovation with custom vanity and tile',
+        'projectNumber': f'{39000 + i}-LNC',
+        'customerName': 'Terry & Stacey Vance',
+        'status': 'in-progress',
+        'type': 'bath',
+        'budget': Decimal('45000.10') + i,
+        'allowance': Decimal('3200'),
+        'actualCost': Decimal('3100.55'),
+        'createdAt': '2026-01-15T10:00:00Z',
+        'updatedAt': '2026-02-01T08:30:00Z',
+    } for i in range(count)]
+
+
+def best_of(fn, repeat):
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'items':>8}  {'encoder':<22} {'ms':>9}  {'bytes':>11}")
+    for size in args.sizes:
+        items = make_projects(size)
+        pages = [items[i:i + 1000] for i in range(0, size, 1000)]
+        cases = [
+            ('DecimalEncoder', lambda: json.dumps({'projects': items}, cls=DecimalEncoder).encode('utf-8')),
+            ('encode_json float', lambda: encode_json({'projects': items}, exact_decimals=False)),
+            ('encode_json exact', lambda: encode_json({'projects': items})),
+            ('encode_item_pages', lambda: b''.join(encode_item_pages(pages, 'projects'))),
+            ('DecimalEncoder+gzip6', lambda: gzip.compress(
+                json.dumps({'projects': items}, cls=DecimalEncoder).encode('utf-8'))),
+            ('encode_json+gzip', lambda: compress(encode_json({'projects': items}), 'gzip')),
+        ]
+        for label, fn in cases:
+            seconds = best_of(fn, args.repeat)
+            print(f'{size:>8}  {label:<22} {seconds * 1000:>9.1f}  {len(fn()):>11}')
+        print()
+
+
+if __name__ == '__main__':
+    main()
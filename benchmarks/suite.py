@@ -0,0 +1,230 @@
+"""
+Benchmark suite: synthetic data at scale, the GetProjects handler and the
+seed/update scripts against a local DynamoDB, recorded to JSON.
+
+Each run generates data with materials_db.synthetic, drops and reloads the
+tables (so rows added by the previous run's scripts never accumulate), times
+handler requests (latency percentiles and requests/s), runs the seed and
+update scripts as child processes (wall time and peak RSS each), and
+writes everything plus the git commit to one JSON file so runs can be
+compared across commits with --compare.
+
+Usage:
+    export AWS_ENDPOINT_URL_DYNAMODB=http://localhost:8000
+    python benchmarks/suite.py --projects 200 --output before.json
+    python benchmarks/suite.py --projects 200 --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import common
+from common import drop_table, ensure_table, require_local_endpoint
+
+from materials_db.bulk import put_items
+from materials_db.repository import get_resource, table_name
+from materials_db.synthetic import TABLE_INDEXES, counts, generate
+
+SCRIPTS = [
+    ('seed_data', ['seed_data.py']),
+    ('seed_products', ['seed_products.py']),
+    ('seed_product_vendors', ['seed_product_vendors.py']),
+    ('update_product_urls', ['update_product_urls.py', '--quiet']),
+    ('budget_report', ['budget_report.py', '--json']),
+]
+
+# Query parameters per handler case; None walks every page by cursor.
+HANDLER_CASES = {
+    'full': {},
+    'page_100': {'limit': '100'},
+    'page_100_summary': {'limit': '100', 'include': 'summary'},
+    'page_25_categories_summary': {'limit': '25', 'include': 'categories,summary'},
+    'cursor_walk': None,
+}
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+
+    def at(fraction):
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+    return {
+        'count': len(ordered),
+        'p50': round(at(0.5), 2),
+        'p90': round(at(0.9), 2),
+        'p99': round(at(0.99), 2),
+        'max': round(ordered[-1], 2),
+        'per_second': round(len(ordered) / (sum(ordered) / 1000), 1) if sum(ordered) else None,
+    }
+
+
+def peak_rss_mb(maxrss):
+    # ru_maxrss is kilobytes on Linux and bytes on macOS.
+    return round(maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=common.ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load(data, concurrency):
+    dynamodb = get_resource()
+    results = {}
+    for name, indexes in TABLE_INDEXES.items():
+        # Start from exactly the generated rows: the seed scripts below add
+        # their own vendors, products and relationships to these tables.
+        drop_table(dynamodb, table_name(name))
+        table = ensure_table(dynamodb, table_name(name), indexes)
+        stats = put_items(table, data[name], concurrency=concurrency)
+        results[name] = {'rows': len(data[name]), 'rows_per_second': round(stats.rows_per_second, 1)}
+        print(f"  {name:<16} {len(data[name]):>9,} rows  {stats.rows_per_second:>10,.0f} rows/s")
+    return results
+
+
+def run_handler(repeat):
+    os.environ.setdefault('COLD_START_METRICS', 'off')
+    import index
+
+    results = {}
+    for label, params in HANDLER_CASES.items():
+        samples = []
+        for _ in range(repeat):
+            index.cache.invalidate()
+            if params is None:
+                samples.extend(walk_pages(index))
+                continue
+            start = time.perf_counter()
+            response = index.lambda_handler({'queryStringParameters': params}, None)
+            samples.append((time.perf_counter() - start) * 1000)
+            if response['statusCode'] != 200:
+                raise RuntimeError(f'{label}: HTTP {response["statusCode"]} {response.get("body")}')
+        results[label] = percentiles(samples)
+        print(f"  {label:<28} p50 {results[label]['p50']:>9.1f} ms  p90 {results[label]['p90']:>9.1f} ms  "
+              f"p99 {results[label]['p99']:>9.1f} ms")
+    return results
+
+
+def walk_pages(index, limit='100'):
+    """Follow nextCursor through every project; returns per-page latencies."""
+    samples = []
+    cursor = None
+    while True:
+        params = {'limit': limit}
+        if cursor:
+            params['cursor'] = cursor
+        start = time.perf_counter()
+        response = index.lambda_handler({'queryStringParameters': params}, None)
+        samples.append((time.perf_counter() - start) * 1000)
+        cursor = json.loads(response['body'])['nextCursor']
+        if not cursor:
+            return samples
+
+
+def run_script(args):
+    """Run a repository script; returns wall time, peak RSS and exit status."""
+    start = time.perf_counter()
+    with open(os.devnull, 'wb') as devnull:
+        process = subprocess.Popen([sys.executable] + args, cwd=common.ROOT, stdout=devnull,
+                                   stderr=subprocess.PIPE)
+        stderr = process.stderr.read()
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    result = {
+        'seconds': round(time.perf_counter() - start, 3),
+        'peak_rss_mb': peak_rss_mb(usage.ru_maxrss),
+        'exit_code': process.returncode,
+    }
+    if process.returncode:
+        result['error'] = stderr.decode('utf-8', 'replace').strip().splitlines()[-1:]
+    return result
+
+
+def compare(current, previous_path):
+    with open(previous_path) as f:
+        previous = json.load(f)
+    print(f"\nCompared with {previous.get('commit')} ({previous_path}):")
+    for label, stats in current['handler'].items():
+        before = previous.get('handler', {}).get(label)
+        if before:
+            change = (stats['p50'] - before['p50']) / before['p50'] * 100 if before['p50'] else 0
+            print(f"  {label:<28} p50 {before['p50']:>9.1f} -> {stats['p50']:>9.1f} ms ({change:+.0f}%)")
+    for label, stats in current['scripts'].items():
+        before = previous.get('scripts', {}).get(label)
+        if before:
+            print(f"  {label:<28} {before['seconds']:>8.2f} -> {stats['seconds']:>8.2f} s  "
+                  f"{before['peak_rss_mb']:>7.1f} -> {stats['peak_rss_mb']:>7.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--projects', type=int, default=100)
+    parser.add_argument('--items-per-project', type=int, default=60, help='Mean; sizes are long-tailed')
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--vendors', type=int, default=40)
+    parser.add_argument('--manufacturers', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--concurrency', type=int, default=8, help='Bulk load writers')
+    parser.add_argument('--repeat', type=int, default=20, help='Handler requests per case')
+    parser.add_argument('--skip-load', action='store_true',
+                        help="Reuse data already in the tables, including rows the last run's scripts added")
+    parser.add_argument('--skip-scripts', action='store_true')
+    parser.add_argument('--output', help='JSON results file (default: suite-<commit>.json)')
+    parser.add_argument('--compare', help='Earlier results file to diff against')
+    args = parser.parse_args()
+
+    require_local_endpoint()
+    commit = git_commit()
+    results = {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'parameters': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+    }
+
+    start = time.perf_counter()
+    data = generate(args.projects, args.items_per_project, args.vendors, args.manufacturers,
+                    args.products, args.seed)
+    results['generate_seconds'] = round(time.perf_counter() - start, 3)
+    results['rows'] = counts(data)
+    print(f"Generated {sum(results['rows'].values()):,} rows in {results['generate_seconds']:.2f}s")
+
+    if not args.skip_load:
+        print('Loading:')
+        results['load'] = load(data, args.concurrency)
+    del data
+
+    print('Handler:')
+    results['handler'] = run_handler(args.repeat)
+    results['handler_peak_rss_mb'] = peak_rss_mb(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+    results['scripts'] = {}
+    if not args.skip_scripts:
+        print('Scripts:')
+        for label, script in SCRIPTS:
+            stats = results['scripts'][label] = run_script(script)
+            mark = '✓' if not stats['exit_code'] else '✗'
+            print(f"  {mark} {label:<26} {stats['seconds']:>8.2f} s  {stats['peak_rss_mb']:>7.1f} MB peak RSS")
+
+    output = args.output or f"suite-{commit or 'unknown'}.json"
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'\n✓ Wrote {output}')
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
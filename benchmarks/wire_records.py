@@ -0,0 +1,154 @@
+"""
+Benchmark: resource-layer dicts vs wire-format records for a catalog load.
+
+Loads the catalog and vendor graph (Products, Vendors, Manufacturers,
+ProductVendors, as seed_product_vendors.py does) into {id: item} maps two
+ways and reports decode throughput and the memory the loaded maps retain:
+
+- resource: botocore parses each Scan page against the service model and
+  TypeDeserializer turns it into dicts of Decimal (what table.scan() and
+  parallel_scan() over get_resource() do);
+- records: materials_db.records' before-parse hook hands the items over
+  after json.loads, and they become slotted records.
+
+By default the Scan pages are synthesized in-process (1 MB pages, as
+DynamoDB returns them), so only client-side decoding is measured. --live
+loads the same data into a local DynamoDB and times full parallel scans
+through both clients instead.
+
+Usage:
+    python benchmarks/wire_records.py --products 200000
+    AWS_ENDPOINT_URL_DYNAMODB=http://localhost:8000 python benchmarks/wire_records.py --live --products 20000
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.parsers import create_parser
+from botocore.session import get_session
+
+from common import ensure_table, require_local_endpoint
+
+from materials_db.bulk import put_items
+from materials_db.records import RECORD_TYPES, _skip_item_parsing, load_records
+from materials_db.repository import get_resource, table_name
+from materials_db.scan import scan_all
+from materials_db.synthetic import TABLE_INDEXES, generate
+
+TABLES = ('Manufacturers', 'Vendors', 'Products', 'ProductVendors')
+PAGE_BYTES = 1024 * 1024
+_SEPARATORS = (',', ':')
+
+
+def scan_pages(items):
+    """Scan response bodies of at most ~1 MB of wire-format items each."""
+    serializer = TypeSerializer()
+    pages, page, size = [], [], 0
+    for item in items:
+        wire = {name: serializer.serialize(value) for name, value in item.items()}
+        page.append(wire)
+        size += len(json.dumps(wire, separators=_SEPARATORS))
+        if size >= PAGE_BYTES:
+            pages.append(json.dumps({'Items': page, 'Count': len(page), 'ScannedCount': len(page),
+                                     'LastEvaluatedKey': {'id': page[-1]['id']}}, separators=_SEPARATORS).encode())
+            page, size = [], 0
+    if page:
+        pages.append(json.dumps({'Items': page, 'Count': len(page), 'ScannedCount': len(page)},
+                                separators=_SEPARATORS).encode())
+    return pages
+
+
+def decode_resource(bodies, parser, shape, name):
+    deserialize = TypeDeserializer().deserialize
+    loaded = {}
+    for body in bodies:
+        parsed = parser.parse({'body': body, 'headers': {}, 'status_code': 200}, shape)
+        for item in parsed['Items']:
+            item = {key: deserialize(value) for key, value in item.items()}
+            loaded[item['id']] = item
+    return loaded
+
+
+class _Operation:
+    name = 'Scan'
+
+
+def decode_records(bodies, parser, shape, name):
+    from_wire = RECORD_TYPES[name].from_wire
+    loaded = {}
+    for body in bodies:
+        response_dict, customized = {'body': body, 'headers': {}, 'status_code': 200}, {}
+        _skip_item_parsing(_Operation, response_dict, customized)
+        parsed = parser.parse(response_dict, shape)
+        parsed.update(customized)
+        for record in map(from_wire, parsed['Items']):
+            loaded[record.id] = record
+    return loaded
+
+
+def measure(load):
+    """(seconds, retained MB) of load() -> {table: {id: item}}; timed without tracing."""
+    gc.collect()
+    start = time.perf_counter()
+    loaded = load()
+    elapsed = time.perf_counter() - start
+    del loaded
+    gc.collect()
+    tracemalloc.start()
+    loaded = load()
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+    del loaded
+    return elapsed, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--vendors', type=int, default=200)
+    parser.add_argument('--live', action='store_true', help='Scan a local DynamoDB instead of synthetic pages')
+    args = parser.parse_args()
+
+    data = generate(projects=0, vendors=args.vendors, manufacturers=max(10, args.products // 1000),
+                    products=args.products)
+    rows = sum(len(data[name]) for name in TABLES)
+    print(', '.join(f'{len(data[name]):,} {name}' for name in TABLES))
+
+    if args.live:
+        require_local_endpoint()
+        dynamodb = get_resource()
+        for name in TABLES:
+            put_items(ensure_table(dynamodb, table_name(name), TABLE_INDEXES[name]), data[name])
+        del data
+        modes = {
+            'resource': lambda: {name: {item['id']: item for item in scan_all(dynamodb.Table(table_name(name)))}
+                                 for name in TABLES},
+            'records': lambda: {name: load_records(name) for name in TABLES},
+        }
+        raw = None
+    else:
+        pages = {name: scan_pages(data[name]) for name in TABLES}
+        del data
+        raw = sum(len(body) for bodies in pages.values() for body in bodies) / 1e6
+        print(f'{sum(map(len, pages.values()))} Scan pages, {raw:.1f} MB of wire JSON')
+        botocore = create_parser('json')
+        shape = get_session().get_service_model('dynamodb').operation_model('Scan').output_shape
+        modes = {
+            'resource': lambda: {name: decode_resource(pages[name], botocore, shape, name) for name in TABLES},
+            'records': lambda: {name: decode_records(pages[name], botocore, shape, name) for name in TABLES},
+        }
+
+    print(f"\n{'mode':<10} {'seconds':>8} {'items/s':>11} {'retained MB':>12}" + ('  x wire' if raw else ''))
+    for mode, load in modes.items():
+        elapsed, retained = measure(load)
+        ratio = f'  {retained / raw:6.1f}' if raw else ''
+        print(f'{mode:<10} {elapsed:>8.2f} {rows / elapsed:>11,.0f} {retained:>12.1f}{ratio}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Compare per-item update_item calls with materials_db.write_behind for a delivery.
+
+Marks --items line items received (receivedDate, status, stagingLocation),
+once with an update_item loop and once through WriteBehind, and reports
+wall time and DynamoDB round trips for each. --repeat edits every row that
+many times to show coalescing.
+
+Usage:
+    export AWS_ENDPOINT_URL_DYNAMODB=http://localhost:8000
+    python benchmarks/write_behind.py --items 300 --repeat 2
+"""
+
+import argparse
+import time
+
+from common import ensure_table, require_local_endpoint
+
+import boto3
+
+from materials_db.bulk import put_items
+from materials_db.write_behind import WriteBehind
+
+TABLE_NAME = 'MaterialsSelection-LineItems'
+
+
+def count_calls(client):
+    """Count API calls made through `client`; returns a dict updated in place."""
+    calls = {'count': 0}
+
+    def before_call(**kwargs):
+        calls['count'] += 1
+
+    client.meta.events.register('before-call.dynamodb', before_call)
+    return calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=1, help='Edits per line item')
+    args = parser.parse_args()
+
+    require_local_endpoint()
+    table = ensure_table(boto3.resource('dynamodb'), TABLE_NAME)
+    ids = [f'bench-delivery-{i:05d}' for i in range(args.items)]
+    put_items(table, ({'id': line_item_id, 'name': 'Delivered item', 'status': 'ordered'} for line_item_id in ids))
+    calls = count_calls(table.meta.client)
+
+    start = time.perf_counter()
+    for round_number in range(args.repeat):
+        for line_item_id in ids:
+            table.update_item(
+                Key={'id': line_item_id},
+                UpdateExpression='SET receivedDate = :date, #status = :status, stagingLocation = :location',
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={':date': '2026-02-10', ':status': 'received',
+                                           ':location': f'Bay {round_number}'},
+            )
+    elapsed = time.perf_counter() - start
+    print(f'update_item loop   {elapsed:>8.2f}s  {calls["count"]:>6} calls')
+
+    calls['count'] = 0
+    start = time.perf_counter()
+    with WriteBehind(table) as writes:
+        for round_number in range(args.repeat):
+            for line_item_id in ids:
+                writes.update(line_item_id, {'receivedDate': '2026-02-10', 'status': 'received',
+                                             'stagingLocation': f'Bay {round_number}'})
+    elapsed = time.perf_counter() - start
+    print(f'WriteBehind        {elapsed:>8.2f}s  {calls["count"]:>6} calls  ({writes.stats.summary()})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Budget-vs-actual report for one project or the whole active portfolio.
+
+Line items are rolled up per category and project with
+materials_db.rollup; the totals are read once, so its one-pass Decimal
+rollup is used rather than building NumPy arrays. Variance is allowance
+minus actual cost, so negative numbers are over budget.
+
+Usage:
+    python budget_report.py
+    python budget_report.py --project 3f1c...
+    python budget_report.py --all-statuses --json > portfolio.json
+"""
+
+import argparse
+import sys
+import time
+
+from materials_db.repository import get_resource
+from materials_db.rollup import ACTIVE_STATUSES, load_portfolio, load_project
+from materials_db.serialization import encode_json
+
+parser = argparse.ArgumentParser(description='Budget-vs-actual report for projects.')
+parser.add_argument('--project', help='Report on this project only (per category)')
+parser.add_argument('--all-statuses', action='store_true', help='Include completed projects')
+parser.add_argument('--json', action='store_true', help='Print JSON instead of a table')
+args = parser.parse_args()
+
+dynamodb = get_resource()
+tables = {name: dynamodb.Table(f'MaterialsSelection-{name}') for name in ('Projects', 'Categories', 'LineItems')}
+
+start = time.perf_counter()
+if args.project:
+    rollup = load_project(tables, args.project, one_shot=True)
+    rows = rollup.category_totals(args.project)
+    label, key = 'Category', 'name'
+else:
+    rollup = load_portfolio(tables, None if args.all_statuses else ACTIVE_STATUSES, one_shot=True)
+    rows = rollup.project_totals()
+    label, key = 'Project', 'projectId'
+elapsed = time.perf_counter() - start
+
+if args.json:
+    sys.stdout.buffer.write(encode_json(rows) + b'\n')
+    sys.exit(0)
+
+print(f"{label:<38} {'Items':>6} {'Actual':>13} {'Allowance':>13} {'Variance':>13}")
+for row in rows:
+    flag = '⚠️ ' if row['variance'] < 0 else '   '
+    print(f"{flag}{str(row[key] or row.get('categoryId')):<35} {row['items']:>6} "
+          f"{row['actualCost']:>13,.2f} {row['allowance']:>13,.2f} {row['variance']:>13,.2f}")
+print(f"\n{len(rollup)} line items, {len(rows)} {label.lower()} rows in {elapsed:.2f}s")
@@ -0,0 +1,51 @@
+"""
+Export projects as selection spreadsheets, one workbook per project.
+
+Workbooks use the layout import_excel.py reads back: a section row per
+category, then its line items with model number, allowance, actual cost,
+vendor, ordered and received dates, staging location and notes. Rows are
+streamed from DynamoDB into write-only workbooks, so large projects use no
+more memory than small ones, and several projects are exported in
+parallel. See materials_db.excel_export.
+
+Usage:
+    python export_excel.py exports/ --project 3f1c...
+    python export_excel.py exports/ --project 3f1c... 9a2b... --workers 4
+    python export_excel.py exports/ --all --status in-progress planning
+"""
+
+import argparse
+import os
+
+from materials_db.excel_export import export_projects
+from materials_db.repository import table
+from materials_db.scan import parallel_scan
+
+# Project.status values in the app (src/types/index.ts).
+PROJECT_STATUSES = ['planning', 'in-progress', 'on-hold', 'completed']
+
+parser = argparse.ArgumentParser(description='Export projects as selection spreadsheets.')
+parser.add_argument('out_dir', help='Directory for the workbooks (created if missing)')
+parser.add_argument('--project', nargs='+', metavar='ID', help='Projects to export')
+parser.add_argument('--all', action='store_true', help='Export every project')
+parser.add_argument('--status', nargs='+', choices=PROJECT_STATUSES,
+                    help='With --all, only projects in these statuses')
+parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes (default: one per core)')
+args = parser.parse_args()
+
+if args.all:
+    project_ids = sorted(project['id'] for project in parallel_scan(table('Projects'), projection=['id', 'status'])
+                         if not args.status or project.get('status', 'planning') in args.status)
+elif args.project:
+    project_ids = args.project
+else:
+    parser.error('give --project IDs or --all')
+
+print(f"Exporting {len(project_ids)} projects to {args.out_dir} with {args.workers} workers...")
+report = export_projects(project_ids, args.out_dir, workers=args.workers)
+
+print(f"\n{report['projects']} workbooks, {report['lineItems']} line items in {report['elapsedSeconds']:.1f}s")
+if report['failed']:
+    print(f"\n⚠️  {report['failed']} of {len(project_ids)} projects failed")
+    raise SystemExit(1)
+print("\n✅ Export complete!")
@@ -0,0 +1,100 @@
+"""
+Import project selection spreadsheets into DynamoDB.
+
+Each project sheet becomes a Project with its Categories and LineItems
+(or is added to an existing project with --project-id). Workbooks are read
+in streaming read-only mode and parsed in a process pool, one worker per
+core by default. Vendor and manufacturer names from every workbook are
+deduplicated and created before any line items are written, and with
+--checkpoint an interrupted back-load picks up where it stopped.
+
+--dry-run parses and counts without writing; it still looks vendor and
+manufacturer names up in DynamoDB to list the ones it would create, unless
+--offline is given or no AWS credentials are configured, in which case the
+names are reported as unresolved.
+
+Usage:
+    python import_excel.py Project1.xlsx --dry-run
+    python import_excel.py Project1.xlsx --dry-run --offline
+    python import_excel.py Material_Selection_Ordering_and_Received.xlsx
+    python import_excel.py Project2.xlsx --project-id proj-123
+    python import_excel.py archive/ --checkpoint import.ckpt --report import-report.json
+    python import_excel.py "archive/2019-*/*.xlsx" --workers 8
+"""
+
+import argparse
+import json
+import os
+
+from materials_db.excel_import import DEFAULT_BATCH_SIZE, DEFAULT_EXCLUDE
+from materials_db.ingest import expand_paths, ingest
+
+parser = argparse.ArgumentParser(description='Import project selection spreadsheets into DynamoDB.')
+parser.add_argument('workbooks', nargs='+', help='.xlsx files, directories or glob patterns')
+parser.add_argument('--project-id', help='Add every sheet to this existing project')
+parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Line items per write batch')
+parser.add_argument('--all-sheets', action='store_true', help='Include template and "DON\'T USE" sheets')
+parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes (default: one per core)')
+parser.add_argument('--checkpoint', help='JSON Lines file of finished workbooks; reuse it to resume a run')
+parser.add_argument('--report', help='Write the consolidated JSON report here')
+parser.add_argument('--vendors-from-rows', action='store_true',
+                    help='Also create vendors named in line-item Vendor columns, not just Vendor sheets')
+parser.add_argument('--dry-run', action='store_true', help='Parse and count rows without writing')
+parser.add_argument('--offline', action='store_true',
+                    help='With --dry-run, do not look up vendor/manufacturer names in DynamoDB')
+args = parser.parse_args()
+
+paths = expand_paths(args.workbooks)
+if not paths:
+    parser.error('no workbooks found')
+
+report = ingest(
+    paths,
+    workers=args.workers,
+    checkpoint=args.checkpoint,
+    exclude=None if args.all_sheets else DEFAULT_EXCLUDE,
+    project_id=args.project_id,
+    batch_size=args.batch_size,
+    vendors_from_rows=args.vendors_from_rows,
+    dry_run=args.dry_run,
+    offline=args.offline,
+)
+
+print("\nPer-file results:")
+for entry in report['files']:
+    name = os.path.relpath(entry['path'])
+    if entry.get('error'):
+        print(f"  ✗ {name}: {entry['error']}")
+        continue
+    line = f"  ✓ {name}: {entry.get('records', 0)} rows in {entry.get('sheets', 0)} sheets, " \
+           f"parse {entry.get('parseSeconds', 0):.2f}s"
+    if 'writeSeconds' in entry:
+        line += f", write {entry['writeSeconds']:.2f}s"
+    if entry.get('checkpointed'):
+        line += " (checkpoint)"
+    print(line)
+
+totals = report['totals']
+for kind in ('vendors', 'manufacturers'):
+    if report['offline']:
+        unresolved = report[kind]['unresolved']
+        print(f"\n{kind.title()}: {report[kind]['named']} named across files, unresolved (offline)"
+              + (f": {', '.join(unresolved)}" if unresolved else ''))
+        continue
+    created = report[kind]['created']
+    verb = 'would create' if args.dry_run else 'created'
+    print(f"\n{kind.title()}: {report[kind]['named']} named across files, {verb} {len(created)}"
+          + (f": {', '.join(created)}" if created else ''))
+print(f"\n{totals['files']} workbooks ({totals['skipped']} from checkpoint, {totals['failed']} failed): "
+      f"{totals['records']} rows, {totals['projects']} projects, {totals['categories']} categories, "
+      f"{totals['lineItems']} line items in {report['elapsedSeconds']:.1f}s")
+
+if args.report:
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.report}")
+
+if totals['failed']:
+    print("\n⚠️  Some workbooks failed; re-run with the same --checkpoint to retry them.")
+    raise SystemExit(1)
+print("\n✅ Import complete!" if not args.dry_run else "\n✅ Dry run complete!")
@@ -1,33 +1,257 @@
-import json
-import boto3
-from decimal import Decimal
+from materials_db.coldstart import ColdStart
 
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table('MaterialsSelection-Projects')  # Fixed: hyphen instead of underscore
+# Started before anything heavy is imported so ImportMs covers it all.
+cold_start = ColdStart()
 
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
+import os
 
-def lambda_handler(event, context):
+from materials_db.cache import TTLCache, etag_matches, make_etag, make_unordered_etag
+from materials_db.instrumentation import recorder
+from materials_db.pagination import InvalidCursor, decode_cursor, encode_cursor, scan_page
+from materials_db.scan import parallel_scan_pages
+from materials_db.serialization import encode_item_pages, encode_json, lambda_body
+
+# eager (default): import boto3 and build the DynamoDB client during init,
+# which Lambda runs on a full vCPU before the first request is billed.
+# lazy: defer both to the first request that needs DynamoDB, so init stays
+# small (useful for SnapStart and for invocations served from the cache).
+STARTUP_MODE = os.environ.get('STARTUP_MODE', 'eager').lower()
+
+# light (default): a low-level client with only the item (de)serialization
+# hooks, skipping the boto3 resource layer. resource: boto3.resource Tables.
+DDB_CLIENT = os.environ.get('DDB_CLIENT', 'light').lower()
+
+_tables = {}
+_enricher = None
+
+def _table(name):
+    """Shared, tuned table handle, built once per container and reused by warm invocations."""
+    table = _tables.get(name)
+    if table is None:
+        with cold_start.phase('ClientInitMs'):
+            from materials_db import repository
+            if DDB_CLIENT == 'resource':
+                table = repository.table(name)
+            else:
+                table = repository.light_table(name)
+        _tables[name] = table
+    return table
+
+def _parse_include(value):
+    """parse_include(), importing materials_db.enrich (and boto3) only when include is used."""
+    if not value:
+        return ()
+    from materials_db.enrich import parse_include
     try:
-        response = table.scan()
-        items = response['Items']
-
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'projects': items
-            }, cls=DecimalEncoder)
+        return parse_include(value)
+    except ValueError as e:
+        raise BadRequest(str(e))
+
+def _get_enricher():
+    """
+    include=categories,summary: per-project ProjectIdIndex queries run
+    concurrently on an event loop kept for the container's lifetime.
+    """
+    global _enricher
+    if _enricher is None:
+        from materials_db.enrich import Enricher
+        _enricher = Enricher(_table('Categories'), _table('LineItems'))
+    return _enricher
+
+cold_start.mark('ImportMs')
+
+if STARTUP_MODE != 'lazy':
+    _table('Projects')  # MaterialsSelection-Projects (hyphen, not underscore)
+
+# Projects is keyed on its string `id`; cursors must decode to exactly that.
+PROJECTS_KEY = ('id',)
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Lambda rejects synchronous responses over 6 MB, so full mode gives up
+# (413, use limit/cursor) once the encoded projects pass this size instead
+# of building a body it cannot return.
+LAMBDA_RESPONSE_LIMIT = 6 * 1024 * 1024
+RESPONSE_HEADROOM = 16 * 1024  # status code and headers
+MAX_FULL_BODY_BYTES = int(os.environ.get('MAX_FULL_BODY_BYTES', str(LAMBDA_RESPONSE_LIMIT)))
+
+# Send budgets and costs with their exact decimal digits; set to 0 to fall
+# back to plain floats.
+EXACT_DECIMALS = os.environ.get('EXACT_DECIMALS', '1') != '0'
+
+# Encoded response bodies kept across warm invocations, keyed by request
+# shape. Stream events clear it; the TTL bounds staleness on containers
+# that never see a stream event.
+cache = TTLCache(
+    maxsize=int(os.environ.get('CACHE_MAX_ENTRIES', '64')),
+    ttl=float(os.environ.get('CACHE_TTL_SECONDS', '30'))
+)
+# Larger bodies are served but not kept, bounding the cache at
+# CACHE_MAX_ENTRIES * CACHE_MAX_BODY_BYTES.
+CACHE_MAX_BODY_BYTES = int(os.environ.get('CACHE_MAX_BODY_BYTES', str(1024 * 1024)))
+
+
+class BadRequest(ValueError):
+    """An invalid query parameter; reported as a 400."""
+
+
+class ResponseTooLarge(Exception):
+    """The response would not fit in a Lambda response; reported as a 413."""
+
+
+TOO_LARGE_MESSAGE = 'Too many projects for one response; request pages with limit and cursor'
+
+def _header(event, name):
+    """Case-insensitive header lookup (REST APIs keep the client's casing)."""
+    name = name.lower()
+    for key, value in ((event or {}).get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+def _response_size(fields):
+    """Bytes the body takes in the Lambda response payload, JSON escaping included."""
+    body = fields['body']
+    if fields.get('isBase64Encoded'):
+        return len(body)
+    return len(body.encode('utf-8')) + body.count('"') + body.count('\\') + body.count('\n')
+
+def _response(status_code, body, accept_encoding=None, headers=None):
+    with recorder.span('compress'):
+        fields, encoding_headers = lambda_body(body, accept_encoding)
+    if _response_size(fields) > LAMBDA_RESPONSE_LIMIT - RESPONSE_HEADROOM:
+        raise ResponseTooLarge(TOO_LARGE_MESSAGE)
+    response = {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            **encoding_headers,
+            **(headers or {})
         }
+    }
+    response.update(fields)
+    return response
+
+def _cache_headers(etag, status):
+    stats = cache.stats()
+    return {
+        'ETag': etag,
+        'Cache-Control': 'no-cache',
+        'Access-Control-Expose-Headers': 'ETag, X-Cache, X-Cache-Hits, X-Cache-Misses',
+        'X-Cache': status,
+        'X-Cache-Hits': str(stats['hits']),
+        'X-Cache-Misses': str(stats['misses'])
+    }
+
+def _is_stream_event(event):
+    records = (event or {}).get('Records') or []
+    return bool(records) and all(r.get('eventSource') == 'aws:dynamodb' for r in records)
+
+def invalidate_cache():
+    """Drop cached responses; wired to the Projects table's DynamoDB stream."""
+    dropped = cache.invalidate()
+    return {'invalidated': dropped}
+
+def _parse_limit(value):
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise BadRequest('limit must be an integer')
+    if limit < 1:
+        raise BadRequest('limit must be at least 1')
+    return min(limit, MAX_PAGE_SIZE)
+
+def _paginated_body(params, include):
+    """One page of projects plus an opaque cursor for the next page."""
+    limit = _parse_limit(params.get('limit'))
+    start_key = decode_cursor(params.get('cursor'), PROJECTS_KEY)
+    items, last_key = scan_page(_table('Projects'), limit, start_key)
+    if include:
+        _get_enricher().enrich(items, include)
+    with recorder.span('serialize'):
+        return encode_json({
+            'projects': items,
+            'nextCursor': encode_cursor(last_key)
+        }, EXACT_DECIMALS)
+
+def _full_body(include):
+    """
+    Every project, encoded page by page, plus its ETag.
+
+    Segments are scanned in parallel and each page is enriched, serialized
+    and dropped as it arrives; the encoded body is bounded by
+    MAX_FULL_BODY_BYTES, past which the scan is stopped and
+    ResponseTooLarge raised.
+    """
+    pages = parallel_scan_pages(_table('Projects'))
+    if include:
+        pages = _get_enricher().enrich_pages(pages, include)
+    # Scanning and encoding interleave; FetchMs is the time spent waiting
+    # on pages, SerializeMs the encoding alone.
+    pages = recorder.iterator(pages, 'fetch')
+    chunks, size = [], 0
+    encoded = encode_item_pages(pages, 'projects', exact_decimals=EXACT_DECIMALS)
+    with recorder.span('serialize', exclude='fetch'):
+        try:
+            for chunk in encoded:
+                size += len(chunk)
+                if size > MAX_FULL_BODY_BYTES:
+                    raise ResponseTooLarge(TOO_LARGE_MESSAGE)
+                chunks.append(chunk)
+        finally:
+            # Stops the scan threads when giving up early.
+            encoded.close()
+            pages.close()
+    return b''.join(chunks), make_unordered_etag(chunks)
+
+def _cached_body(params):
+    """Return (body, etag, 'HIT'|'MISS') for the request's projects."""
+    paginated = params.get('mode') == 'page' or 'limit' in params or 'cursor' in params
+    include = _parse_include(params.get('include'))
+    key = ('page', params.get('limit'), params.get('cursor')) if paginated else ('full',)
+    key += include
+    entry = cache.get(key)
+    recorder.annotate(cache='HIT' if entry is not None else 'MISS', include=list(include))
+    if entry is not None:
+        return entry + ('HIT',)
+    if paginated:
+        body = _paginated_body(params, include)
+        entry = (body, make_etag(body))
+    else:
+        entry = _full_body(include)
+    if len(entry[0]) <= CACHE_MAX_BODY_BYTES:
+        cache.set(key, entry)
+    return entry + ('MISS',)
+
+def lambda_handler(event, context):
+    with cold_start.request(context), recorder.request(context):
+        return _handle(event, context)
+
+def _handle(event, context):
+    if _is_stream_event(event):
+        return invalidate_cache()
+
+    params = (event or {}).get('queryStringParameters') or {}
+    accept_encoding = _header(event, 'Accept-Encoding')
+    try:
+        body, etag, cache_status = _cached_body(params)
+        headers = _cache_headers(etag, cache_status)
+        if etag_matches(_header(event, 'If-None-Match'), etag):
+            return {
+                'statusCode': 304,
+                'headers': {'Access-Control-Allow-Origin': '*', **headers},
+                'body': ''
+            }
+        return _response(200, body, accept_encoding, headers)
+    except (BadRequest, InvalidCursor) as e:
+        return _response(400, encode_json({'error': str(e)}))
+    except ResponseTooLarge as e:
+        return _response(413, encode_json({'error': str(e)}))
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'body': json.dumps({'error': str(e)})
-        }
+        recorder.record_error(e)
+        return _response(500, encode_json({'error': 'Internal server error'}))
+
+cold_start.mark('InitMs')
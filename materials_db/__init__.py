@@ -0,0 +1,6 @@
+"""
+Shared DynamoDB helpers for the MaterialsSelection-* tables.
+
+Used by the Python Lambda in lambda-getprojects-fix/ and by the seed and
+maintenance scripts in the repository root.
+"""
@@ -0,0 +1,187 @@
+"""
+Concurrent BatchWriteItem loader and bulk delete.
+
+put_items() groups rows into 25-item BatchWriteItem calls and runs several
+of them at once on the table's thread-safe low-level client. Requests that
+DynamoDB hands back as UnprocessedItems (throttling, partition limits), and
+whole batches rejected with a throttling error, are retried with
+exponential backoff and full jitter. Every attempt first takes write
+capacity from the process-wide materials_db.scheduler at the job's
+priority ('background' unless told otherwise), and reports throttles and
+the capacity actually consumed back to it.
+
+delete_all() empties a table the same way, reading only key attributes.
+"""
+
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+
+from botocore.exceptions import ClientError
+
+from materials_db.scan import DEFAULT_SEGMENTS, parallel_scan
+from materials_db.scheduler import consumed_units, get_scheduler
+
+BATCH_SIZE = 25  # BatchWriteItem hard limit
+DEFAULT_CONCURRENCY = 4
+MAX_ATTEMPTS = 8
+BASE_DELAY = 0.05
+MAX_DELAY = 5.0
+
+THROTTLING_ERRORS = {
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+}
+
+
+class LoadStats:
+    """Outcome of a bulk write: counts, timing and anything left unprocessed."""
+
+    def __init__(self):
+        self.written = 0
+        self.batches = 0
+        self.retries = 0
+        self.unprocessed = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.written / self.elapsed if self.elapsed else 0.0
+
+    def summary(self, label='rows'):
+        line = (f'{self.written} {label} in {self.elapsed:.2f}s '
+                f'({self.rows_per_second:,.0f} {label}/s, {self.batches} batches, '
+                f'{self.retries} retries)')
+        if self.unprocessed:
+            line += f', {len(self.unprocessed)} unprocessed'
+        return line
+
+
+def backoff_delay(attempt, base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+    """Full-jitter exponential backoff for the given 0-based retry attempt."""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _write_batch(client, table_name, requests, max_attempts, base_delay, job):
+    """Write one batch, retrying UnprocessedItems. Returns (written, retries, leftover)."""
+    pending = requests
+    retries = 0
+    for attempt in range(max_attempts):
+        # One WCU per item up to 1 KB; settled against ConsumedCapacity.
+        job.acquire(len(pending))
+        try:
+            response = client.batch_write_item(RequestItems={table_name: pending},
+                                               ReturnConsumedCapacity='TOTAL')
+        except ClientError as e:
+            if e.response['Error']['Code'] not in THROTTLING_ERRORS:
+                raise
+            leftover = pending
+        else:
+            job.settle(len(pending), consumed_units(response, table_name))
+            leftover = response.get('UnprocessedItems', {}).get(table_name, [])
+        if not leftover:
+            job.succeeded()
+            return len(requests), retries, []
+        job.throttled()
+        pending = leftover
+        if attempt + 1 < max_attempts:
+            retries += 1
+            time.sleep(backoff_delay(attempt, base_delay))
+    return len(requests) - len(pending), retries, pending
+
+
+def write_requests(table, requests, concurrency=DEFAULT_CONCURRENCY,
+                   max_attempts=MAX_ATTEMPTS, base_delay=BASE_DELAY, progress=None,
+                   job=None, priority='background', total=None):
+    """
+    Send PutRequest/DeleteRequest dicts for `table` as concurrent batches.
+
+    `requests` may be any iterable, including a generator over millions of
+    rows; at most `concurrency * 2` batches are in memory at once.
+    `progress`, if given, is called with the LoadStats after each batch.
+    Capacity is scheduled under `job` (a materials_db.scheduler.Job), or a
+    job of `priority` registered for this call, with `total` rows if known.
+    """
+    client = table.meta.client
+    stats = LoadStats()
+    max_in_flight = max(1, concurrency) * 2
+    own_job = job is None
+    if own_job:
+        if total is None and hasattr(requests, '__len__'):
+            total = len(requests)
+        job = get_scheduler().job(f'write {table.name}', table, total, priority)
+
+    def record(future):
+        written, retries, leftover = future.result()
+        stats.written += written
+        stats.retries += retries
+        stats.unprocessed.extend(leftover)
+        stats.batches += 1
+        job.advance(written)
+        if progress:
+            progress(stats)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='bulk') as pool:
+            in_flight = set()
+            for batch in _chunks(requests, BATCH_SIZE):
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        record(future)
+                in_flight.add(pool.submit(_write_batch, client, table.name, batch,
+                                          max_attempts, base_delay, job))
+            for future in in_flight:
+                record(future)
+    finally:
+        if own_job:
+            job.finish()
+
+    stats.elapsed = time.perf_counter() - stats.started
+    return stats
+
+
+def put_items(table, items, **kwargs):
+    """Bulk-put items; see write_requests() for the keyword arguments."""
+    if 'total' not in kwargs and hasattr(items, '__len__'):
+        kwargs['total'] = len(items)
+    return write_requests(table, ({'PutRequest': {'Item': item}} for item in items), **kwargs)
+
+
+def key_attributes(table):
+    """Names of the table's primary key attributes (hash, then range)."""
+    return [key['AttributeName'] for key in table.key_schema]
+
+
+def delete_all(table, dry_run=False, total_segments=DEFAULT_SEGMENTS, priority='background', **kwargs):
+    """
+    Delete every item in the table; returns LoadStats.
+
+    Keys are read with a keys-only projection across parallel scan
+    segments and fed straight into 25-item DeleteRequest batches, so the
+    table is never held in memory. Reads and deletes are scheduled as one
+    job of `priority`. With `dry_run`, nothing is deleted and
+    `stats.written` is the number of items that would be.
+    """
+    keys = key_attributes(table)
+    with get_scheduler().job(f'delete {table.name}', table, priority=priority) as job:
+        items = parallel_scan(table, total_segments, projection=keys, job=job)
+        if dry_run:
+            stats = LoadStats()
+            stats.written = sum(1 for _ in items)
+            stats.elapsed = time.perf_counter() - stats.started
+            return stats
+        requests = ({'DeleteRequest': {'Key': {k: item[k] for k in keys}}} for item in items)
+        return write_requests(table, requests, job=job, **kwargs)
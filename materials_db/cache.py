@@ -0,0 +1,103 @@
+"""
+Small in-process cache for Lambda containers.
+
+Module-level state survives between invocations on a warm container, so a
+TTLCache created at import time lets repeated reads skip DynamoDB until
+the entry expires, is evicted, or is invalidated by a change event.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Least-recently-used cache whose entries also expire after `ttl` seconds.
+
+    Hit and miss counts are kept so callers can report them.
+    """
+
+    def __init__(self, maxsize=32, ttl=30.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the cached value or None, counting a hit or a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """Drop one entry, or every entry when no key is given. Returns the count dropped."""
+        with self._lock:
+            if key is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+                return dropped
+            return 1 if self._entries.pop(key, None) is not None else 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+
+def make_etag(body):
+    """
+    Weak ETag for a response body.
+
+    Weak because the same JSON may be sent gzip-, brotli- or un-encoded,
+    which are different byte sequences of equivalent content.
+    """
+    return 'W/"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def make_unordered_etag(chunks):
+    """
+    Weak ETag over body chunks that does not depend on their order.
+
+    Parallel scans deliver pages in arrival order, so the same table can
+    encode to differently ordered bodies; hashing the sorted chunk digests
+    keeps the ETag stable as long as the content is unchanged.
+    """
+    digests = sorted(hashlib.blake2b(chunk, digest_size=16).digest() for chunk in chunks)
+    return 'W/"%s"' % hashlib.blake2b(b''.join(digests), digest_size=16).hexdigest()
+
+
+def etag_matches(if_none_match, etag):
+    """True when an If-None-Match header value names `etag` (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
@@ -0,0 +1,232 @@
+"""
+Catalog enrichment: apply manufacturer URL feeds to MaterialsSelection-Products.
+
+Feeds map model numbers to product URLs and can hold millions of rows, so
+they are streamed from CSV, JSON Lines or JSON files. Products are found by
+modelNumber through either a GSI or a local index built from one
+keys-and-URL projection scan, and updated with bounded parallelism. Each
+update is conditional on the URL actually changing, so re-running a feed
+is cheap and idempotent. Writes take capacity from the shared scheduler
+(materials_db.scheduler) as one job, 'background' priority by default.
+"""
+
+import csv
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+from botocore.exceptions import ClientError
+
+from materials_db.bulk import THROTTLING_ERRORS
+from materials_db.scan import parallel_scan
+from materials_db.scheduler import consumed_units, get_scheduler
+
+DEFAULT_CONCURRENCY = 8
+
+_MODEL_COLUMNS = ('modelNumber', 'model_number', 'model', 'Model Number', 'Model')
+_URL_COLUMNS = ('productUrl', 'url', 'URL', 'product_url', 'Product URL')
+
+
+def _pick(row, names):
+    for name in names:
+        value = row.get(name)
+        if value:
+            return value.strip()
+    return None
+
+
+def iter_url_mapping(path):
+    """
+    Yield (model_number, url) pairs from a feed file.
+
+    - .csv: header row with a model column (modelNumber/model) and a URL
+      column (productUrl/url); read row by row.
+    - .jsonl / .ndjson: one {"modelNumber": ..., "productUrl": ...} per line.
+    - .json: either {"MODEL": "url", ...} or a list of row objects. Parsed
+      in one go, so prefer CSV or JSON Lines for very large feeds.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if extension == '.csv':
+            rows = csv.DictReader(f)
+        elif extension in ('.jsonl', '.ndjson'):
+            rows = (json.loads(line) for line in f if line.strip())
+        elif extension == '.json':
+            data = json.load(f)
+            if isinstance(data, dict):
+                for model_number, url in data.items():
+                    yield model_number.strip(), url.strip()
+                return
+            rows = data
+        else:
+            raise ValueError(f'Unsupported feed format: {path}')
+        for row in rows:
+            model_number, url = _pick(row, _MODEL_COLUMNS), _pick(row, _URL_COLUMNS)
+            if model_number and url:
+                yield model_number, url
+
+
+class LocalModelIndex:
+    """modelNumber -> [(product id, current productUrl)] built from one projected scan."""
+
+    def __init__(self, table):
+        self._products = defaultdict(list)
+        for item in parallel_scan(table, projection=['id', 'modelNumber', 'productUrl']):
+            model_number = item.get('modelNumber')
+            if model_number:
+                self._products[model_number.strip()].append((item['id'], item.get('productUrl')))
+
+    def __len__(self):
+        return len(self._products)
+
+    def lookup(self, model_number):
+        return self._products.get(model_number, [])
+
+
+class GsiModelIndex:
+    """Look products up through a modelNumber GSI (e.g. ModelNumberIndex)."""
+
+    def __init__(self, table, index_name):
+        self._client = table.meta.client
+        self._table_name = table.name
+        self._index_name = index_name
+
+    def lookup(self, model_number):
+        kwargs = {
+            'TableName': self._table_name,
+            'IndexName': self._index_name,
+            'KeyConditionExpression': 'modelNumber = :model',
+            'ExpressionAttributeValues': {':model': model_number},
+        }
+        products = []
+        while True:
+            response = self._client.query(**kwargs)
+            products.extend((item['id'], item.get('productUrl')) for item in response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                return products
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+class UpdateStats:
+    """Counters for a URL feed run."""
+
+    def __init__(self):
+        self.rows = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.missing = 0
+        self.failed = []
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def add_failure(self, product_id, model_number, error):
+        with self._lock:
+            self.failed.append((product_id, model_number, error))
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        return (f'{self.rows} feed rows in {elapsed:.1f}s: {self.updated} updated, '
+                f'{self.unchanged} already current, {self.missing} not in catalog, '
+                f'{len(self.failed)} failed')
+
+
+def _set_url(client, table_name, product_id, url, job=None):
+    """Conditionally set productUrl; False when it was already current."""
+    if job:
+        job.acquire(1)
+    try:
+        response = client.update_item(
+            TableName=table_name,
+            Key={'id': product_id},
+            UpdateExpression='SET productUrl = :url, updatedAt = :now',
+            ConditionExpression='attribute_exists(id) AND '
+                                '(attribute_not_exists(productUrl) OR productUrl <> :url)',
+            ExpressionAttributeValues={':url': url, ':now': datetime.now().isoformat()},
+            ReturnConsumedCapacity='TOTAL',
+        )
+        if job:
+            job.settle(1, consumed_units(response))
+            job.succeeded()
+        return True
+    except ClientError as e:
+        code = e.response['Error']['Code']
+        if code == 'ConditionalCheckFailedException':
+            # A failed condition still costs the write.
+            return False
+        if job and code in THROTTLING_ERRORS:
+            job.throttled()
+        raise
+
+
+def _stale_products(products, url, stats):
+    """Products whose URL differs from `url`; counts missing/unchanged rows."""
+    if not products:
+        stats.add(missing=1)
+        return []
+    stale = [product for product in products if product[1] != url]
+    if len(stale) < len(products):
+        stats.add(unchanged=len(products) - len(stale))
+    return stale
+
+
+def _apply_row(client, table_name, index, stats, model_number, url, on_update, products=None, job=None):
+    if products is None:
+        products = _stale_products(index.lookup(model_number), url, stats)
+    for product_id, _ in products:
+        try:
+            if _set_url(client, table_name, product_id, url, job):
+                stats.add(updated=1)
+                if on_update:
+                    on_update(product_id, model_number, url)
+            else:
+                stats.add(unchanged=1)
+        except Exception as e:
+            stats.add_failure(product_id, model_number, str(e))
+
+
+def apply_url_feed(table, rows, index, concurrency=DEFAULT_CONCURRENCY, on_update=None,
+                   priority='background', total=None):
+    """
+    Apply (model_number, url) rows to the catalog and return UpdateStats.
+
+    At most `concurrency * 4` rows are in flight, so `rows` can be a
+    generator over a feed of any size. With a LocalModelIndex, rows that
+    match no product or whose URL is already current are settled in the
+    calling thread and never reach the pool. `on_update(product_id,
+    model_number, url)` is called after each successful write. Updates are
+    scheduled as one job of `priority`, counting feed rows against `total`
+    when it is known.
+    """
+    local = isinstance(index, LocalModelIndex)
+    client = table.meta.client
+    stats = UpdateStats()
+    max_in_flight = max(1, concurrency) * 4
+    job = get_scheduler().job(f'url feed {table.name}', table, total, priority)
+    with job, ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='catalog') as pool:
+        in_flight = set()
+        for model_number, url in rows:
+            stats.rows += 1
+            job.advance()
+            products = None
+            if local:
+                products = _stale_products(index.lookup(model_number), url, stats)
+                if not products:
+                    continue
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            in_flight.add(pool.submit(_apply_row, client, table.name, index, stats,
+                                      model_number, url, on_update, products, job))
+        for future in in_flight:
+            future.result()
+    return stats
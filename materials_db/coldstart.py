@@ -0,0 +1,89 @@
+"""
+Cold-start instrumentation for the Python Lambdas.
+
+A handler module imports this first and creates a ColdStart, which notes
+when the container began loading code. The handler then records the
+phases it cares about (imports, client build) and, after the first
+request, ColdStart.emit() writes one structured log line per container:
+
+- COLD_START_METRICS=emf (default): CloudWatch Embedded Metric Format, so
+  ImportMs, ClientInitMs, InitMs and FirstRequestMs become metrics in the
+  METRICS_NAMESPACE namespace without any API calls;
+- COLD_START_METRICS=log: the same fields as a plain JSON log line;
+- COLD_START_METRICS=off: nothing is written.
+
+Only the standard library is imported up front so that measuring the
+cold start does not itself make it slower; the metrics writer is loaded
+when the report is emitted, after the first request.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+METRICS_MODE = os.environ.get('COLD_START_METRICS', 'emf').lower()
+NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'MaterialsSelection/GetProjects')
+
+
+class ColdStart:
+    """Phase timings for one container, reported once after its first request."""
+
+    def __init__(self, clock=time.perf_counter, mode=METRICS_MODE, namespace=NAMESPACE, stream=None):
+        self.clock = clock
+        self.mode = mode
+        self.namespace = namespace
+        self.stream = stream
+        self.started = clock()
+        self.phases = {}
+        self.reported = False
+
+    def mark(self, name):
+        """Record `name` as the milliseconds elapsed since the container started loading."""
+        self.phases[name] = round((self.clock() - self.started) * 1000, 2)
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block (e.g. building the DynamoDB client) as `name` in milliseconds."""
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.phases[name] = round(self.phases.get(name, 0) + (self.clock() - start) * 1000, 2)
+
+    def report(self, context=None):
+        """The cold-start fields as a dict."""
+        fields = dict(self.phases)
+        fields['coldStart'] = True
+        fields['initType'] = os.environ.get('AWS_LAMBDA_INITIALIZATION_TYPE', 'on-demand')
+        fields['FunctionName'] = (getattr(context, 'function_name', None)
+                                  or os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'local'))
+        request_id = getattr(context, 'aws_request_id', None)
+        if request_id:
+            fields['requestId'] = request_id
+        return fields
+
+    def emit(self, context=None):
+        """Write the report once per container (no-op after the first call)."""
+        if self.reported:
+            return None
+        self.reported = True
+        if self.mode == 'off':
+            return None
+        from materials_db.instrumentation import write_metrics
+
+        fields = self.report(context)
+        metrics = {name: 'Milliseconds' for name in self.phases}
+        write_metrics(fields, metrics, ['FunctionName', 'initType'], self.mode, self.namespace, self.stream)
+        return fields
+
+    @contextmanager
+    def request(self, context=None):
+        """Wrap a handler invocation; the first one is timed as FirstRequestMs and reported."""
+        if self.reported:
+            yield
+            return
+        try:
+            with self.phase('FirstRequestMs'):
+                yield
+        finally:
+            self.emit(context)
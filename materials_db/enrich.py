@@ -0,0 +1,219 @@
+"""
+Concurrent per-project enrichment for GetProjects (`include=categories,summary`).
+
+For each project on a page, its categories and/or line items are read
+through the ProjectIdIndex GSIs on an asyncio event loop, with at most
+`max_in_flight` queries outstanding, and attached to the project rows so
+the dashboard gets everything in one response instead of N follow-up
+calls.
+
+When the optional `aiobotocore` package is installed, queries go through
+an async client kept open on a per-container event loop. Without it the
+same coroutines run each query on the shared thread-safe boto3 client in
+the Enricher's own pool of `max_in_flight` threads (the loop's default
+executor has only a handful on a small Lambda), so behaviour is
+identical, only less lightweight.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from functools import partial
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+from materials_db.instrumentation import instrument
+from materials_db.repository import REGION, client_settings
+from materials_db.scan import projection_kwargs
+
+try:
+    from aiobotocore.config import AioConfig
+    from aiobotocore.session import get_session
+except ImportError:  # optional dependency
+    get_session = None
+
+INCLUDE_OPTIONS = ('categories', 'summary')
+MAX_IN_FLIGHT = int(os.environ.get('ENRICH_MAX_IN_FLIGHT', '16'))
+INDEX_NAME = 'ProjectIdIndex'
+
+SUMMARY_FIELDS = ['projectId', 'categoryId', 'quantity', 'unitCost', 'totalCost', 'allowance', 'status']
+# Enough of each category for the summary when the categories themselves are not included.
+CATEGORY_SUMMARY_FIELDS = ['id', 'allowance']
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+def parse_include(value):
+    """'categories,summary' -> ('categories', 'summary'); raises ValueError on unknown names."""
+    if not value:
+        return ()
+    names = {part.strip() for part in value.split(',') if part.strip()}
+    unknown = names - set(INCLUDE_OPTIONS)
+    if unknown:
+        raise ValueError(f"include must be a comma-separated list of {', '.join(INCLUDE_OPTIONS)}; "
+                         f"got {', '.join(sorted(unknown))}")
+    return tuple(name for name in INCLUDE_OPTIONS if name in names)
+
+
+def _amount(value):
+    if value is None or isinstance(value, bool):
+        return Decimal(0)
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def summarize(line_items, categories=()):
+    """
+    Line-item count, cost/allowance totals, variance and status counts for one project.
+
+    As in materials_db.rollup, a category's allowance is the Categories
+    row's allowance when it has one, otherwise the sum of its line items'
+    allowances; line items outside `categories` count their own.
+    """
+    total = Decimal(0)
+    item_allowances = {}
+    statuses = {}
+    count = 0
+    for item in line_items:
+        count += 1
+        cost = item.get('totalCost')
+        if cost is None:
+            cost = _amount(item.get('quantity')) * _amount(item.get('unitCost'))
+        total += _amount(cost)
+        category_id = item.get('categoryId')
+        item_allowances[category_id] = item_allowances.get(category_id, 0) + _amount(item.get('allowance'))
+        status = item.get('status') or 'pending'
+        statuses[status] = statuses.get(status, 0) + 1
+    category_allowances = {category['id']: category.get('allowance') for category in categories}
+    allowance = Decimal(0)
+    for category_id, category_allowance in category_allowances.items():
+        allowance += item_allowances.get(category_id, 0) if category_allowance is None else _amount(category_allowance)
+    allowance += sum(value for category_id, value in item_allowances.items() if category_id not in category_allowances)
+    return {
+        'lineItemCount': count,
+        'totalCost': total,
+        'allowance': allowance,
+        'variance': allowance - total,
+        'statusCounts': statuses,
+    }
+
+
+class Enricher:
+    """
+    Attach categories and line-item summaries to project rows.
+
+    One instance lives for the life of a Lambda container: its event loop
+    and (with aiobotocore) async client are reused by warm invocations.
+    """
+
+    def __init__(self, categories_table, line_items_table, index_name=INDEX_NAME,
+                 max_in_flight=MAX_IN_FLIGHT, region_name=None):
+        self.categories_table = categories_table
+        self.line_items_table = line_items_table
+        self.index_name = index_name
+        self.max_in_flight = max(1, max_in_flight)
+        self.region_name = region_name or REGION
+        self.queries = 0
+        self._loop = None
+        self._client = None
+        self._executor = None
+
+    def enrich(self, projects, include):
+        """Add `categories` and/or `summary` to each project in place; returns projects."""
+        if include and projects:
+            self._run(self._enrich(projects, include))
+        return projects
+
+    def enrich_pages(self, pages, include):
+        """enrich() each page of projects as it arrives; yields the pages."""
+        for page in pages:
+            yield self.enrich(page, include)
+
+    def close(self):
+        """Close the async client, thread pool and event loop (warm containers just keep them)."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._loop is None or self._loop.is_closed():
+            return
+        if self._client is not None:
+            self._loop.run_until_complete(self._client.__aexit__(None, None, None))
+            self._client = None
+        self._loop.close()
+
+    def _run(self, coroutine):
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+            self._client = None
+        return self._loop.run_until_complete(coroutine)
+
+    async def _enrich(self, projects, include):
+        if get_session is not None and self._client is None:
+            config = AioConfig(**client_settings(max_pool_connections=self.max_in_flight))
+            self._client = await get_session().create_client(
+                'dynamodb', region_name=self.region_name, config=config).__aenter__()
+            instrument(self._client)
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        await asyncio.gather(*(self._attach(project, include, semaphore) for project in projects))
+
+    async def _attach(self, project, include, semaphore):
+        """Query a project's categories (needed by the summary too) and line items concurrently."""
+        projection = None if 'categories' in include else CATEGORY_SUMMARY_FIELDS
+        queries = [self._query(self.categories_table, project['id'], projection, semaphore)]
+        if 'summary' in include:
+            queries.append(self._query(self.line_items_table, project['id'], SUMMARY_FIELDS, semaphore))
+        categories, *line_items = await asyncio.gather(*queries)
+        if 'categories' in include:
+            project['categories'] = categories
+        if 'summary' in include:
+            project['summary'] = summarize(line_items[0], categories)
+
+    def _query_kwargs(self, table, project_id, projection):
+        kwargs = {
+            'TableName': table.name,
+            'IndexName': self.index_name,
+            'KeyConditionExpression': '#k = :v',
+            'ExpressionAttributeNames': {'#k': 'projectId'},
+            'ExpressionAttributeValues': {':v': project_id},
+        }
+        if projection:
+            kwargs.update(projection_kwargs(projection, kwargs['ExpressionAttributeNames']))
+        return kwargs
+
+    async def _query(self, table, project_id, projection, semaphore):
+        """Every item for one project from a ProjectIdIndex, following pages."""
+        kwargs = self._query_kwargs(table, project_id, projection)
+        items = []
+        while True:
+            async with semaphore:
+                if get_session is not None:
+                    response = await self._query_async(kwargs)
+                else:
+                    if self._executor is None:
+                        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight,
+                                                            thread_name_prefix='enrich')
+                    response = await self._loop.run_in_executor(
+                        self._executor, partial(table.meta.client.query, **kwargs))
+            self.queries += 1
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                return items
+            kwargs = dict(kwargs, ExclusiveStartKey=response['LastEvaluatedKey'])
+
+    async def _query_async(self, kwargs):
+        """Query through aiobotocore; wire-format values are (de)serialized here."""
+        request = dict(kwargs)
+        request['ExpressionAttributeValues'] = {
+            name: _serializer.serialize(value) for name, value in kwargs['ExpressionAttributeValues'].items()}
+        if 'ExclusiveStartKey' in kwargs:
+            request['ExclusiveStartKey'] = {
+                name: _serializer.serialize(value) for name, value in kwargs['ExclusiveStartKey'].items()}
+        response = await self._client.query(**request)
+        deserialize = _deserializer.deserialize
+        result = {'Items': [{name: deserialize(value) for name, value in item.items()}
+                            for item in response.get('Items', [])]}
+        if 'LastEvaluatedKey' in response:
+            result['LastEvaluatedKey'] = {name: deserialize(value)
+                                          for name, value in response['LastEvaluatedKey'].items()}
+        return result
@@ -0,0 +1,245 @@
+"""
+Streaming export of projects back out as selection spreadsheets.
+
+Each project becomes one workbook in the layout materials_db.excel_import
+reads (see SPREADSHEET-ANALYSIS.md): the project name on the first row, a
+header row with Item Description / Model / Allowance / Actual Cost /
+Vendor / Ordered Date / Received & Inspected Date / Staging Location /
+Return or Damaged Notes, then a section row per category ("Powder Room")
+followed by its line items. Exported workbooks import back unchanged.
+
+Workbooks are openpyxl write-only workbooks, which serialize each row to
+a temporary file as it is appended instead of keeping cells in memory.
+Categories are read through the Categories ProjectIdIndex and each
+category's line items page by page through the LineItems CategoryIdIndex,
+so rows go from a 1 MB query page straight to disk and memory stays flat
+however large the project is. Line items whose category no longer
+belongs to the project are not exported.
+
+export_projects() writes many projects at once in a process pool, one
+workbook per project. With workers=1 it runs in the calling process,
+which is what a Lambda function (no multiprocessing support, /tmp for
+output) should use.
+"""
+
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+from materials_db.pagination import query_index
+from materials_db.repository import get_resource, table_name
+from materials_db.scan import scan_all
+from materials_db.scheduler import set_process_fraction
+
+TABLES = ('Projects', 'Categories', 'LineItems', 'Vendors')
+MONEY_FORMAT = '"$"#,##0.00'
+DATE_FORMAT = 'yyyy-mm-dd'
+
+# (header, line item attribute, cell kind, column width); the headers are
+# the ones excel_import.SheetLayout looks for.
+COLUMNS = (
+    ('Category', None, None, 24),
+    ('Item Description', 'name', None, 40),
+    ('Model', 'modelNumber', None, 20),
+    ('Allowance', 'allowance', 'money', 12),
+    ('Actual Cost', 'totalCost', 'money', 12),
+    ('Vendor', 'vendorName', None, 20),
+    ('Ordered Date', 'orderedDate', 'date', 14),
+    ('Received & Inspected Date', 'receivedDate', 'date', 14),
+    ('Staging Location', 'stagingLocation', None, 20),
+    ('Return or Damaged Notes', 'returnNotes', None, 30),
+)
+LINE_ITEM_FIELDS = ['name', 'material', 'modelNumber', 'allowance', 'totalCost', 'vendorId', 'vendorName',
+                    'orderedDate', 'receivedDate', 'stagingLocation', 'returnNotes']
+CATEGORY_FIELDS = ['id', 'name', 'createdAt']
+
+_SHEET_TITLE = re.compile(r'[\[\]:*?/\\]')
+_FILE_NAME = re.compile(r'[^A-Za-z0-9._-]+')
+
+# Per-process state for pool workers, set up once by _init_exporter.
+_exporter = {}
+
+
+def _date(value):
+    if not isinstance(value, str):
+        return value
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        return value
+
+
+def sheet_title(name):
+    """A valid worksheet title: no []:*?/\\ and at most 31 characters."""
+    return _SHEET_TITLE.sub(' ', name or '').strip()[:31] or 'Project'
+
+
+def workbook_name(project):
+    """File name for a project's workbook: its name, plus the id so names cannot collide."""
+    name = _FILE_NAME.sub('-', project.get('name') or '').strip('-')[:60]
+    return f"{name + '-' if name else ''}{project['id']}.xlsx"
+
+
+def load_vendor_names(vendors_table):
+    """{vendor id: name}, read once per export run; the Vendors table is small."""
+    return {vendor['id']: vendor['name'] for vendor in scan_all(vendors_table, projection=['id', 'name'])
+            if vendor.get('name')}
+
+
+class SheetWriter:
+    """Append section and line-item rows to a write-only worksheet."""
+
+    def __init__(self, worksheet, vendor_names=None):
+        self.worksheet = worksheet
+        self.vendor_names = vendor_names or {}
+        self.rows = 0
+        self._bold = Font(bold=True)
+        for letter, (_, _, _, width) in zip('ABCDEFGHIJ', COLUMNS):
+            worksheet.column_dimensions[letter].width = width
+        # Keep the title and header rows in view; must be set before the first row.
+        worksheet.freeze_panes = 'A3'
+
+    def _styled(self, value, number_format=None, bold=False):
+        cell = WriteOnlyCell(self.worksheet, value)
+        if number_format:
+            cell.number_format = number_format
+        if bold:
+            cell.font = self._bold
+        return cell
+
+    def title(self, text):
+        self.worksheet.append([self._styled(text, bold=True)])
+        self.worksheet.append([self._styled(header, bold=True) for header, _, _, _ in COLUMNS])
+
+    def section(self, name):
+        self.worksheet.append([self._styled(name, bold=True)])
+
+    def line_item(self, item):
+        row = [None]
+        for _, field, kind, _ in COLUMNS[1:]:
+            value = item.get(field)
+            if field == 'name':
+                value = value or item.get('material')
+            elif field == 'vendorName':
+                value = value or self.vendor_names.get(item.get('vendorId'))
+            if value is None or value == '':
+                row.append(None)
+            elif kind == 'money':
+                row.append(self._styled(value, MONEY_FORMAT))
+            elif kind == 'date':
+                value = _date(value)
+                row.append(self._styled(value, DATE_FORMAT) if isinstance(value, date) else value)
+            else:
+                row.append(value)
+        self.worksheet.append(row)
+        self.rows += 1
+
+
+def export_project(tables, project_id, path, vendor_names=None, index_name='ProjectIdIndex',
+                   category_index='CategoryIdIndex'):
+    """
+    Write one project to the workbook at `path`; returns its report entry.
+
+    A directory `path` gets the workbook under workbook_name(project).
+    `tables` maps 'Projects', 'Categories' and 'LineItems' to Table
+    objects. Vendor names come from the line item's vendorName, else
+    `vendor_names` ({id: name}, see load_vendor_names()).
+    """
+    started = time.perf_counter()
+    project = tables['Projects'].get_item(Key={'id': project_id}).get('Item')
+    if project is None:
+        raise LookupError(f'Project {project_id} not found')
+    if os.path.isdir(path):
+        path = os.path.join(path, workbook_name(project))
+    categories = sorted(query_index(tables['Categories'], index_name, 'projectId', project_id, CATEGORY_FIELDS),
+                        key=lambda category: (category.get('createdAt') or '', category.get('name') or ''))
+
+    workbook = Workbook(write_only=True)
+    writer = SheetWriter(workbook.create_sheet(sheet_title(project.get('name'))), vendor_names)
+    writer.title(project.get('name') or project_id)
+    for category in categories:
+        writer.section(category.get('name') or 'General')
+        for item in query_index(tables['LineItems'], category_index, 'categoryId', category['id'],
+                                LINE_ITEM_FIELDS):
+            writer.line_item(item)
+    workbook.save(path)
+    return {
+        'projectId': project_id,
+        'name': project.get('name'),
+        'path': path,
+        'categories': len(categories),
+        'lineItems': writer.rows,
+        'bytes': os.path.getsize(path),
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def _init_exporter(region_name, vendor_names, workers=1):
+    # Every worker reads at once, so each gets its share of the tables' capacity.
+    set_process_fraction(1 / workers)
+    dynamodb = get_resource(region_name)
+    _exporter['tables'] = {name: dynamodb.Table(table_name(name)) for name in TABLES}
+    _exporter['vendorNames'] = vendor_names
+
+
+def _export_task(project_id, out_dir):
+    """Export one project into `out_dir` (process pool task)."""
+    return export_project(_exporter['tables'], project_id, out_dir, _exporter['vendorNames'])
+
+
+def export_projects(project_ids, out_dir, workers=None, region_name=None, log=print):
+    """
+    Export each project to its own workbook under `out_dir`; returns the run report.
+
+    Projects are spread over `workers` processes (one per core by
+    default); workers=1 exports them one by one in this process. A
+    project that fails is reported with an `error` and does not stop the
+    others.
+    """
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    vendor_names = load_vendor_names(get_resource(region_name).Table(table_name('Vendors')))
+    entries = []
+
+    def record(project_id, result):
+        if isinstance(result, Exception):
+            result = {'projectId': project_id, 'error': str(result)}
+            log(f"  ✗ {project_id}: {result['error']}")
+        else:
+            log(f"  ✓ {result['name'] or project_id}: {result['lineItems']} line items in "
+                f"{result['categories']} categories, {result['seconds']:.2f}s -> {os.path.basename(result['path'])}")
+        entries.append(result)
+
+    if workers == 1:
+        _init_exporter(region_name, vendor_names)
+        for project_id in project_ids:
+            try:
+                record(project_id, _export_task(project_id, out_dir))
+            except Exception as e:
+                record(project_id, e)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_exporter,
+                                 initargs=(region_name, vendor_names, workers)) as pool:
+            futures = {pool.submit(_export_task, project_id, out_dir): project_id for project_id in project_ids}
+            for future in as_completed(futures):
+                try:
+                    record(futures[future], future.result())
+                except Exception as e:
+                    record(futures[future], e)
+
+    exported = [entry for entry in entries if not entry.get('error')]
+    return {
+        'workers': workers,
+        'elapsedSeconds': round(time.perf_counter() - started, 3),
+        'projects': len(exported),
+        'failed': len(entries) - len(exported),
+        'lineItems': sum(entry['lineItems'] for entry in exported),
+        'files': sorted(entries, key=lambda entry: entry['projectId']),
+    }
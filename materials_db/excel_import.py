@@ -0,0 +1,343 @@
+"""
+Streaming import of project selection spreadsheets into DynamoDB.
+
+Workbooks are opened with openpyxl in read-only mode, which parses sheet
+XML as rows are requested instead of building every cell up front, so
+memory stays flat however many sheets a workbook has.
+
+Project sheets follow the layout described in SPREADSHEET-ANALYSIS.md: a
+header row with Model / Allowance / Actual Cost / Vendor / Ordered Date /
+Received & Inspected Date / Staging Location / Return or Damaged Notes.
+Item descriptions sit in the unlabelled columns left of those (the header
+cell there is usually the customer's name), and categories appear either
+as section rows ("Powder Room") or in the first column of every row
+("Electrical - Bath"). Sheets without such a header (Vendor, Products and
+other reference data) are skipped.
+"""
+
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from uuid import UUID, uuid4, uuid5
+
+from openpyxl import load_workbook
+
+from materials_db.bulk import put_items
+
+# Rows searched for the header before a sheet is treated as non-project data.
+HEADER_SEARCH_ROWS = 10
+DEFAULT_CATEGORY = 'General'
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_EXCLUDE = re.compile(r"template|don'?t use", re.IGNORECASE)
+
+# Header keyword -> parsed field; first match wins, so the more specific
+# phrases come first.
+_HEADER_FIELDS = (
+    ('model', 'modelNumber'),
+    ('allowance', 'allowance'),
+    ('actual cost', 'actualCost'),
+    ('vendor', 'vendorName'),
+    ('appointment', 'appointmentDate'),
+    ('ordered', 'orderedDate'),
+    ('received', 'receivedDate'),
+    ('staging', 'stagingLocation'),
+    ('return', 'returnNotes'),
+    ('damaged', 'returnNotes'),
+)
+_REQUIRED_FIELDS = {'actualCost', 'vendorName'}
+_REFERENCE_SHEETS = {
+    'vendor': 'vendor',
+    'vendors': 'vendor',
+    'manufacturer': 'manufacturer',
+    'manufacturers': 'manufacturer',
+}
+_PHASE_ROW = re.compile(r'^\d+\.\s')
+_CENTS = Decimal('0.01')
+
+# Fixed namespace for import_id(): the same source row gets the same id on
+# every run and machine.
+IMPORT_NAMESPACE = UUID('0d8e6a52-3c71-5b9f-a4e2-61f0c7d93b18')
+
+
+def _text(value):
+    if isinstance(value, str):
+        value = ' '.join(value.split())
+        return value or None
+    return None
+
+
+def _money(value):
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return Decimal(repr(value)).quantize(_CENTS)
+    text = _text(value)
+    if not text:
+        return None
+    try:
+        return Decimal(text.replace('$', '').replace(',', '')).quantize(_CENTS)
+    except InvalidOperation:
+        return None
+
+
+def _date(value):
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return None
+
+
+class SheetLayout:
+    """Column positions for one project sheet."""
+
+    def __init__(self, header_row, columns):
+        self.header_row = header_row
+        self.columns = columns
+        # Item descriptions and categories live left of the first data column.
+        self.text_columns = min(columns.values())
+
+    @classmethod
+    def detect(cls, row_number, row):
+        """Return a layout if `row` is a project-sheet header row, else None."""
+        columns = {}
+        for index, value in enumerate(row):
+            text = _text(value)
+            if not text:
+                continue
+            lowered = text.lower()
+            field = next((f for keyword, f in _HEADER_FIELDS if keyword in lowered), None)
+            if field and field not in columns:
+                columns[field] = index
+        if not _REQUIRED_FIELDS <= set(columns):
+            return None
+        return cls(row_number, columns)
+
+    def value(self, row, field):
+        index = self.columns.get(field)
+        return row[index] if index is not None and index < len(row) else None
+
+    def texts(self, row):
+        """(column, text) for the text cells left of the data columns."""
+        return [(i, _text(v)) for i, v in enumerate(row[:self.text_columns]) if _text(v)]
+
+
+def iter_workbook_rows(path):
+    """Yield (sheet_title, row_number, values) for every row, read-only."""
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            for row_number, values in enumerate(sheet.iter_rows(values_only=True), 1):
+                yield sheet.title.strip(), row_number, values
+    finally:
+        workbook.close()
+
+
+def iter_sheet_records(path, exclude=DEFAULT_EXCLUDE, reference_names=None):
+    """
+    Yield parsed line-item rows from every project sheet in a workbook.
+
+    Sheets whose name matches the `exclude` regex (blank templates and
+    retired sheets by default) are skipped; pass None to read every sheet.
+    Each record is a plain dict (sheet, row, category, name, modelNumber,
+    allowance, actualCost, vendorName, orderedDate, receivedDate,
+    stagingLocation, returnNotes) without any DynamoDB ids, so it can be
+    produced in one process and written from another.
+
+    If `reference_names` is a dict, names listed on the workbook's Vendor
+    and Manufacturer sheets are added to it as
+    {'vendor': {normalized: name}, 'manufacturer': {...}} in the same pass.
+    """
+    current_sheet = None
+    layout = None
+    title = None
+    category = None
+    reference = None
+    for sheet, row_number, row in iter_workbook_rows(path):
+        if sheet != current_sheet:
+            current_sheet, layout, title, category = sheet, None, None, None
+            reference = _REFERENCE_SHEETS.get(sheet.lower())
+            if exclude and exclude.search(sheet):
+                layout = False
+        if reference and reference_names is not None:
+            names = reference_names.setdefault(reference, {})
+            for value in row:
+                name = _text(value)
+                if name and normalize_name(name) not in (reference, reference + 's'):
+                    names.setdefault(normalize_name(name), name)
+            continue
+        if layout is False:
+            continue
+        if layout is None:
+            layout = SheetLayout.detect(row_number, row)
+            if layout is None:
+                title = title or next((_text(v) for v in row if _text(v)), None)
+                if row_number >= HEADER_SEARCH_ROWS:
+                    layout = False
+            continue
+
+        texts = layout.texts(row)
+        if not texts or _PHASE_ROW.match(texts[0][1]):
+            continue
+        if len(texts) == 1 and texts[0][0] == 0:
+            # Section row such as "Powder Room": applies to the rows below.
+            category = texts[0][1]
+            continue
+        # "Electrical - Bath | Bath Vanity Light": category, then description.
+        row_category = texts[0][1] if len(texts) > 1 else None
+        description = texts[-1][1]
+
+        yield {
+            'sheet': sheet,
+            'sheetTitle': title,
+            'row': row_number,
+            'category': row_category or category or DEFAULT_CATEGORY,
+            'name': description,
+            'modelNumber': _text(layout.value(row, 'modelNumber')),
+            'allowance': _money(layout.value(row, 'allowance')),
+            'actualCost': _money(layout.value(row, 'actualCost')),
+            'vendorName': _text(layout.value(row, 'vendorName')),
+            'orderedDate': _date(layout.value(row, 'orderedDate')),
+            'receivedDate': _date(layout.value(row, 'receivedDate')),
+            'stagingLocation': _text(layout.value(row, 'stagingLocation')),
+            'returnNotes': _text(layout.value(row, 'returnNotes')),
+        }
+
+
+def normalize_name(name):
+    """Case- and whitespace-insensitive key for vendor/manufacturer names."""
+    return ' '.join(name.split()).lower() if name else ''
+
+
+def import_id(source, kind, *parts):
+    """Deterministic uuid5 for an imported project, category or line item of `source`."""
+    return str(uuid5(IMPORT_NAMESPACE, '/'.join([kind, source, *map(str, parts)])))
+
+
+def _status(record):
+    if record['receivedDate']:
+        return 'received'
+    if record['orderedDate']:
+        return 'ordered'
+    return 'pending'
+
+
+def line_item(record, project_id, category_id, vendor_ids, now, item_id=None):
+    """Build a MaterialsSelection-LineItems item from a parsed record (random id unless given)."""
+    cost = record['actualCost'] or Decimal('0.00')
+    item = {
+        'id': item_id or str(uuid4()),
+        'projectId': project_id,
+        'categoryId': category_id,
+        'name': record['name'],
+        'material': record['name'],
+        'quantity': 1,
+        'unit': 'ea',
+        'unitCost': cost,
+        'totalCost': cost,
+        'status': _status(record),
+        'createdAt': now,
+        'updatedAt': now,
+    }
+    optional = {
+        'allowance': record['allowance'],
+        'modelNumber': record['modelNumber'],
+        'vendorName': record['vendorName'],
+        'vendorId': vendor_ids.get(normalize_name(record['vendorName'])),
+        'orderedDate': record['orderedDate'],
+        'receivedDate': record['receivedDate'],
+        'stagingLocation': record['stagingLocation'],
+        'returnNotes': record['returnNotes'],
+    }
+    item.update({k: v for k, v in optional.items() if v is not None})
+    return item
+
+
+class WorkbookImporter:
+    """
+    Write parsed records as Projects, Categories and LineItems in batches.
+
+    One project is created per sheet unless `project_id` pins every sheet
+    to an existing project. New projects, categories and line items are
+    buffered until `batch_size` line items are pending and then flushed
+    through the bulk loader, so memory is bounded by the batch, not the
+    workbook.
+
+    With a `source` key (e.g. the workbook's path, size and mtime), ids are
+    derived from it and the sheet, category and row instead of drawn at
+    random, so importing the same file again overwrites its earlier rows
+    rather than duplicating them.
+    """
+
+    def __init__(self, tables, vendor_ids=None, project_id=None, batch_size=DEFAULT_BATCH_SIZE, source=None):
+        self.tables = tables
+        self.vendor_ids = vendor_ids or {}
+        self.project_id = project_id
+        self.batch_size = batch_size
+        self.source = source
+        self.projects = {}
+        self.categories = {}
+        self.line_items = 0
+        self._pending = {'Projects': [], 'Categories': [], 'LineItems': []}
+        self._now = datetime.now().isoformat()
+
+    def _project_for(self, record):
+        if self.project_id:
+            return self.project_id
+        sheet = record['sheet']
+        if sheet not in self.projects:
+            project = {
+                'id': self._id('project', sheet),
+                'name': sheet,
+                'description': record['sheetTitle'] or '',
+                'status': 'planning',
+                'createdAt': self._now,
+                'updatedAt': self._now,
+            }
+            self._pending['Projects'].append(project)
+            self.projects[sheet] = project['id']
+        return self.projects[sheet]
+
+    def _category_for(self, project_id, name):
+        key = (project_id, name)
+        if key not in self.categories:
+            category = {
+                'id': self._id('category', project_id, name),
+                'projectId': project_id,
+                'name': name,
+                'description': '',
+                'createdAt': self._now,
+                'updatedAt': self._now,
+            }
+            self._pending['Categories'].append(category)
+            self.categories[key] = category['id']
+        return self.categories[key]
+
+    def _id(self, kind, *parts):
+        return import_id(self.source, kind, *parts) if self.source else str(uuid4())
+
+    def add(self, record):
+        project_id = self._project_for(record)
+        category_id = self._category_for(project_id, record['category'])
+        item_id = self._id('line-item', record['sheet'], record['row'])
+        self._pending['LineItems'].append(
+            line_item(record, project_id, category_id, self.vendor_ids, self._now, item_id))
+        if len(self._pending['LineItems']) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        for name, items in self._pending.items():
+            if not items:
+                continue
+            stats = put_items(self.tables[name], items)
+            if stats.unprocessed:
+                raise RuntimeError(f'{len(stats.unprocessed)} {name} items were not written')
+            if name == 'LineItems':
+                self.line_items += stats.written
+            self._pending[name] = []
+
+    def import_records(self, records):
+        for record in records:
+            self.add(record)
+        self.flush()
+        return self
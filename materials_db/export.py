@@ -0,0 +1,381 @@
+"""
+Columnar Parquet snapshots of the MaterialsSelection-* tables.
+
+Reporting used to scan the live tables. export_table() instead streams a
+table's parallel-scan pages into Arrow record batches and writes them as
+zstd Parquet files, so analysis runs on local columnar files and never
+competes with production read capacity again after the export.
+
+Layout under the output directory:
+
+    _manifest.json
+    LineItems/run=00001-full/part-00000.parquet
+    LineItems/run=00002-delta/part-00000.parquet
+    LineItems/run=00003-stream/part-00000.parquet
+
+- The first export of a table (or any export with full=True) is a full
+  dump; older runs are then superseded and removed.
+- Later exports are deltas: only items whose `updatedAt` is past the
+  table's watermark (minus WATERMARK_OVERLAP for in-flight writes) are
+  written. A Scan filter still reads the whole table, but transfers and
+  writes only the changes. Items without `updatedAt` are only picked up
+  by full dumps.
+- replay_stream() applies a captured DynamoDB Streams log instead
+  (INSERT/MODIFY rows and REMOVE tombstones), with no table reads at all.
+
+Money fields are decimal128 columns, quantities decimal, flags boolean
+and everything else string; attributes outside a table's known columns
+are kept as JSON in `_extra`. read_table() returns the current state:
+the latest full run plus every later run, last write per id winning and
+deleted ids dropped. Only runs recorded in the manifest are read, so an
+interrupted export leaves nothing half-visible.
+"""
+
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from materials_db.repository import TABLE_PREFIX
+from materials_db.scan import parallel_scan_pages
+from materials_db.serialization import encode_json
+
+MANIFEST = '_manifest.json'
+MANIFEST_VERSION = 1
+BATCH_ROWS = 50000
+ROWS_PER_FILE = 1000000
+COMPRESSION = 'zstd'
+WATERMARK_FIELD = 'updatedAt'
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+MONEY = pa.decimal128(18, 4)
+QUANTITY = pa.decimal128(18, 4)
+MONEY_FIELDS = {'budget', 'allowance', 'unitCost', 'totalCost', 'cost', 'orderedPrice'}
+QUANTITY_FIELDS = {'quantity', 'orderedQuantity', 'receivedQuantity'}
+BOOLEAN_FIELDS = {'isPrimary', 'isSelected'}
+
+# Known attributes per table, from docs/DATABASE_SCHEMA.md.
+TABLE_COLUMNS = {
+    'Projects': ['id', 'name', 'description', 'startDate', 'endDate', 'status', 'budget'],
+    'Categories': ['id', 'projectId', 'name', 'description', 'allowance'],
+    'LineItems': ['id', 'projectId', 'categoryId', 'name', 'material', 'quantity', 'unit', 'unitCost',
+                  'totalCost', 'allowance', 'notes', 'status', 'vendorId', 'manufacturerId', 'productId',
+                  'modelNumber'],
+    'Vendors': ['id', 'name', 'contact', 'phone', 'email', 'website'],
+    'Manufacturers': ['id', 'name', 'website'],
+    'Products': ['id', 'manufacturerId', 'name', 'modelNumber', 'description', 'category', 'unit',
+                 'imageUrl', 'productUrl'],
+    'ProductVendors': ['id', 'productId', 'vendorId', 'cost', 'isPrimary'],
+    'Orders': ['id', 'vendorId', 'orderNumber', 'orderDate', 'notes'],
+    'OrderItems': ['id', 'orderId', 'lineItemId', 'orderedQuantity', 'orderedPrice'],
+    'Receipts': ['id', 'orderItemId', 'receivedDate', 'receivedQuantity', 'notes'],
+    'LineItemOptions': ['id', 'lineItemId', 'productId', 'unitCost', 'isSelected'],
+}
+TIMESTAMP_COLUMNS = ['createdAt', 'updatedAt']
+
+_QUANTUM = Decimal('0.0001')
+
+
+def column_type(name):
+    if name in MONEY_FIELDS:
+        return MONEY
+    if name in QUANTITY_FIELDS:
+        return QUANTITY
+    if name in BOOLEAN_FIELDS:
+        return pa.bool_()
+    return pa.string()
+
+
+def table_schema(name):
+    """Arrow schema for a table: known columns, timestamps, `_extra` JSON and `_deleted`."""
+    columns = TABLE_COLUMNS.get(name, ['id']) + TIMESTAMP_COLUMNS
+    fields = [pa.field(column, column_type(column)) for column in columns]
+    fields.append(pa.field('_extra', pa.string()))
+    fields.append(pa.field('_deleted', pa.bool_()))
+    return pa.schema(fields)
+
+
+def _convert(value, arrow_type):
+    """Coerce one attribute to its column type; (converted, ok)."""
+    if value is None:
+        return None, True
+    if arrow_type == pa.string():
+        return (value, True) if isinstance(value, str) else (None, False)
+    if arrow_type == pa.bool_():
+        return (value, True) if isinstance(value, bool) else (None, False)
+    try:
+        number = value if isinstance(value, Decimal) else Decimal(str(value))
+        if not number.is_finite():
+            return None, False
+        return number.quantize(_QUANTUM), True
+    except (ArithmeticError, ValueError):
+        return None, False
+
+
+class _RunWriter:
+    """Buffer rows as columns and write them as record batches, rolling files."""
+
+    def __init__(self, directory, schema, batch_rows=BATCH_ROWS, rows_per_file=ROWS_PER_FILE):
+        self.directory = directory
+        self.schema = schema
+        self.names = [field.name for field in schema if field.name not in ('_extra', '_deleted')]
+        self.types = {field.name: field.type for field in schema}
+        self.batch_rows = batch_rows
+        self.rows_per_file = rows_per_file
+        self.files = []
+        self.rows = 0
+        self.watermark = None
+        self._writer = None
+        self._file_rows = 0
+        self._reset()
+
+    def _reset(self):
+        self._columns = {field.name: [] for field in self.schema}
+
+    def add(self, item, deleted=False):
+        columns = self._columns
+        extra = {}
+        known = set()
+        for name in self.names:
+            value = item.get(name)
+            known.add(name)
+            converted, ok = _convert(value, self.types[name])
+            columns[name].append(converted)
+            if not ok:
+                extra[name] = value
+        for name, value in item.items():
+            if name not in known:
+                extra[name] = value
+        columns['_extra'].append(encode_json(extra).decode('utf-8') if extra else None)
+        columns['_deleted'].append(deleted)
+        stamp = item.get(WATERMARK_FIELD)
+        if isinstance(stamp, str) and (self.watermark is None or stamp > self.watermark):
+            self.watermark = stamp
+        self.rows += 1
+        if len(columns['_deleted']) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._columns['_deleted']:
+            return
+        batch = pa.RecordBatch.from_pydict(self._columns, schema=self.schema)
+        self._reset()
+        if self._writer is None:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f'part-{len(self.files):05d}.parquet')
+            self._writer = pq.ParquetWriter(path, self.schema, compression=COMPRESSION)
+            self.files.append(os.path.basename(path))
+        self._writer.write_batch(batch)
+        self._file_rows += batch.num_rows
+        if self._file_rows >= self.rows_per_file:
+            self._close_file()
+
+    def _close_file(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._file_rows = 0
+
+    def close(self):
+        self.flush()
+        self._close_file()
+
+
+def load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {'version': MANIFEST_VERSION, 'tables': {}}
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported export manifest version: {manifest.get('version')}")
+    return manifest
+
+
+def _save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST)
+    temp = f'{path}.tmp'
+    with open(temp, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp, path)
+
+
+def _next_run(entry, mode):
+    number = max((run['run'] for run in entry['runs']), default=0) + 1
+    return number, f'run={number:05d}-{mode}'
+
+
+def _commit_run(out_dir, manifest, name, mode, number, writer, started):
+    """Record a finished run in the manifest; a full run supersedes the older ones."""
+    entry = manifest['tables'].setdefault(name, {'watermark': None, 'runs': []})
+    run = {
+        'run': number,
+        'mode': mode,
+        'directory': os.path.basename(writer.directory),
+        'rows': writer.rows,
+        'files': writer.files,
+        'seconds': round(time.perf_counter() - started, 3),
+        'exportedAt': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+    superseded = entry['runs'] if mode == 'full' else []
+    entry['runs'] = [] if mode == 'full' else entry['runs']
+    if writer.files or mode == 'full':
+        entry['runs'].append(run)
+    if writer.watermark and (entry['watermark'] is None or writer.watermark > entry['watermark']):
+        entry['watermark'] = writer.watermark
+    _save_manifest(out_dir, manifest)
+    for old in superseded:
+        shutil.rmtree(os.path.join(out_dir, name, old['directory']), ignore_errors=True)
+    return run
+
+
+def _since(watermark):
+    """The watermark pulled back by WATERMARK_OVERLAP, in the same ISO style."""
+    try:
+        stamp = datetime.fromisoformat(watermark.replace('Z', '+00:00'))
+    except ValueError:
+        return watermark
+    earlier = (stamp - WATERMARK_OVERLAP).isoformat(timespec='milliseconds')
+    return earlier.replace('+00:00', 'Z') if watermark.endswith('Z') else earlier
+
+
+def export_table(table, out_dir, name, full=False, total_segments=None, batch_rows=BATCH_ROWS):
+    """
+    Export one table (full dump the first time or with `full`, else a delta).
+
+    `name` is the short table name ('LineItems'). Returns the manifest's
+    run entry.
+    """
+    manifest = load_manifest(out_dir)
+    entry = manifest['tables'].get(name, {'watermark': None, 'runs': []})
+    has_full = any(run['mode'] == 'full' for run in entry['runs'])
+    mode = 'full' if full or not has_full else 'delta'
+
+    scan_kwargs = {}
+    if total_segments:
+        scan_kwargs['total_segments'] = total_segments
+    if mode == 'delta':
+        if not entry['watermark']:
+            mode = 'full'
+        else:
+            scan_kwargs.update({
+                'FilterExpression': '#w > :w',
+                'ExpressionAttributeNames': {'#w': WATERMARK_FIELD},
+                'ExpressionAttributeValues': {':w': _since(entry['watermark'])},
+            })
+
+    started = time.perf_counter()
+    number, directory_name = _next_run(entry, mode)
+    directory = os.path.join(out_dir, name, directory_name)
+    writer = _RunWriter(directory, table_schema(name), batch_rows)
+    try:
+        for page in parallel_scan_pages(table, **scan_kwargs):
+            for item in page:
+                writer.add(item)
+    except BaseException:
+        writer.close()
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+    writer.close()
+    return _commit_run(out_dir, manifest, name, mode, number, writer, started)
+
+
+def iter_stream_log(path):
+    """
+    DynamoDB Streams records from a captured log: JSON Lines of records (or
+    of Lambda stream events), or one JSON {'Records': [...]} document.
+    """
+    with open(path) as f:
+        try:
+            documents = [json.loads(line) for line in f if line.strip()]
+        except json.JSONDecodeError:
+            f.seek(0)
+            documents = [json.load(f)]
+    for document in documents:
+        if 'Records' in document:
+            yield from document['Records']
+        else:
+            yield document
+
+
+def _stream_table(record):
+    """'LineItems' from a record's eventSourceARN (...:table/MaterialsSelection-LineItems/stream/...)."""
+    arn = record.get('eventSourceARN', '')
+    if ':table/' not in arn:
+        return None
+    full_name = arn.split(':table/', 1)[1].split('/', 1)[0]
+    return full_name[len(TABLE_PREFIX):] if full_name.startswith(TABLE_PREFIX) else full_name
+
+
+def replay_stream(records, out_dir, tables=None, batch_rows=BATCH_ROWS):
+    """
+    Write stream records as one 'stream' run per table.
+
+    INSERT/MODIFY write the NewImage; REMOVE writes a tombstone with the
+    keys. Tables without a full run yet are skipped (their first export
+    must be a dump). Returns {name: run entry}.
+    """
+    from boto3.dynamodb.types import TypeDeserializer
+
+    deserialize = TypeDeserializer().deserialize
+    manifest = load_manifest(out_dir)
+    writers = {}
+    started = time.perf_counter()
+    try:
+        for record in records:
+            name = _stream_table(record)
+            if name is None or (tables and name not in tables):
+                continue
+            entry = manifest['tables'].get(name)
+            if not entry or not any(run['mode'] == 'full' for run in entry['runs']):
+                continue
+            change = record.get('dynamodb', {})
+            deleted = record.get('eventName') == 'REMOVE'
+            image = change.get('Keys' if deleted else 'NewImage') or {}
+            item = {key: deserialize(value) for key, value in image.items()}
+            if name not in writers:
+                number, directory_name = _next_run(entry, 'stream')
+                writers[name] = (number, _RunWriter(os.path.join(out_dir, name, directory_name),
+                                                    table_schema(name), batch_rows))
+            writers[name][1].add(item, deleted=deleted)
+    except BaseException:
+        for _, writer in writers.values():
+            writer.close()
+            shutil.rmtree(writer.directory, ignore_errors=True)
+        raise
+    runs = {}
+    for name, (number, writer) in writers.items():
+        writer.close()
+        runs[name] = _commit_run(out_dir, manifest, name, 'stream', number, writer, started)
+    return runs
+
+
+def read_table(out_dir, name, columns=None):
+    """
+    The exported table's current state as a pyarrow.Table.
+
+    Runs are applied in order; the last version of each id wins and ids
+    whose last version is a REMOVE tombstone are dropped.
+    """
+    entry = load_manifest(out_dir)['tables'].get(name)
+    if not entry or not entry['runs']:
+        raise ValueError(f'No export of {name} in {out_dir}')
+    tables = []
+    for run in sorted(entry['runs'], key=lambda run: run['run']):
+        for file_name in run['files']:
+            tables.append(pq.read_table(os.path.join(out_dir, name, run['directory'], file_name)))
+    combined = pa.concat_tables(tables)
+    if len(entry['runs']) > 1:
+        rows = combined.append_column('_row', pa.array(range(combined.num_rows), pa.int64()))
+        latest = rows.group_by('id').aggregate([('_row', 'max')])['_row_max'].combine_chunks()
+        combined = combined.take(pc.take(latest, pc.array_sort_indices(latest)))
+    combined = combined.filter(pc.invert(pc.fill_null(combined['_deleted'], False)))
+    if columns:
+        combined = combined.select(columns)
+    return combined
@@ -0,0 +1,343 @@
+"""
+Multi-process ingestion of a directory of project selection workbooks.
+
+Back-loading years of archived spreadsheets runs in two phases:
+
+1. Parse: workbooks are parsed in a process pool, one worker per core.
+   Each worker streams its records to a spill file, one pickle per
+   record, and returns only the counts, timings and the
+   vendor/manufacturer names it saw.
+2. Write: once every vendor and manufacturer name has been deduplicated
+   across all files and the missing ones created, a second pool streams
+   each spill file back through WorkbookImporter with the shared vendor
+   ids. Neither phase holds a whole workbook's records in memory.
+
+Each workbook written is appended to a JSON Lines checkpoint (path, size,
+mtime and its report entry), so an interrupted run can be started again
+with the same checkpoint and only unfinished or changed files are redone.
+Project, category and line-item ids are derived from that fingerprint and
+the sheet and row, so a workbook that was partly written before the
+interruption overwrites its own rows instead of duplicating them.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from uuid import uuid4
+
+import boto3
+
+from materials_db.bulk import put_items
+from materials_db.excel_import import DEFAULT_BATCH_SIZE, DEFAULT_EXCLUDE, WorkbookImporter, iter_sheet_records, normalize_name
+from materials_db.repository import get_resource, table, table_name
+from materials_db.scan import scan_all
+from materials_db.scheduler import set_process_fraction
+
+WORKBOOK_PATTERNS = ('*.xlsx', '*.xlsm')
+
+# Per-process state for write workers, set up once by _init_writer.
+_writer = {}
+
+
+def expand_paths(inputs):
+    """
+    Expand files, directories and glob patterns into a sorted list of workbooks.
+
+    Directories are searched recursively; Excel lock files (~$Book.xlsx)
+    are ignored.
+    """
+    paths = set()
+    for entry in inputs:
+        if os.path.isdir(entry):
+            for pattern in WORKBOOK_PATTERNS:
+                paths.update(glob.glob(os.path.join(entry, '**', pattern), recursive=True))
+        elif glob.has_magic(entry):
+            paths.update(glob.glob(entry, recursive=True))
+        else:
+            paths.add(entry)
+    return sorted(os.path.abspath(p) for p in paths
+                  if not os.path.basename(p).startswith('~$'))
+
+
+def _fingerprint(path):
+    stat = os.stat(path)
+    return {'path': path, 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def _source_key(entry):
+    """Import id seed for a workbook: the same file yields the same ids on a re-run."""
+    return f"{entry['path']}:{entry['size']}:{entry['mtime']}"
+
+
+class Checkpoint:
+    """Append-only JSON Lines record of workbooks that were fully written."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn final line from an interrupted run
+                    self.entries[entry['path']] = entry
+
+    def completed(self, path):
+        """The checkpointed entry for `path` if the file is unchanged since, else None."""
+        entry = self.entries.get(path)
+        if entry is None or not os.path.exists(path):
+            return None
+        current = _fingerprint(path)
+        if (entry['size'], entry['mtime']) != (current['size'], current['mtime']):
+            return None
+        return entry
+
+    def record(self, entry):
+        self.entries[entry['path']] = entry
+        if not self.path:
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def parse_workbook(path, spill_dir, exclude=DEFAULT_EXCLUDE, vendors_from_rows=False):
+    """
+    Parse one workbook and spill its records to `spill_dir` (process pool task).
+
+    Returns a report entry with counts, parse time, the spill file and the
+    vendor/manufacturer names found, or an `error` if the file failed.
+    """
+    entry = _fingerprint(path)
+    started = time.perf_counter()
+    names = {}
+    row_vendors = {}
+    sheets = set()
+    count = 0
+    try:
+        spill = os.path.join(spill_dir, hashlib.sha1(path.encode('utf-8')).hexdigest() + '.pickle')
+        with open(spill, 'wb') as f:
+            for record in iter_sheet_records(path, exclude, names):
+                pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+                count += 1
+                sheets.add(record['sheet'])
+                if vendors_from_rows and record['vendorName']:
+                    row_vendors.setdefault(normalize_name(record['vendorName']), record['vendorName'])
+    except Exception as e:
+        entry['error'] = f'parse: {e}'
+        entry['parseSeconds'] = round(time.perf_counter() - started, 3)
+        return entry
+
+    vendors = names.get('vendor', {})
+    for key, name in row_vendors.items():
+        vendors.setdefault(key, name)
+    entry.update({
+        'spill': spill,
+        'sheets': len(sheets),
+        'records': count,
+        'parseSeconds': round(time.perf_counter() - started, 3),
+        'vendors': vendors,
+        'manufacturers': names.get('manufacturer', {}),
+    })
+    return entry
+
+
+def _init_writer(region_name, vendor_ids, project_id, batch_size, workers=1):
+    # Every worker writes at once, so each gets its share of the tables' capacity.
+    set_process_fraction(1 / workers)
+    _writer['tables'] = {name: table(name, region_name) for name in ('Projects', 'Categories', 'LineItems')}
+    _writer['options'] = (vendor_ids, project_id, batch_size)
+
+
+def read_spill(spill):
+    """Yield the records parse_workbook() spilled, one at a time."""
+    with open(spill, 'rb') as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+def write_workbook(spill, source):
+    """Write one spilled workbook (process pool task); returns counts and write time."""
+    started = time.perf_counter()
+    vendor_ids, project_id, batch_size = _writer['options']
+    importer = WorkbookImporter(_writer['tables'], vendor_ids, project_id, batch_size, source)
+    importer.import_records(read_spill(spill))
+    return {
+        'projects': len(importer.projects),
+        'categories': len(importer.categories),
+        'lineItems': importer.line_items,
+        'writeSeconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def merge_names(entries, kind):
+    """Deduplicate vendor or manufacturer names across parse results; first spelling wins."""
+    merged = {}
+    for entry in entries:
+        for key, name in entry.get(kind, {}).items():
+            merged.setdefault(key, name)
+    return merged
+
+
+def ensure_names(table, names, fields, dry_run=False):
+    """
+    Make sure every name in {normalized: name} exists in a Vendors or
+    Manufacturers table. Returns ({normalized: id}, names created).
+    """
+    ids = {normalize_name(item['name']): item['id']
+           for item in scan_all(table, projection=['id', 'name']) if item.get('name')}
+    missing = sorted(name for key, name in names.items() if key not in ids)
+    if missing and not dry_run:
+        items = [dict(fields, id=str(uuid4()), name=name) for name in missing]
+        stats = put_items(table, items)
+        if stats.unprocessed:
+            raise RuntimeError(f'{len(stats.unprocessed)} {table.name} items were not written')
+        ids.update((normalize_name(item['name']), item['id']) for item in items)
+    return ids, missing
+
+
+def has_credentials():
+    """Whether boto3 can find AWS credentials (env, profile, instance role...)."""
+    return boto3.session.Session().get_credentials() is not None
+
+
+def _run_pool(workers, fn, tasks, initializer=None, initargs=()):
+    """Yield (task, result) as tasks finish; exceptions are yielded as results."""
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+        futures = {pool.submit(fn, *task): task for task in tasks}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], e
+
+
+def _totals(files):
+    totals = {'files': len(files), 'failed': 0, 'skipped': 0}
+    for name in ('sheets', 'records', 'projects', 'categories', 'lineItems', 'parseSeconds', 'writeSeconds'):
+        totals[name] = 0
+    for entry in files:
+        if entry.get('error'):
+            totals['failed'] += 1
+        if entry.get('checkpointed'):
+            totals['skipped'] += 1
+        for name in ('sheets', 'records', 'projects', 'categories', 'lineItems', 'parseSeconds', 'writeSeconds'):
+            totals[name] += entry.get(name, 0)
+    totals['parseSeconds'] = round(totals['parseSeconds'], 3)
+    totals['writeSeconds'] = round(totals['writeSeconds'], 3)
+    return totals
+
+
+def ingest(paths, workers=None, checkpoint=None, dynamodb=None, region_name=None,
+           exclude=DEFAULT_EXCLUDE, project_id=None, batch_size=DEFAULT_BATCH_SIZE,
+           vendors_from_rows=False, dry_run=False, offline=False, log=print):
+    """
+    Parse and import `paths` with `workers` processes; returns the run report.
+
+    With `dry_run`, only the parse phase runs: nothing is written and the
+    checkpoint is left untouched, but the report still lists the vendors
+    and manufacturers that would be created. An `offline` dry run (or one
+    without AWS credentials) does not look them up in DynamoDB at all and
+    reports every name as unresolved instead.
+    """
+    workers = workers or os.cpu_count() or 1
+    offline = dry_run and (offline or not has_credentials())
+    checkpoint = checkpoint if isinstance(checkpoint, Checkpoint) else Checkpoint(checkpoint)
+    dynamodb = dynamodb or get_resource(region_name)
+    started = time.perf_counter()
+
+    done, todo = [], []
+    for path in paths:
+        entry = checkpoint.completed(path)
+        if entry is not None:
+            done.append(dict(entry, checkpointed=True))
+        else:
+            todo.append(path)
+    log(f"{len(paths)} workbooks: {len(done)} already imported, {len(todo)} to process "
+        f"with {workers} workers")
+
+    spill_dir = tempfile.mkdtemp(prefix='ingest-')
+    try:
+        parsed = []
+        tasks = [(path, spill_dir, exclude, vendors_from_rows) for path in todo]
+        for (path, *_), entry in _run_pool(workers, parse_workbook, tasks):
+            if isinstance(entry, Exception):
+                entry = dict(_fingerprint(path), error=f'parse: {entry}')
+            parsed.append(entry)
+            status = f"✗ {entry['error']}" if entry.get('error') else \
+                f"✓ {entry['records']} rows in {entry['parseSeconds']:.2f}s"
+            log(f"  parsed {os.path.basename(path)}: {status}")
+
+        ok = [entry for entry in parsed if not entry.get('error')]
+        vendor_names = merge_names(ok, 'vendors')
+        manufacturer_names = merge_names(ok, 'manufacturers')
+        vendor_ids, new_vendors, new_manufacturers = {}, [], []
+        if offline:
+            log("  offline dry run: vendor and manufacturer names not looked up")
+        elif ok:
+            vendor_ids, new_vendors = ensure_names(
+                dynamodb.Table(table_name('Vendors')), vendor_names,
+                {'contact': '', 'website': '', 'notes': ''}, dry_run)
+            _, new_manufacturers = ensure_names(
+                dynamodb.Table(table_name('Manufacturers')), manufacturer_names,
+                {'website': '', 'notes': ''}, dry_run)
+        log(f"  vendors: {len(vendor_names)} named, {len(new_vendors)} new; "
+            f"manufacturers: {len(manufacturer_names)} named, {len(new_manufacturers)} new")
+
+        if not dry_run and ok:
+            by_spill = {entry['spill']: entry for entry in ok}
+            initargs = (region_name, vendor_ids, project_id, batch_size, workers)
+            tasks = [(spill, _source_key(entry)) for spill, entry in by_spill.items()]
+            for (spill, _), result in _run_pool(workers, write_workbook, tasks, _init_writer, initargs):
+                entry = by_spill[spill]
+                if isinstance(result, Exception):
+                    entry['error'] = f'write: {result}'
+                    log(f"  wrote {os.path.basename(entry['path'])}: ✗ {entry['error']}")
+                    continue
+                entry.update(result)
+                log(f"  wrote {os.path.basename(entry['path'])}: ✓ {entry['lineItems']} line items "
+                    f"in {entry['writeSeconds']:.2f}s")
+                checkpoint.record(_checkpoint_entry(entry))
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+    files = sorted(done + [_report_entry(entry) for entry in parsed], key=lambda e: e['path'])
+    return {
+        'workers': workers,
+        'dryRun': dry_run,
+        'offline': offline,
+        'elapsedSeconds': round(time.perf_counter() - started, 3),
+        'totals': _totals(files),
+        'vendors': _names_report(vendor_names, new_vendors, offline),
+        'manufacturers': _names_report(manufacturer_names, new_manufacturers, offline),
+        'files': files,
+    }
+
+
+def _names_report(names, created, offline):
+    report = {'named': len(names), 'created': created}
+    if offline:
+        report['unresolved'] = sorted(names.values())
+    return report
+
+
+def _report_entry(entry):
+    return {k: v for k, v in entry.items() if k not in ('spill', 'vendors', 'manufacturers')}
+
+
+def _checkpoint_entry(entry):
+    return dict(_report_entry(entry), completedAt=time.time())
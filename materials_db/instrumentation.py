@@ -0,0 +1,361 @@
+"""
+Per-call DynamoDB instrumentation through botocore event hooks.
+
+instrument(client) registers handlers on a client's event system, so
+every operation made through it (table.scan(), the parallel scanner,
+batch writers, the Repository) is measured without wrapping call sites:
+
+- latency per call, including client-side (de)serialization and retries;
+- ReturnConsumedCapacity=TOTAL is added to every operation that accepts
+  it, and the returned read/write capacity units are summed;
+- items returned, pages (Scan/Query calls), retry attempts and throttled
+  attempts, per table and operation.
+
+Calls are added to the process-wide `recorder`. A Lambda wraps each
+invocation in recorder.request(context), which resets the counters and,
+at the end, writes one structured line for the invocation:
+
+- DDB_METRICS=emf (default): CloudWatch Embedded Metric Format, so
+  RequestMs, DynamoDBMs, ReadCapacityUnits, Throttles, SerializeMs etc.
+  become metrics with no API calls; the per-operation breakdown rides
+  along as log fields;
+- DDB_METRICS=log: the same fields as a plain JSON line;
+- DDB_METRICS=off: no hooks are registered and nothing is written.
+
+A fraction of invocations (TRACE_SAMPLE_RATE, default 0.01, or any
+invocation whose X-Ray trace header says Sampled=1) also carry a `trace`
+list with one span per DynamoDB call and per recorder.span() block.
+
+Only the standard library is imported here; botocore is only touched
+through the client handed to instrument().
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+
+METRICS_MODE = os.environ.get('DDB_METRICS', 'emf').lower()
+NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'MaterialsSelection/GetProjects')
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', '0.01'))
+MAX_TRACE_SPANS = 500
+
+READ_OPERATIONS = {'GetItem', 'BatchGetItem', 'Query', 'Scan', 'TransactGetItems'}
+PAGED_OPERATIONS = {'Query', 'Scan'}
+
+_CONTEXT_KEY = 'materials_db_instrumentation'
+
+
+def write_metrics(fields, metrics, dimensions, mode=METRICS_MODE, namespace=NAMESPACE, stream=None):
+    """
+    Write one structured log line.
+
+    `fields` holds every value (metrics included); `metrics` maps the
+    metric names among them to CloudWatch units. In emf mode an `_aws`
+    block declaring them is added; in log mode the line is plain JSON.
+    """
+    if mode == 'off':
+        return None
+    fields = dict(fields)
+    if mode == 'emf':
+        fields['_aws'] = {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': namespace,
+                'Dimensions': [list(dimensions)],
+                'Metrics': [{'Name': name, 'Unit': unit} for name, unit in metrics.items()
+                            if isinstance(fields.get(name), (int, float))],
+            }],
+        }
+    stream = stream or sys.stdout
+    stream.write(json.dumps(fields, separators=(',', ':'), default=str) + '\n')
+    stream.flush()
+    return fields
+
+
+def _phase_key(name):
+    return name[:1].upper() + name[1:] + 'Ms'
+
+
+class _OperationStats:
+    __slots__ = ('calls', 'ms', 'max_ms', 'items', 'read_units', 'write_units', 'retries', 'throttles',
+                 'errors')
+
+    def __init__(self):
+        self.calls = self.items = self.retries = self.throttles = self.errors = 0
+        self.ms = self.max_ms = self.read_units = self.write_units = 0.0
+
+    def as_dict(self):
+        return {
+            'calls': self.calls,
+            'ms': round(self.ms, 2),
+            'maxMs': round(self.max_ms, 2),
+            'items': self.items,
+            'readUnits': round(self.read_units, 2),
+            'writeUnits': round(self.write_units, 2),
+            'retries': self.retries,
+            'throttles': self.throttles,
+            'errors': self.errors,
+        }
+
+
+def _capacity(consumed):
+    if not consumed:
+        return 0.0
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    return sum(entry.get('CapacityUnits', 0.0) for entry in consumed)
+
+
+def _item_count(parsed):
+    if 'Items' in parsed:
+        return len(parsed['Items'])
+    if 'Responses' in parsed:
+        responses = parsed['Responses']
+        if isinstance(responses, dict):
+            return sum(len(items) for items in responses.values())
+        return len(responses)
+    return 1 if parsed.get('Item') else 0
+
+
+class Recorder:
+    """
+    Aggregates DynamoDB calls (from any thread) and per-request phases.
+
+    Lambda handles one invocation at a time per container, so a single
+    process-wide recorder is enough; the lock covers the scan worker
+    threads reporting into it.
+    """
+
+    def __init__(self, mode=METRICS_MODE, namespace=NAMESPACE, sample_rate=TRACE_SAMPLE_RATE,
+                 clock=time.perf_counter, stream=None):
+        self.mode = mode
+        self.namespace = namespace
+        self.sample_rate = sample_rate
+        self.clock = clock
+        self.stream = stream
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.operations = {}
+            self.phases = {}
+            self.fields = {}
+            self.error = None
+            self.started = self.clock()
+            self.trace = None
+
+    @property
+    def enabled(self):
+        return self.mode != 'off'
+
+    def start_trace(self, force=False):
+        """Collect spans for the current request (sampled unless forced)."""
+        if force or random.random() < self.sample_rate:
+            self.trace = []
+
+    def _span(self, name, start, ms, **fields):
+        if self.trace is not None and len(self.trace) < MAX_TRACE_SPANS:
+            self.trace.append(dict(fields, name=name, startMs=round((start - self.started) * 1000, 2),
+                                   ms=round(ms, 2)))
+
+    def record_call(self, table, operation, start, parsed=None, retries=0, error=None):
+        """Add one finished DynamoDB call."""
+        ms = (self.clock() - start) * 1000
+        parsed = parsed or {}
+        items = _item_count(parsed)
+        units = _capacity(parsed.get('ConsumedCapacity'))
+        with self._lock:
+            stats = self.operations.get((table, operation))
+            if stats is None:
+                stats = self.operations[(table, operation)] = _OperationStats()
+            stats.calls += 1
+            stats.ms += ms
+            stats.max_ms = max(stats.max_ms, ms)
+            stats.items += items
+            stats.retries += retries
+            if operation in READ_OPERATIONS:
+                stats.read_units += units
+            else:
+                stats.write_units += units
+            if error:
+                stats.errors += 1
+            self._span(f'{operation} {table}', start, ms, items=items, capacity=round(units, 2),
+                       retries=retries, **({'error': error} if error else {}))
+
+    def record_throttle(self, table, operation):
+        with self._lock:
+            stats = self.operations.get((table, operation))
+            if stats is None:
+                stats = self.operations[(table, operation)] = _OperationStats()
+            stats.throttles += 1
+
+    @contextmanager
+    def span(self, name, exclude=None):
+        """
+        Time a non-DynamoDB phase of the request (e.g. 'serialize') as <Name>Ms.
+
+        With `exclude`, time recorded under that phase while the block runs
+        is subtracted, for work interleaved with a lazy iterator().
+        """
+        start = self.clock()
+        excluded = self.phases.get(_phase_key(exclude), 0.0) if exclude else 0.0
+        try:
+            yield
+        finally:
+            ms = (self.clock() - start) * 1000
+            if exclude:
+                ms -= self.phases.get(_phase_key(exclude), 0.0) - excluded
+            with self._lock:
+                self.phases[_phase_key(name)] = self.phases.get(_phase_key(name), 0.0) + ms
+                self._span(name, start, ms)
+
+    def iterator(self, iterable, name):
+        """Yield from `iterable`, timing the work of producing each item as phase `name`."""
+        key = _phase_key(name)
+        iterator = iter(iterable)
+        while True:
+            start = self.clock()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                ms = (self.clock() - start) * 1000
+                with self._lock:
+                    self.phases[key] = self.phases.get(key, 0.0) + ms
+            yield item
+
+    def annotate(self, **fields):
+        """Add log-only fields (e.g. cache status) to the current request's line."""
+        self.fields.update(fields)
+
+    def record_error(self, exception):
+        """Note an exception the handler turned into an error response."""
+        self.error = {
+            'errorType': type(exception).__name__,
+            'errorMessage': str(exception),
+            'stackTrace': traceback.format_exception(type(exception), exception, exception.__traceback__),
+        }
+
+    def totals(self):
+        """Request-level sums over every table and operation."""
+        with self._lock:
+            operations = list(self.operations.items())
+        totals = {'DynamoDBMs': 0.0, 'DynamoDBCalls': 0, 'Pages': 0, 'Items': 0, 'ReadCapacityUnits': 0.0,
+                  'WriteCapacityUnits': 0.0, 'Retries': 0, 'Throttles': 0, 'DynamoDBErrors': 0}
+        for (_, operation), stats in operations:
+            totals['DynamoDBMs'] += stats.ms
+            totals['DynamoDBCalls'] += stats.calls
+            totals['Pages'] += stats.calls if operation in PAGED_OPERATIONS else 0
+            totals['Items'] += stats.items
+            totals['ReadCapacityUnits'] += stats.read_units
+            totals['WriteCapacityUnits'] += stats.write_units
+            totals['Retries'] += stats.retries
+            totals['Throttles'] += stats.throttles
+            totals['DynamoDBErrors'] += stats.errors
+        return {name: round(value, 2) if isinstance(value, float) else value for name, value in totals.items()}
+
+    def report(self, context=None):
+        """The invocation's fields: totals, phases, per-operation breakdown, error and trace."""
+        fields = {'RequestMs': round((self.clock() - self.started) * 1000, 2)}
+        fields.update(self.totals())
+        fields.update({name: round(ms, 2) for name, ms in self.phases.items()})
+        fields['FunctionName'] = (getattr(context, 'function_name', None)
+                                  or os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'local'))
+        request_id = getattr(context, 'aws_request_id', None)
+        if request_id:
+            fields['requestId'] = request_id
+        fields.update(self.fields)
+        fields['operations'] = {f'{table}.{operation}': stats.as_dict()
+                                for (table, operation), stats in self.operations.items()}
+        if self.error:
+            fields.update(self.error)
+        if self.trace is not None:
+            fields['trace'] = self.trace
+        return fields
+
+    def emit(self, context=None):
+        if not self.enabled:
+            return None
+        fields = self.report(context)
+        units = {name: 'Milliseconds' for name in fields if name.endswith('Ms')}
+        units.update({name: 'Count' for name in ('DynamoDBCalls', 'Pages', 'Items', 'ReadCapacityUnits',
+                                                 'WriteCapacityUnits', 'Retries', 'Throttles',
+                                                 'DynamoDBErrors')})
+        return write_metrics(fields, units, ['FunctionName'], self.mode, self.namespace, self.stream)
+
+    @contextmanager
+    def request(self, context=None):
+        """Reset, run one invocation, then emit its line (also when it raises)."""
+        self.reset()
+        if self.enabled:
+            self.start_trace(force='Sampled=1' in os.environ.get('_X_AMZN_TRACE_ID', ''))
+        try:
+            yield self
+        finally:
+            self.emit(context)
+
+
+recorder = Recorder()
+
+
+def instrument(client, recorder=recorder):
+    """
+    Register the timing/capacity hooks on a botocore DynamoDB client.
+
+    Safe to call more than once per client; returns the client.
+    """
+    if recorder.mode == 'off':
+        return client
+    from materials_db.bulk import THROTTLING_ERRORS
+
+    def before_parameter_build(params, model, context, **kwargs):
+        if 'ReturnConsumedCapacity' in model.input_shape.members:
+            params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+        context[_CONTEXT_KEY] = (params.get('TableName') or _batch_tables(params), model.name, recorder.clock())
+
+    def after_call(parsed, context, **kwargs):
+        state = context.pop(_CONTEXT_KEY, None)
+        if state is None:
+            return
+        retries = parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+        recorder.record_call(*state, parsed, retries, parsed.get('Error', {}).get('Code'))
+
+    def after_call_error(exception, context, **kwargs):
+        # Connection errors and timeouts that exhausted the retries.
+        state = context.pop(_CONTEXT_KEY, None)
+        if state is not None:
+            recorder.record_call(*state, error=type(exception).__name__)
+
+    def needs_retry(response, request_dict, **kwargs):
+        if response is None:
+            return None
+        state = (request_dict or {}).get('context', {}).get(_CONTEXT_KEY)
+        if state is not None and response[1].get('Error', {}).get('Code') in THROTTLING_ERRORS:
+            recorder.record_throttle(state[0], state[1])
+        return None
+
+    events = client.meta.events
+    events.register('before-parameter-build.dynamodb', before_parameter_build,
+                    unique_id='materials-db-instrumentation-params')
+    events.register('after-call.dynamodb', after_call, unique_id='materials-db-instrumentation-call')
+    events.register('after-call-error.dynamodb', after_call_error,
+                    unique_id='materials-db-instrumentation-error')
+    events.register('needs-retry.dynamodb', needs_retry, unique_id='materials-db-instrumentation-retry')
+    return client
+
+
+def _batch_tables(params):
+    """Table name(s) for BatchGet/BatchWrite/Transact calls, which have no TableName."""
+    names = set(params.get('RequestItems') or ())
+    for entry in params.get('TransactItems') or ():
+        for operation in entry.values():
+            if 'TableName' in operation:
+                names.add(operation['TableName'])
+    return ','.join(sorted(names)) or 'unknown'
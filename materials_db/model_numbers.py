@@ -0,0 +1,237 @@
+"""
+Model-number canonicalization, deterministic ids and fuzzy catalog matching.
+
+Spreadsheets and seed data spell the same SKU differently ('S 2165BZ-CG',
+'s2165bz-cg', 'S2165BZ CG'), so exact modelNumber keys miss, and loads
+that mint a fresh uuid4 per row create duplicates when re-run.
+
+- canonical_model() reduces a model number to upper-case ASCII letters
+  and digits: every spelling above becomes 'S2165BZCG'.
+- product_id() / relationship_id() / name_id() derive uuid5 ids from the
+  content (manufacturer + canonical model, product + vendor, a vendor or
+  manufacturer name), so re-running a load writes the same ids and
+  upserts instead of duplicating.
+- ModelIndex resolves model numbers against the catalog: a dict on the
+  canonical key for exact hits, and for everything else a 4-gram index
+  (NumPy CSR postings) that finds the few catalog keys sharing the most
+  4-grams with each query, which are then scored by Dice similarity over
+  distinct trigrams. Candidate counting is batched across queries, so
+  100k spreadsheet rows against a 1M-SKU catalog take seconds rather
+  than one Python loop per catalog entry.
+"""
+
+import re
+import unicodedata
+from collections import defaultdict, namedtuple
+from uuid import UUID, uuid5
+
+import numpy as np
+
+from materials_db.scan import parallel_scan
+
+# Fixed namespace: the same content yields the same id on every machine.
+ID_NAMESPACE = UUID('5b0f3c1e-8a4d-5f6b-9c2e-7d1a4e8b3f60')
+
+MIN_SCORE = 0.6
+# Candidates come from shared 4-grams (selective even in digit-heavy
+# catalogs); the best CANDIDATES per query are re-scored exactly.
+GRAM = 4
+CANDIDATES = 16
+# Only this many leading characters of a key are indexed.
+MAX_KEY_LENGTH = 32
+# 4-grams carried by more SKUs than this say little about a match and
+# would dominate the work, so queries skip them.
+MAX_POSTINGS = 5000
+# Candidate (query, SKU) pairs gathered per batch, bounding memory.
+BATCH_PAIRS = 10000000
+_BUILD_CHUNK = 200000
+
+_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+_RADIX = len(_ALPHABET) + 1  # 0 marks padding
+_GRAMS = _RADIX ** GRAM
+_CODES = np.zeros(256, dtype=np.int64)
+for _position, _char in enumerate(_ALPHABET):
+    _CODES[ord(_char)] = _position + 1
+
+_NOT_ALNUM = re.compile(r'[^0-9A-Z]+')
+
+Match = namedtuple('Match', 'productId modelNumber score')
+
+
+def canonical_model(model_number):
+    """'S 2165BZ-CG' -> 'S2165BZCG': accents folded, case and separators dropped."""
+    if not model_number:
+        return ''
+    text = str(model_number)
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return _NOT_ALNUM.sub('', text.upper())
+
+
+def product_id(manufacturer_id, model_number):
+    """Deterministic product id for a manufacturer's model number."""
+    return str(uuid5(ID_NAMESPACE, f'product/{manufacturer_id or ""}/{canonical_model(model_number)}'))
+
+
+def relationship_id(product_id, vendor_id):
+    """Deterministic ProductVendors id for a product carried by a vendor."""
+    return str(uuid5(ID_NAMESPACE, f'product-vendor/{product_id}/{vendor_id}'))
+
+
+def name_id(kind, name):
+    """Deterministic id for a vendor or manufacturer (`kind`) by name, ignoring case and spacing."""
+    return str(uuid5(ID_NAMESPACE, f"{kind}/{' '.join(name.split()).lower()}"))
+
+
+def trigram_dice(a, b):
+    """Dice similarity of two canonical keys over their distinct trigrams."""
+    grams_a = {a[i:i + 3] for i in range(len(a) - 2)}
+    grams_b = {b[i:i + 3] for i in range(len(b) - 2)}
+    if not grams_a or not grams_b:
+        return 1.0 if a == b else 0.0
+    return 2 * len(grams_a & grams_b) / (len(grams_a) + len(grams_b))
+
+
+def _counts(values):
+    """Sorted distinct values and their counts (sort-based; faster than np.unique here)."""
+    values = np.sort(values)
+    starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+    return values[starts], np.diff(np.r_[starts, len(values)])
+
+
+def _grams(keys):
+    """(row, 4-gram code) arrays of the distinct 4-grams in each canonical key."""
+    if not keys:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64)
+    width = max(GRAM, min(MAX_KEY_LENGTH, max(map(len, keys))))
+    chars = np.array(keys, dtype=f'S{width}').view(np.uint8).reshape(len(keys), width)
+    codes = _CODES[chars]
+    span = width - GRAM + 1
+    grams = np.zeros((len(keys), span), dtype=np.int64)
+    for offset in range(GRAM):
+        grams = grams * _RADIX + codes[:, offset:offset + span]
+    # Padding only trails a key, so a gram is real when its last char is.
+    rows, columns = np.nonzero(codes[:, GRAM - 1:])
+    pairs, _ = _counts(rows * _GRAMS + grams[rows, columns])
+    return pairs // _GRAMS, pairs % _GRAMS
+
+
+class ModelIndex:
+    """Exact and fuzzy modelNumber lookups over a product catalog."""
+
+    def __init__(self, products=()):
+        self._ids = []
+        self._models = []
+        self._keys = []
+        self._exact = defaultdict(list)
+        self._postings = None
+        for product in products:
+            self.add(product)
+
+    @classmethod
+    def from_table(cls, table, **scan_kwargs):
+        """Build the index from one projected parallel scan of Products."""
+        return cls(parallel_scan(table, projection=['id', 'modelNumber', 'manufacturerId'], **scan_kwargs))
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, product):
+        """Index one product ({'id', 'modelNumber', ...}); the gram index is rebuilt lazily."""
+        key = canonical_model(product.get('modelNumber'))
+        if not key:
+            return
+        self._exact[key].append(len(self._ids))
+        self._ids.append(product['id'])
+        self._models.append(product['modelNumber'])
+        self._keys.append(key)
+        self._postings = None
+
+    def exact(self, model_number):
+        """Product ids whose model number has the same canonical key."""
+        return [self._ids[row] for row in self._exact.get(canonical_model(model_number), ())]
+
+    def duplicates(self):
+        """{canonical key: [product ids]} for keys shared by more than one product."""
+        return {key: [self._ids[row] for row in rows] for key, rows in self._exact.items() if len(rows) > 1}
+
+    def match(self, model_number, min_score=MIN_SCORE):
+        """The best Match for one model number, or None."""
+        return self.match_many([model_number], min_score)[0]
+
+    def match_many(self, model_numbers, min_score=MIN_SCORE):
+        """
+        Best Match (or None) for each model number, in input order.
+
+        Canonical-key hits score 1.0; the rest go through the 4-gram index
+        in batches and keep the candidate with the highest trigram Dice
+        score, if it reaches `min_score`.
+        """
+        results = [None] * len(model_numbers)
+        misses, miss_keys = [], []
+        for position, model_number in enumerate(model_numbers):
+            key = canonical_model(model_number)
+            rows = self._exact.get(key)
+            if rows:
+                row = rows[0]
+                results[position] = Match(self._ids[row], self._models[row], 1.0)
+            elif len(key) >= GRAM:
+                misses.append(position)
+                miss_keys.append(key)
+        if not misses or not self._ids:
+            return results
+        best = {}
+        for query, row in self._candidates(miss_keys):
+            score = trigram_dice(miss_keys[query], self._keys[row])
+            if score >= min_score and score > best.get(query, (0, None))[0]:
+                best[query] = (score, row)
+        for query, (score, row) in best.items():
+            results[misses[query]] = Match(self._ids[row], self._models[row], round(score, 4))
+        return results
+
+    def _build(self):
+        pairs = []
+        for start in range(0, len(self._keys), _BUILD_CHUNK):
+            rows, codes = _grams(self._keys[start:start + _BUILD_CHUNK])
+            pairs.append(codes * len(self._keys) + rows + start)
+        # Sorting (code, row) pairs groups each gram's rows: CSR postings.
+        pairs = np.sort(np.concatenate(pairs))
+        codes, rows = pairs // len(self._keys), pairs % len(self._keys)
+        self._postings = rows.astype(np.int32)
+        self._offsets = np.zeros(_GRAMS + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=_GRAMS), out=self._offsets[1:])
+
+    def _candidates(self, keys):
+        """Yield (query position, catalog row) for the rows sharing the most 4-grams with each query."""
+        if self._postings is None:
+            self._build()
+        query_rows, query_codes = _grams(keys)
+        starts = self._offsets[query_codes]
+        sizes = self._offsets[query_codes + 1] - starts
+        usable = (sizes > 0) & (sizes <= MAX_POSTINGS)
+        query_rows, starts, sizes = query_rows[usable], starts[usable], sizes[usable]
+
+        # Split the queries into batches of at most BATCH_PAIRS candidates.
+        per_query = np.bincount(query_rows, weights=sizes, minlength=len(keys))
+        boundaries = np.searchsorted(query_rows, np.flatnonzero(
+            np.diff(np.cumsum(per_query) // BATCH_PAIRS, prepend=0)))
+        for chunk in np.split(np.arange(len(query_rows)), boundaries):
+            if len(chunk):
+                yield from self._top_candidates(query_rows[chunk], starts[chunk], sizes[chunk])
+
+    def _top_candidates(self, query_rows, starts, sizes):
+        total = int(sizes.sum())
+        # Gather every posting of every query gram: offsets within each run
+        # are arange(total) minus the run's first position.
+        run_starts = np.cumsum(sizes) - sizes
+        positions = np.repeat(starts - run_starts, sizes) + np.arange(total)
+        owners = np.repeat(query_rows, sizes)
+        catalog = len(self._keys)
+        pairs, shared = _counts(owners * catalog + self._postings[positions])
+        queries, rows = pairs // catalog, pairs % catalog
+        order = np.lexsort((-shared, queries))
+        queries, rows = queries[order], rows[order]
+        group_starts = np.flatnonzero(np.r_[True, queries[1:] != queries[:-1]])
+        rank = np.arange(len(queries)) - np.repeat(group_starts, np.diff(np.r_[group_starts, len(queries)]))
+        keep = rank < CANDIDATES
+        return zip(queries[keep].tolist(), rows[keep].tolist())
@@ -0,0 +1,128 @@
+"""
+Page-at-a-time scanning and opaque continuation cursors.
+
+DynamoDB returns at most 1 MB per Scan call and signals more data with
+LastEvaluatedKey. These helpers follow that key so callers never silently
+drop items, and turn it into a URL-safe token that API clients can hand
+back to resume where they left off.
+"""
+
+import base64
+import json
+from decimal import Decimal
+
+from materials_db.scan import projection_kwargs
+
+
+class InvalidCursor(ValueError):
+    """Raised when a continuation token cannot be decoded."""
+
+
+def _encode_key_value(obj):
+    if isinstance(obj, Decimal):
+        return {'$n': str(obj)}
+    raise TypeError(f'Unsupported key attribute type: {type(obj).__name__}')
+
+
+def _decode_key_value(obj):
+    if set(obj) == {'$n'}:
+        return Decimal(obj['$n'])
+    return obj
+
+
+def encode_cursor(last_evaluated_key):
+    """Turn a LastEvaluatedKey into an opaque token (None when done)."""
+    if not last_evaluated_key:
+        return None
+    raw = json.dumps(last_evaluated_key, default=_encode_key_value,
+                     separators=(',', ':'), sort_keys=True)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, key_names=None):
+    """
+    Turn a token from encode_cursor back into an ExclusiveStartKey.
+
+    With `key_names`, the key must hold exactly those attributes with
+    string values, so a forged cursor is rejected here instead of failing
+    the Scan with a ValidationException.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode('ascii'))
+        key = json.loads(raw, object_hook=_decode_key_value)
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursor(f'Invalid cursor: {e}') from e
+    if not isinstance(key, dict) or not key:
+        raise InvalidCursor('Invalid cursor: expected a key object')
+    if key_names is not None:
+        if set(key) != set(key_names):
+            raise InvalidCursor(f"Invalid cursor: expected key attributes {', '.join(sorted(key_names))}")
+        if not all(isinstance(value, str) and value for value in key.values()):
+            raise InvalidCursor('Invalid cursor: key values must be non-empty strings')
+    return key
+
+
+def iter_pages(table, **scan_kwargs):
+    """
+    Yield (items, last_evaluated_key) for every Scan page of a table.
+
+    Only one page is held at a time, so memory stays bounded by DynamoDB's
+    1 MB page size regardless of table size.
+    """
+    while True:
+        response = table.scan(**scan_kwargs)
+        last_key = response.get('LastEvaluatedKey')
+        yield response.get('Items', []), last_key
+        if not last_key:
+            return
+        scan_kwargs['ExclusiveStartKey'] = last_key
+
+
+def scan_page(table, limit, start_key=None, **scan_kwargs):
+    """
+    Read up to `limit` items starting after `start_key`.
+
+    Keeps scanning when DynamoDB cuts a page short at 1 MB so the caller
+    gets a full page whenever the table has that many items left. Returns
+    (items, last_evaluated_key); the key is None once the table is
+    exhausted.
+    """
+    items = []
+    last_key = start_key
+    while len(items) < limit:
+        kwargs = dict(scan_kwargs, Limit=limit - len(items))
+        if last_key:
+            kwargs['ExclusiveStartKey'] = last_key
+        response = table.scan(**kwargs)
+        items.extend(response.get('Items', []))
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            break
+    return items, last_key
+
+
+def query_index(table, index_name, key, value, projection=None):
+    """
+    Yield every item whose `key` equals `value` in a GSI, following pages.
+
+    Uses the table's thread-safe low-level client, like the parallel scan.
+    """
+    kwargs = {
+        'TableName': table.name,
+        'IndexName': index_name,
+        'KeyConditionExpression': '#k = :v',
+        'ExpressionAttributeNames': {'#k': key},
+        'ExpressionAttributeValues': {':v': value},
+    }
+    if projection:
+        kwargs.update(projection_kwargs(projection, kwargs['ExpressionAttributeNames']))
+    client = table.meta.client
+    while True:
+        response = client.query(**kwargs)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
@@ -0,0 +1,230 @@
+"""
+In-memory vendor price index over MaterialsSelection-ProductVendors.
+
+Each product's vendor offers are kept sorted by cost, so "cheapest
+vendor" is the first offer, "primary vendor" is a stored pointer and "all
+vendors under X" is one bisect. A purchasing screen can ask for every
+line item of a project with a single lookup_line_items() call instead of
+one ProductIdIndex query per item.
+
+The index is built from one projected parallel scan, saved to a compact
+gzipped JSON snapshot for cold starts (vendor ids are interned and costs
+stored as integer cents), and kept current with upsert()/remove() as
+single relationships change.
+"""
+
+import gzip
+import json
+import os
+from bisect import bisect_right, insort
+from collections import namedtuple
+from decimal import ROUND_FLOOR, Decimal
+
+from materials_db.scan import parallel_scan
+
+SNAPSHOT_VERSION = 1
+RELATIONSHIP_FIELDS = ['id', 'productId', 'vendorId', 'cost', 'isPrimary']
+
+Offer = namedtuple('Offer', 'cost vendorId relationshipId isPrimary')
+
+# Sorts after every relationship id, so (cents, _LAST) bounds a price.
+_LAST = '\uffff'
+_CENT = Decimal('0.01')
+
+
+def _cents(cost):
+    return int((Decimal(cost) * 100).to_integral_value())
+
+
+def unit_budget(allowance, quantity):
+    """
+    Highest unit cost that keeps quantity * cost within a line's allowance.
+
+    The allowance budgets the whole line, so it is divided by the quantity
+    (1 when missing or not positive) and rounded down to the cent.
+    """
+    quantity = Decimal(str(quantity)) if quantity else Decimal(1)
+    if quantity <= 0:
+        quantity = Decimal(1)
+    return (Decimal(str(allowance)) / quantity).quantize(_CENT, rounding=ROUND_FLOOR)
+
+
+class _ProductOffers:
+    __slots__ = ('keys', 'offers', 'primary')
+
+    def __init__(self):
+        self.keys = []      # sorted (cost cents, relationship id)
+        self.offers = {}    # relationship id -> Offer
+        self.primary = None
+
+    def add(self, cents, offer):
+        insort(self.keys, (cents, offer.relationshipId))
+        self.offers[offer.relationshipId] = offer
+        if offer.isPrimary:
+            self.primary = offer.relationshipId
+
+    def discard(self, relationship_id):
+        offer = self.offers.pop(relationship_id, None)
+        if offer is None:
+            return None
+        key = (_cents(offer.cost), relationship_id)
+        del self.keys[bisect_right(self.keys, key) - 1]
+        if self.primary == relationship_id:
+            self.primary = None
+        return offer
+
+    def sorted_offers(self, limit=None):
+        keys = self.keys if limit is None else self.keys[:limit]
+        return [self.offers[relationship_id] for _, relationship_id in keys]
+
+
+class VendorPriceIndex:
+    """productId -> vendor offers sorted by cost."""
+
+    def __init__(self, relationships=()):
+        self._products = {}
+        self._products_by_relationship = {}
+        for relationship in relationships:
+            self.upsert(relationship)
+
+    @classmethod
+    def from_table(cls, table, **scan_kwargs):
+        """Build the index from one projected parallel scan of ProductVendors."""
+        return cls(parallel_scan(table, projection=RELATIONSHIP_FIELDS, **scan_kwargs))
+
+    def __len__(self):
+        return len(self._products_by_relationship)
+
+    def __contains__(self, product_id):
+        return product_id in self._products
+
+    def upsert(self, relationship):
+        """Add or replace one ProductVendors relationship."""
+        relationship_id = relationship['id']
+        self.remove(relationship_id)
+        cost = relationship.get('cost')
+        if cost is None or not relationship.get('productId'):
+            return
+        offer = Offer(Decimal(cost), relationship.get('vendorId'), relationship_id,
+                      bool(relationship.get('isPrimary')))
+        product_id = relationship['productId']
+        offers = self._products.get(product_id)
+        if offers is None:
+            offers = self._products[product_id] = _ProductOffers()
+        if offer.isPrimary and offers.primary and offers.primary != relationship_id:
+            # Keep the one-primary-per-product invariant that
+            # resolve_primaries() enforces in the table.
+            old = offers.offers[offers.primary]
+            offers.offers[offers.primary] = old._replace(isPrimary=False)
+        offers.add(_cents(cost), offer)
+        self._products_by_relationship[relationship_id] = product_id
+
+    def remove(self, relationship_id):
+        """Drop one relationship; returns False if it was not indexed."""
+        product_id = self._products_by_relationship.pop(relationship_id, None)
+        if product_id is None:
+            return False
+        offers = self._products[product_id]
+        offers.discard(relationship_id)
+        if not offers.offers:
+            del self._products[product_id]
+        return True
+
+    def offers(self, product_id):
+        """All offers for a product, cheapest first."""
+        offers = self._products.get(product_id)
+        return offers.sorted_offers() if offers else []
+
+    def cheapest(self, product_id):
+        offers = self._products.get(product_id)
+        if not offers:
+            return None
+        return offers.offers[offers.keys[0][1]]
+
+    def primary(self, product_id):
+        offers = self._products.get(product_id)
+        if not offers or offers.primary is None:
+            return None
+        return offers.offers[offers.primary]
+
+    def under(self, product_id, max_cost):
+        """Offers costing at most `max_cost`, cheapest first."""
+        offers = self._products.get(product_id)
+        if not offers:
+            return []
+        return offers.sorted_offers(bisect_right(offers.keys, (_cents(max_cost), _LAST)))
+
+    def lookup(self, product_id, max_cost=None):
+        """{'cheapest', 'primary', 'offers'} for one product (offers capped at max_cost)."""
+        return {
+            'cheapest': self.cheapest(product_id),
+            'primary': self.primary(product_id),
+            'offers': self.offers(product_id) if max_cost is None else self.under(product_id, max_cost),
+        }
+
+    def lookup_many(self, product_ids, max_cost=None):
+        """lookup() for many products at once; each distinct product is resolved once."""
+        return {product_id: self.lookup(product_id, max_cost) for product_id in set(product_ids)}
+
+    def lookup_line_items(self, line_items, within_allowance=False):
+        """
+        Vendor options for every line item that has a productId.
+
+        Returns {lineItemId: lookup()}. With `within_allowance`, offers are
+        limited to those whose cost * quantity fits each item's allowance
+        (when it has one); see unit_budget().
+        """
+        by_product = {}
+        results = {}
+        for item in line_items:
+            product_id = item.get('productId')
+            if not product_id:
+                continue
+            max_cost = None
+            if within_allowance and item.get('allowance') is not None:
+                max_cost = unit_budget(item['allowance'], item.get('quantity'))
+            if max_cost is None:
+                if product_id not in by_product:
+                    by_product[product_id] = self.lookup(product_id)
+                results[item['id']] = by_product[product_id]
+            else:
+                results[item['id']] = self.lookup(product_id, max_cost)
+        return results
+
+    def save(self, path):
+        """Write a gzipped JSON snapshot; vendor ids are interned, costs stored in cents."""
+        vendors = {}
+        products = []
+        for product_id, offers in self._products.items():
+            rows = []
+            for cents, relationship_id in offers.keys:
+                offer = offers.offers[relationship_id]
+                vendor = vendors.setdefault(offer.vendorId, len(vendors))
+                rows.append([cents, vendor, relationship_id, 1 if offer.isPrimary else 0])
+            products.append([product_id, rows])
+        snapshot = {'version': SNAPSHOT_VERSION, 'vendors': list(vendors), 'products': products}
+        temp = f'{path}.tmp'
+        with gzip.open(temp, 'wt', encoding='utf-8', compresslevel=6) as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+        os.replace(temp, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read a snapshot written by save(); offers are already sorted, so no re-sort."""
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported price index snapshot version: {snapshot.get('version')}")
+        index = cls()
+        vendors = snapshot['vendors']
+        for product_id, rows in snapshot['products']:
+            offers = _ProductOffers()
+            for cents, vendor, relationship_id, primary in rows:
+                offers.keys.append((cents, relationship_id))
+                offers.offers[relationship_id] = Offer(Decimal(cents).scaleb(-2), vendors[vendor],
+                                                       relationship_id, bool(primary))
+                if primary:
+                    offers.primary = relationship_id
+                index._products_by_relationship[relationship_id] = product_id
+            index._products[product_id] = offers
+        return index
@@ -0,0 +1,27 @@
+"""
+Primary-vendor bookkeeping for MaterialsSelection-ProductVendors.
+
+Only one relationship per product may have isPrimary = true. Instead of
+scanning the table for every new primary, callers resolve the invariant in
+memory with resolve_primaries() before bulk-writing the new rows.
+seed_product_vendors.py derives relationship ids from (product, vendor)
+and deletes every row outside the seed set first, so the rows it writes
+are the only ones left to reconcile.
+"""
+
+
+def resolve_primaries(items):
+    """
+    Leave at most one primary per product among `items`, in place.
+
+    `items` are relationship items in load order; as in the original seed
+    loop, a later primary for a product supersedes earlier ones, which are
+    flipped to isPrimary = False.
+    """
+    winners = {}
+    for item in items:
+        if item.get('isPrimary'):
+            previous = winners.get(item['productId'])
+            if previous is not None:
+                previous['isPrimary'] = False
+            winners[item['productId']] = item
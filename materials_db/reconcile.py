@@ -0,0 +1,229 @@
+"""
+Order/receipt reconciliation: ordered vs received vs damaged per line item.
+
+Orders, OrderItems, Receipts and LineItems live in separate tables, so the
+receiving audit joins them in memory, streaming each table once:
+
+1. Orders -> hash index on orderId (number, vendor, date); orders are few.
+2. OrderItems -> hash index on order item id for the line items in the
+   current partition, each probed against the orders index.
+3. Receipts -> probe by orderItemId; received and damaged quantities and
+   the last delivery date are summed onto the order item.
+4. Each order item is classified, and discrepancies are grouped by
+   lineItemId.
+5. LineItems -> probe by id to attach the project, name and status, and
+   fold the results into one report per project.
+
+Every row is touched once and every join is a dict lookup, so the run is
+linear in the size of the tables. Memory is the orders index plus the
+order items of one partition: with `partitions` > 1 the line items are
+split by a stable hash of their id and steps 2-5 repeat per partition,
+trading extra scans of OrderItems, Receipts and LineItems for a
+proportionally smaller working set.
+
+Discrepancy kinds, per order item:
+
+- 'short-shipment': something was received, but less than ordered;
+- 'over-receipt': more was received than ordered;
+- 'unreceived': nothing received and the order is older than
+  `unreceived_days`;
+- 'damaged': receipts recorded damagedQuantity (the Received & Inspected /
+  Return or Damaged columns of the receiving spreadsheet).
+
+Receipts may carry an optional damagedQuantity; damaged units count as
+received but not usable, so a line item is only fully received once
+received - damaged covers what was ordered.
+"""
+
+import zlib
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from materials_db.scan import parallel_scan
+
+DEFAULT_UNRECEIVED_DAYS = 14
+KINDS = ('short-shipment', 'over-receipt', 'unreceived', 'damaged')
+
+ORDER_FIELDS = ['id', 'vendorId', 'orderNumber', 'orderDate']
+ORDER_ITEM_FIELDS = ['id', 'orderId', 'lineItemId', 'orderedQuantity']
+RECEIPT_FIELDS = ['orderItemId', 'receivedQuantity', 'damagedQuantity', 'receivedDate']
+LINE_ITEM_FIELDS = ['id', 'projectId', 'name', 'status', 'returnNotes']
+
+# Per-line-item receiving state, as counted in each project's summary.
+STATES = ('received', 'partial', 'on-order', 'over', 'damaged')
+
+_ZERO = Decimal(0)
+
+# Positions in the per-order-item state list (lists, not dicts, to keep the
+# hash index small).
+_ORDER, _LINE_ITEM, _ORDERED, _RECEIVED, _DAMAGED, _LAST_RECEIVED = range(6)
+
+
+def _quantity(value):
+    if value is None or isinstance(value, bool):
+        return _ZERO
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def _day(value):
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def partition_of(line_item_id, partitions):
+    """Stable partition number of a line item (crc32, not the salted hash())."""
+    return zlib.crc32(line_item_id.encode()) % partitions if partitions > 1 else 0
+
+
+def _kinds(entry, order_day, as_of, unreceived_days):
+    ordered, received = entry[_ORDERED], entry[_RECEIVED]
+    kinds = []
+    if received > ordered:
+        kinds.append('over-receipt')
+    elif received and received < ordered:
+        kinds.append('short-shipment')
+    elif not received and order_day and (as_of - order_day).days > unreceived_days:
+        kinds.append('unreceived')
+    if entry[_DAMAGED]:
+        kinds.append('damaged')
+    return kinds
+
+
+def _state(ordered, received, damaged):
+    if damaged:
+        return 'damaged'
+    if received > ordered:
+        return 'over'
+    if received >= ordered:
+        return 'received'
+    return 'partial' if received else 'on-order'
+
+
+def _new_report(project_id):
+    return {
+        'projectId': project_id,
+        'lineItems': 0,
+        'states': dict.fromkeys(STATES, 0),
+        'counts': dict.fromkeys(KINDS, 0),
+        'discrepancies': [],
+    }
+
+
+def reconcile(sources, as_of=None, unreceived_days=DEFAULT_UNRECEIVED_DAYS, partitions=1):
+    """
+    Per-project reconciliation reports, {projectId: report}.
+
+    `sources` maps 'Orders', 'OrderItems', 'Receipts' and 'LineItems' to
+    zero-argument callables returning an iterable of items; each is called
+    once per partition (Orders once), so they can be fresh table scans.
+
+    A report has 'lineItems' (ordered line items), 'states' (line items
+    per receiving state), 'counts' (discrepancies per kind) and
+    'discrepancies', one row per order item and kind, oldest order first.
+    Line items that were never ordered do not appear.
+    """
+    as_of = as_of or date.today()
+    partitions = max(1, int(partitions))
+    orders = {}
+    for order in sources['Orders']():
+        orders[order['id']] = (order.get('orderNumber'), order.get('vendorId'), _day(order.get('orderDate')))
+
+    reports = {}
+    for partition in range(partitions):
+        # OrderItems: build the order item index for this partition.
+        entries = {}
+        for item in sources['OrderItems']():
+            line_item_id = item.get('lineItemId')
+            if not line_item_id or partition_of(line_item_id, partitions) != partition:
+                continue
+            entries[item['id']] = [item.get('orderId'), line_item_id, _quantity(item.get('orderedQuantity')),
+                                   _ZERO, _ZERO, None]
+
+        # Receipts: probe and accumulate onto their order item.
+        for receipt in sources['Receipts']():
+            entry = entries.get(receipt.get('orderItemId'))
+            if entry is None:
+                continue
+            entry[_RECEIVED] += _quantity(receipt.get('receivedQuantity'))
+            entry[_DAMAGED] += _quantity(receipt.get('damagedQuantity'))
+            received = receipt.get('receivedDate')
+            if received and (entry[_LAST_RECEIVED] is None or received > entry[_LAST_RECEIVED]):
+                entry[_LAST_RECEIVED] = received
+
+        # Classify order items and group them by line item.
+        by_line_item = defaultdict(list)
+        for order_item_id, entry in entries.items():
+            by_line_item[entry[_LINE_ITEM]].append((order_item_id, entry))
+        del entries
+
+        # LineItems: probe by id, then fold into the project reports.
+        for line_item in sources['LineItems']():
+            order_items = by_line_item.pop(line_item['id'], None)
+            if order_items is None:
+                continue
+            project_id = line_item.get('projectId')
+            report = reports.get(project_id)
+            if report is None:
+                report = reports[project_id] = _new_report(project_id)
+            _fold(report, line_item, order_items, orders, as_of, unreceived_days)
+
+        # Order items whose line item no longer exists.
+        for line_item_id, order_items in by_line_item.items():
+            report = reports.get(None)
+            if report is None:
+                report = reports[None] = _new_report(None)
+            _fold(report, {'id': line_item_id, 'name': None, 'status': 'deleted'},
+                  order_items, orders, as_of, unreceived_days)
+
+    for report in reports.values():
+        report['discrepancies'].sort(key=lambda row: (row['orderDate'] or '', row['orderItemId'], row['kind']))
+    return reports
+
+
+def _fold(report, line_item, order_items, orders, as_of, unreceived_days):
+    ordered = received = damaged = _ZERO
+    for order_item_id, entry in order_items:
+        ordered += entry[_ORDERED]
+        received += entry[_RECEIVED]
+        damaged += entry[_DAMAGED]
+        order_number, vendor_id, order_day = orders.get(entry[_ORDER], (None, None, None))
+        for kind in _kinds(entry, order_day, as_of, unreceived_days):
+            report['counts'][kind] += 1
+            report['discrepancies'].append({
+                'kind': kind,
+                'projectId': report['projectId'],
+                'lineItemId': line_item['id'],
+                'lineItemName': line_item.get('name'),
+                'lineItemStatus': line_item.get('status'),
+                'orderId': entry[_ORDER],
+                'orderNumber': order_number,
+                'vendorId': vendor_id,
+                'orderItemId': order_item_id,
+                'orderDate': order_day.isoformat() if order_day else None,
+                'daysOpen': (as_of - order_day).days if order_day else None,
+                'orderedQuantity': entry[_ORDERED],
+                'receivedQuantity': entry[_RECEIVED],
+                'damagedQuantity': entry[_DAMAGED],
+                'lastReceivedDate': entry[_LAST_RECEIVED],
+                'returnNotes': line_item.get('returnNotes'),
+            })
+    report['lineItems'] += 1
+    report['states'][_state(ordered, received - damaged, damaged)] += 1
+
+
+def table_sources(tables, total_segments=None):
+    """reconcile() sources that stream projected parallel scans of `tables`."""
+    kwargs = {'total_segments': total_segments} if total_segments else {}
+    fields = {'Orders': ORDER_FIELDS, 'OrderItems': ORDER_ITEM_FIELDS,
+              'Receipts': RECEIPT_FIELDS, 'LineItems': LINE_ITEM_FIELDS}
+    return {name: (lambda name=name: parallel_scan(tables[name], projection=fields[name], **kwargs))
+            for name in fields}
+
+
+def reconcile_tables(tables, as_of=None, unreceived_days=DEFAULT_UNRECEIVED_DAYS, partitions=1,
+                     total_segments=None):
+    """reconcile() over the MaterialsSelection-* tables in `tables` ({short name: Table})."""
+    return reconcile(table_sources(tables, total_segments), as_of, unreceived_days, partitions)
@@ -0,0 +1,226 @@
+"""
+Compact catalog records decoded straight from DynamoDB wire JSON.
+
+Reading through the boto3 resource layer costs three passes per item:
+botocore walks the JSON response against the service model, then the
+resource's TypeDeserializer walks it again, and the result is a dict per
+item with a Decimal per number. For a full read of the catalog the first
+pass dominates, and the dicts take several times the raw data in memory.
+
+The wire client (repository.get_wire_client()) skips both passes for the
+item payload: a before-parse hook decodes the response body with
+json.loads, hands Items / Item / Responses back untouched in wire format
+({'S': 'Kohler'}, {'N': '12.50'}, ...), and leaves only the small rest of
+the response (keys, counts, consumed capacity) to botocore.
+scan_records() turns those wire items into one __slots__ record per item:
+
+- declared fields are plain attributes (product.modelNumber); strings are
+  taken as-is from the parsed JSON and numbers become Decimal, as with the
+  resource layer; missing fields read as None;
+- ids and other values repeated across many items (manufacturerId,
+  vendorId, category, ...) are interned, so a vendor id referenced by
+  100,000 relationships is stored once;
+- attributes a record does not declare are kept in wire form and only
+  decoded when read through get() or to_dict(), so fields nobody reads
+  cost no decoding.
+
+Records expose get() like a dict, so code written against item.get(...)
+works on either. Wire-client requests take wire-format values as well:
+FilterExpression values and keys must be {'S': ...} style, exactly as in
+the low-level DynamoDB API. Binary attributes decode to bytes rather than
+boto3's Binary.
+"""
+
+import base64
+import json
+import sys
+from decimal import Decimal
+
+from materials_db.repository import wire_table
+from materials_db.scan import DEFAULT_SEGMENTS, parallel_scan_pages
+
+# Response members that carry items, per operation; everything else in the
+# response is left to botocore.
+ITEM_MEMBERS = {
+    'Scan': 'Items',
+    'Query': 'Items',
+    'GetItem': 'Item',
+    'BatchGetItem': 'Responses',
+}
+
+_intern = sys.intern
+
+
+def decode_value(value):
+    """One wire-format attribute value -> the Python value boto3 would return."""
+    (tag, data), = value.items()
+    if tag == 'S':
+        return data
+    if tag == 'N':
+        return Decimal(data)
+    if tag == 'BOOL':
+        return data
+    if tag == 'NULL':
+        return None
+    if tag == 'M':
+        return {name: decode_value(member) for name, member in data.items()}
+    if tag == 'L':
+        return [decode_value(member) for member in data]
+    if tag == 'SS':
+        return set(data)
+    if tag == 'NS':
+        return {Decimal(number) for number in data}
+    if tag == 'B':
+        return base64.b64decode(data)
+    if tag == 'BS':
+        return {base64.b64decode(member) for member in data}
+    raise ValueError(f'Unknown DynamoDB type {tag!r}')
+
+
+def decode_item(item):
+    """A wire-format item -> a plain dict, as the resource layer returns it."""
+    return {name: decode_value(value) for name, value in item.items()}
+
+
+def _skip_item_parsing(operation_model, response_dict, customized_response_dict, **kwargs):
+    member = ITEM_MEMBERS.get(operation_model.name)
+    if member is None or response_dict['status_code'] >= 300:
+        return
+    body = json.loads(response_dict['body'])
+    items = body.pop(member, None)
+    if items is None:
+        return
+    customized_response_dict[member] = items
+    response_dict['body'] = json.dumps(body).encode()
+
+
+def skip_item_parsing(client):
+    """Make `client` return Items / Item / Responses in wire format, parsed by json.loads only."""
+    for operation in ITEM_MEMBERS:
+        client.meta.events.register(f'before-parse.dynamodb.{operation}', _skip_item_parsing,
+                                    unique_id=f'materials-db-wire-items-{operation}')
+    return client
+
+
+class Record:
+    """
+    Base class for the slotted records; subclasses list FIELDS (attribute
+    names, each becoming a slot) and INTERNED (fields whose values repeat
+    across items).
+    """
+
+    __slots__ = ('_extra',)
+    FIELDS = ()
+    INTERNED = ()
+    TABLE = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Attribute name -> (slot setter, intern the value?) for from_wire().
+        cls._setters = {name: (getattr(cls, name).__set__, name in cls.INTERNED) for name in cls.FIELDS}
+
+    @classmethod
+    def from_wire(cls, item):
+        """Build a record from one wire-format item."""
+        record = cls.__new__(cls)
+        setters = cls._setters
+        extra = None
+        for name, value in item.items():
+            entry = setters.get(name)
+            if entry is None:
+                if extra is None:
+                    extra = {}
+                extra[name] = value
+                continue
+            setter, interned = entry
+            data = value.get('S')
+            if data is None:
+                data = decode_value(value)
+            elif interned:
+                data = _intern(data)
+            setter(record, data)
+        record._extra = extra
+        return record
+
+    def __getattr__(self, name):
+        # Only reached for unset slots (attributes the item did not have).
+        if name in type(self)._setters:
+            return None
+        raise AttributeError(f'{type(self).__name__!r} object has no attribute {name!r}')
+
+    def get(self, name, default=None):
+        """Like dict.get(): a declared field or an undeclared attribute, decoded on access."""
+        if name in type(self)._setters:
+            value = getattr(self, name)
+        elif self._extra and name in self._extra:
+            value = decode_value(self._extra[name])
+        else:
+            value = None
+        return default if value is None else value
+
+    def to_dict(self):
+        """Every attribute of the item, decoded, as the resource layer would return it."""
+        item = {name: getattr(self, name) for name in self.FIELDS}
+        item = {name: value for name, value in item.items() if value is not None}
+        if self._extra:
+            item.update(decode_item(self._extra))
+        return item
+
+    def __repr__(self):
+        return f'{type(self).__name__}(id={getattr(self, "id", None)!r})'
+
+
+class Project(Record):
+    TABLE = 'Projects'
+    FIELDS = ('id', 'name', 'description', 'startDate', 'endDate', 'status', 'budget',
+              'createdAt', 'updatedAt')
+    INTERNED = ('status',)
+    __slots__ = FIELDS
+
+
+class Product(Record):
+    TABLE = 'Products'
+    FIELDS = ('id', 'manufacturerId', 'name', 'modelNumber', 'description', 'category', 'unit',
+              'imageUrl', 'productUrl', 'createdAt', 'updatedAt')
+    INTERNED = ('manufacturerId', 'category', 'unit')
+    __slots__ = FIELDS
+
+
+class Vendor(Record):
+    TABLE = 'Vendors'
+    FIELDS = ('id', 'name', 'contact', 'phone', 'email', 'website', 'createdAt', 'updatedAt')
+    __slots__ = FIELDS
+
+
+class Manufacturer(Record):
+    TABLE = 'Manufacturers'
+    FIELDS = ('id', 'name', 'website', 'createdAt', 'updatedAt')
+    __slots__ = FIELDS
+
+
+class ProductVendor(Record):
+    TABLE = 'ProductVendors'
+    FIELDS = ('id', 'productId', 'vendorId', 'cost', 'isPrimary', 'createdAt', 'updatedAt')
+    INTERNED = ('productId', 'vendorId', 'createdAt', 'updatedAt')
+    __slots__ = FIELDS
+
+
+RECORD_TYPES = {cls.TABLE: cls for cls in (Project, Product, Vendor, Manufacturer, ProductVendor)}
+
+
+def scan_records(name, total_segments=DEFAULT_SEGMENTS, projection=None, region_name=None, **scan_kwargs):
+    """
+    Yield a record per item of table `name` ('Products', 'ProductVendors', ...).
+
+    One parallel scan through the wire client; `projection` and extra
+    Scan arguments are passed through (values in wire format).
+    """
+    cls = RECORD_TYPES[name]
+    from_wire = cls.from_wire
+    for page in parallel_scan_pages(wire_table(name, region_name), total_segments, projection, **scan_kwargs):
+        yield from map(from_wire, page)
+
+
+def load_records(name, total_segments=DEFAULT_SEGMENTS, projection=None, region_name=None):
+    """{id: record} for every item of table `name`."""
+    return {record.id: record for record in scan_records(name, total_segments, projection, region_name)}
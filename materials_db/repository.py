@@ -0,0 +1,482 @@
+"""
+Shared DynamoDB access for the MaterialsSelection-* tables.
+
+Every script and the Lambda used to build its own boto3 resource with
+default client settings. get_resource() and table() instead hand out one
+cached resource per process whose client is tuned for this workload:
+
+- a connection pool large enough for the parallel scans and bulk writers
+  (DDB_MAX_POOL_CONNECTIONS, default 50) with TCP keep-alive, so warm
+  invocations and worker threads reuse connections;
+- adaptive retries (DDB_MAX_ATTEMPTS, default 10), which back off and
+  rate-limit client-side when DynamoDB throttles;
+- short connect/read timeouts so a stalled connection is retried rather
+  than holding a Lambda until it times out.
+
+Repository adds keyed reads on top: get_many() fetches ids in concurrent
+100-key BatchGetItem calls, and get() coalesces concurrent single-item
+reads from many threads into those same batches. resolve_names() uses it
+to fill in vendor, manufacturer and product names for a set of line items
+in a handful of round trips.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from materials_db.bulk import MAX_ATTEMPTS, THROTTLING_ERRORS, backoff_delay
+from materials_db.instrumentation import instrument
+from materials_db.scan import projection_kwargs
+
+TABLE_PREFIX = 'MaterialsSelection-'
+REGION = os.environ.get('MATERIALS_REGION') or os.environ.get('AWS_REGION') or 'us-east-1'
+
+MAX_POOL_CONNECTIONS = int(os.environ.get('DDB_MAX_POOL_CONNECTIONS', '50'))
+CLIENT_MAX_ATTEMPTS = int(os.environ.get('DDB_MAX_ATTEMPTS', '10'))
+CONNECT_TIMEOUT = float(os.environ.get('DDB_CONNECT_TIMEOUT', '2'))
+READ_TIMEOUT = float(os.environ.get('DDB_READ_TIMEOUT', '10'))
+
+BATCH_GET_SIZE = 100  # BatchGetItem hard limit
+DEFAULT_CONCURRENCY = 4
+# How long get() waits for other threads' keys before sending a batch.
+COALESCE_WINDOW = 0.002
+
+# Line-item reference attribute -> (table, attribute copied, name on the item).
+LINE_ITEM_REFERENCES = {
+    'vendorId': ('Vendors', 'name', 'vendorName'),
+    'manufacturerId': ('Manufacturers', 'name', 'manufacturerName'),
+    'productId': ('Products', 'name', 'productName'),
+}
+
+_lock = threading.Lock()
+_resources = {}
+_clients = {}
+_tables = {}
+
+
+def _reset_after_fork():
+    # Pooled sockets must not be shared with a forked child (process pools).
+    global _lock
+    _lock = threading.Lock()
+    _resources.clear()
+    _clients.clear()
+    _tables.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def client_settings(**overrides):
+    """Keyword arguments for the shared clients' botocore Config."""
+    settings = {
+        'max_pool_connections': MAX_POOL_CONNECTIONS,
+        'tcp_keepalive': True,
+        'connect_timeout': CONNECT_TIMEOUT,
+        'read_timeout': READ_TIMEOUT,
+        'retries': {'mode': 'adaptive', 'max_attempts': CLIENT_MAX_ATTEMPTS},
+    }
+    settings.update(overrides)
+    return settings
+
+
+def client_config(**overrides):
+    """botocore Config used for every shared client; keyword args override."""
+    return Config(**client_settings(**overrides))
+
+
+def get_resource(region_name=None):
+    """The process-wide DynamoDB resource for a region, created on first use."""
+    region_name = region_name or REGION
+    resource = _resources.get(region_name)
+    if resource is None:
+        with _lock:
+            resource = _resources.get(region_name)
+            if resource is None:
+                resource = boto3.resource('dynamodb', region_name=region_name, config=client_config())
+                instrument(resource.meta.client)
+                _resources[region_name] = resource
+    return resource
+
+
+def get_client(region_name=None):
+    """
+    A process-wide low-level DynamoDB client that speaks Python types.
+
+    Skips the resource layer (its model loading and class generation) and
+    registers only the same item (de)serialization hooks the resource
+    installs, so items, keys and ExpressionAttributeValues are plain
+    Python/Decimal values exactly as with table.meta.client.
+    """
+    region_name = region_name or REGION
+    client = _clients.get(region_name)
+    if client is None:
+        with _lock:
+            client = _clients.get(region_name)
+            if client is None:
+                from boto3.dynamodb.transform import TransformationInjector, copy_dynamodb_params
+
+                client = boto3.client('dynamodb', region_name=region_name, config=client_config())
+                injector = TransformationInjector()
+                events = client.meta.events
+                events.register('provide-client-params.dynamodb', copy_dynamodb_params,
+                                unique_id='dynamodb-create-params-copy')
+                events.register('before-parameter-build.dynamodb', injector.inject_condition_expressions,
+                                unique_id='dynamodb-condition-expression')
+                events.register('before-parameter-build.dynamodb', injector.inject_attribute_value_input,
+                                unique_id='dynamodb-attr-value-input')
+                events.register('after-call.dynamodb', injector.inject_attribute_value_output,
+                                unique_id='dynamodb-attr-value-output')
+                instrument(client)
+                _clients[region_name] = client
+    return client
+
+
+def get_wire_client(region_name=None):
+    """
+    A process-wide low-level DynamoDB client that returns items in wire format.
+
+    No (de)serialization hooks: requests take {'S': ...} style values and
+    Items / Item / Responses come back as parsed JSON, skipping botocore's
+    response parsing for them (see materials_db.records).
+    """
+    region_name = region_name or REGION
+    key = ('wire', region_name)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                from materials_db.records import skip_item_parsing
+
+                client = boto3.client('dynamodb', region_name=region_name, config=client_config())
+                skip_item_parsing(client)
+                instrument(client)
+                _clients[key] = client
+    return client
+
+
+class _Meta:
+    __slots__ = ('client',)
+
+    def __init__(self, client):
+        self.client = client
+
+
+class LightTable:
+    """
+    The parts of a boto3 Table the materials_db helpers use (name,
+    meta.client, scan/query/get_item/put_item), backed by get_client().
+    """
+
+    def __init__(self, name, client):
+        self.name = name
+        self.meta = _Meta(client)
+        self._key_schema = None
+
+    def __repr__(self):
+        return f'LightTable(name={self.name!r})'
+
+    @property
+    def key_schema(self):
+        if self._key_schema is None:
+            self._key_schema = self.meta.client.describe_table(TableName=self.name)['Table']['KeySchema']
+        return self._key_schema
+
+    def scan(self, **kwargs):
+        return self.meta.client.scan(TableName=self.name, **kwargs)
+
+    def query(self, **kwargs):
+        return self.meta.client.query(TableName=self.name, **kwargs)
+
+    def get_item(self, **kwargs):
+        return self.meta.client.get_item(TableName=self.name, **kwargs)
+
+    def put_item(self, **kwargs):
+        return self.meta.client.put_item(TableName=self.name, **kwargs)
+
+    def update_item(self, **kwargs):
+        return self.meta.client.update_item(TableName=self.name, **kwargs)
+
+    def delete_item(self, **kwargs):
+        return self.meta.client.delete_item(TableName=self.name, **kwargs)
+
+
+def light_table(name, region_name=None):
+    """Cached LightTable for 'Projects' or 'MaterialsSelection-Projects'."""
+    key = ('light', table_name(name), region_name or REGION)
+    cached = _tables.get(key)
+    if cached is None:
+        cached = _tables[key] = LightTable(key[1], get_client(region_name))
+    return cached
+
+
+def wire_table(name, region_name=None):
+    """Cached LightTable for a table, backed by get_wire_client()."""
+    key = ('wire', table_name(name), region_name or REGION)
+    cached = _tables.get(key)
+    if cached is None:
+        cached = _tables[key] = LightTable(key[1], get_wire_client(region_name))
+    return cached
+
+
+def table_name(name):
+    """'Projects' -> 'MaterialsSelection-Projects'; full names pass through."""
+    return name if name.startswith(TABLE_PREFIX) else TABLE_PREFIX + name
+
+
+def table(name, region_name=None):
+    """Cached Table for 'Projects' or 'MaterialsSelection-Projects'."""
+    key = (table_name(name), region_name or REGION)
+    cached = _tables.get(key)
+    if cached is None:
+        cached = _tables[key] = get_resource(region_name).Table(key[0])
+    return cached
+
+
+def _key_tuple(key):
+    return tuple(sorted(key.items()))
+
+
+class Repository:
+    """
+    Keyed reads across the MaterialsSelection-* tables on the shared client.
+
+    get_many() is the bulk path. get() may be called from many threads at
+    once; calls arriving within `coalesce_window` seconds of each other are
+    sent together as one BatchGetItem (up to 100 keys). Call close(), or
+    use the repository as a context manager, to stop the background batcher.
+    """
+
+    def __init__(self, region_name=None, concurrency=DEFAULT_CONCURRENCY,
+                 coalesce_window=COALESCE_WINDOW, max_attempts=MAX_ATTEMPTS):
+        self.region_name = region_name
+        self.client = get_resource(region_name).meta.client
+        self.concurrency = max(1, concurrency)
+        self.coalesce_window = coalesce_window
+        self.max_attempts = max_attempts
+        self.round_trips = 0
+        self._stats_lock = threading.Lock()
+        self._pool = None
+        self._pending = {}  # (table, projection) -> {key tuple: (key, [futures])}
+        self._pending_count = 0
+        self._condition = threading.Condition()
+        self._batcher = None
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def table(self, name):
+        return table(name, self.region_name)
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='batch-get')
+        return self._pool
+
+    def _batch_get(self, request_items):
+        """One BatchGetItem of up to 100 keys, retrying UnprocessedKeys; returns {table: [items]}."""
+        found = {}
+        pending = request_items
+        for attempt in range(self.max_attempts):
+            try:
+                response = self.client.batch_get_item(RequestItems=pending)
+            except ClientError as e:
+                if e.response['Error']['Code'] not in THROTTLING_ERRORS:
+                    raise
+                response = {'UnprocessedKeys': pending}
+            with self._stats_lock:
+                self.round_trips += 1
+            for name, items in response.get('Responses', {}).items():
+                found.setdefault(name, []).extend(items)
+            pending = response.get('UnprocessedKeys') or {}
+            if not pending:
+                return found
+            if attempt + 1 < self.max_attempts:
+                time.sleep(backoff_delay(attempt))
+        raise RuntimeError(f'BatchGetItem left {sum(len(r["Keys"]) for r in pending.values())} '
+                           f'keys unprocessed after {self.max_attempts} attempts')
+
+    @staticmethod
+    def _request(keys, projection, key_names):
+        request = {'Keys': keys}
+        if projection:
+            attributes = list(dict.fromkeys(list(key_names) + list(projection)))
+            request.update(projection_kwargs(attributes))
+        return request
+
+    def batch_get(self, requests, key='id'):
+        """
+        Fetch items from several tables at once.
+
+        `requests` maps table name -> (ids, projection or None). Ids are
+        deduplicated and packed into 100-key BatchGetItem calls that may
+        span tables, sent `concurrency` at a time. Returns
+        {table name: {id: item}} for the ids that exist.
+        """
+        keys = []
+        for name, (ids, projection) in requests.items():
+            full_name = table_name(name)
+            for i in dict.fromkeys(i for i in ids if i is not None):
+                keys.append((full_name, projection, i))
+        calls = []
+        for start in range(0, len(keys), BATCH_GET_SIZE):
+            request = {}
+            for full_name, projection, i in keys[start:start + BATCH_GET_SIZE]:
+                entry = request.get(full_name)
+                if entry is None:
+                    entry = request[full_name] = self._request([], projection, [key])
+                entry['Keys'].append({key: i})
+            calls.append(request)
+        if len(calls) > 1:
+            results = self._executor().map(self._batch_get, calls)
+        else:
+            results = map(self._batch_get, calls)
+        found = {name: {} for name in requests}
+        names = {table_name(name): name for name in requests}
+        for result in results:
+            for full_name, items in result.items():
+                found[names[full_name]].update((item[key], item) for item in items)
+        return found
+
+    def get_many(self, name, ids, projection=None, key='id'):
+        """
+        Fetch items by primary key; returns {id: item} for the ids that exist.
+
+        `projection` limits the attributes returned (the key is always
+        included). See batch_get() for reading several tables at once.
+        """
+        return self.batch_get({name: (ids, projection)}, key)[name]
+
+    def get(self, name, key, projection=None):
+        """Read one item (None if missing), batched with concurrent get() calls."""
+        return self.get_async(name, key, projection).result()
+
+    def get_async(self, name, key, projection=None):
+        """Queue one keyed read and return a Future for the item (or None)."""
+        future = Future()
+        group = (table_name(name), tuple(projection) if projection else None)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('Repository is closed')
+            keys = self._pending.setdefault(group, {})
+            entry = keys.get(_key_tuple(key))
+            if entry is None:
+                keys[_key_tuple(key)] = (key, [future])
+                self._pending_count += 1
+            else:
+                entry[1].append(future)
+            if self._batcher is None:
+                self._batcher = threading.Thread(target=self._run_batcher, name='get-coalescer', daemon=True)
+                self._batcher.start()
+            self._condition.notify()
+        return future
+
+    def _take_batch(self):
+        """Pop up to 100 pending keys as {group: [(key, futures)]}."""
+        batch, taken = {}, 0
+        for group in list(self._pending):
+            keys = self._pending[group]
+            while keys and taken < BATCH_GET_SIZE:
+                batch.setdefault(group, []).append(keys.pop(next(iter(keys))))
+                taken += 1
+            if not keys:
+                del self._pending[group]
+            if taken == BATCH_GET_SIZE:
+                break
+        self._pending_count -= taken
+        return batch
+
+    def _run_batcher(self):
+        while True:
+            with self._condition:
+                while not self._pending_count and not self._closed:
+                    self._condition.wait()
+                if self._closed and not self._pending_count:
+                    return
+                # Give other threads a moment to add keys unless a batch is full.
+                deadline = time.monotonic() + self.coalesce_window
+                while self._pending_count < BATCH_GET_SIZE and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._take_batch()
+            self._executor().submit(self._send_coalesced, batch)
+
+    def _send_coalesced(self, batch):
+        # BatchGetItem takes one projection per table, so mixed projections
+        # of the same table go out as separate requests.
+        by_table = {}
+        for (name, projection), entries in batch.items():
+            by_table.setdefault(name, []).append((projection, entries))
+        requests = []
+        while any(by_table.values()):
+            request, groups = {}, []
+            for name, groups_for_table in by_table.items():
+                if groups_for_table:
+                    projection, entries = groups_for_table.pop()
+                    key_names = sorted(entries[0][0])
+                    request[name] = self._request([key for key, _ in entries], projection, key_names)
+                    groups.append((name, entries))
+            requests.append((request, groups))
+
+        for request, groups in requests:
+            try:
+                found = self._batch_get(request)
+            except Exception as e:
+                for _, entries in groups:
+                    for _, futures in entries:
+                        for future in futures:
+                            future.set_exception(e)
+                continue
+            for name, entries in groups:
+                key_names = sorted(entries[0][0])
+                items = {_key_tuple({k: item[k] for k in key_names}): item for item in found.get(name, [])}
+                for key, futures in entries:
+                    item = items.get(_key_tuple(key))
+                    for future in futures:
+                        future.set_result(item)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._batcher is not None:
+            self._batcher.join()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+def resolve_names(repository, line_items, references=LINE_ITEM_REFERENCES):
+    """
+    Fill vendorName/manufacturerName/productName on line items in place.
+
+    All distinct ids across `line_items` are read in one batch_get(), so a
+    project costs a few BatchGetItem calls instead of one GetItem per item
+    and reference. Names already present on an item are kept. Returns the
+    items.
+    """
+    line_items = list(line_items)
+    requests = {}
+    for reference, (name, attribute, _) in references.items():
+        ids = {item.get(reference) for item in line_items} - {None}
+        if ids:
+            requests[name] = (ids, [attribute])
+    found = repository.batch_get(requests) if requests else {}
+    for item in line_items:
+        for reference, (name, attribute, target) in references.items():
+            match = found.get(name, {}).get(item.get(reference))
+            if match is not None and not item.get(target) and match.get(attribute) is not None:
+                item[target] = match[attribute]
+    return line_items
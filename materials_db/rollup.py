@@ -0,0 +1,432 @@
+"""
+Budget-vs-actual cost rollups over columnar NumPy arrays.
+
+Line items are loaded once into parallel arrays (category code, cost and
+allowance in integer cents) and every category and project total comes
+out of a few np.bincount calls instead of a Python loop per item. Money
+is held as int64 cents so sums are exact and never drift the way float
+dollars would.
+
+A line item's cost is its totalCost, or quantity * unitCost when
+totalCost is missing. A category's allowance is the Categories row's
+allowance when it has one, otherwise the sum of its line items'
+allowances; variance is allowance minus cost, so negative means over
+budget.
+
+CostRollup keeps per-category sums up to date as single line items are
+added, changed or removed, so a budget view can apply one edit in O(1)
+rather than reloading the project. Building its arrays costs a float
+conversion per amount, though, which is slower than adding the Decimals
+directly when the totals are read only once; one-shot reports use
+DecimalRollup, which has the same category_totals() / project_totals()
+output and no edits.
+"""
+
+from decimal import Decimal
+from itertools import islice
+from operator import itemgetter
+
+import numpy as np
+
+from materials_db.pagination import query_index
+from materials_db.scan import parallel_scan
+
+ACTIVE_STATUSES = ('planning', 'in-progress', 'on-hold')
+
+LINE_ITEM_FIELDS = ['id', 'projectId', 'categoryId', 'quantity', 'unitCost', 'totalCost', 'allowance']
+CATEGORY_FIELDS = ['id', 'projectId', 'name', 'allowance']
+
+_INITIAL_CAPACITY = 64
+# Line items gathered per pass in a bulk load; bounds the extra memory when
+# they arrive from a scan generator.
+LOAD_CHUNK = 65536
+
+_ID = itemgetter('id')
+_CATEGORY_ID = itemgetter('categoryId')
+_TOTAL_COST = itemgetter('totalCost')
+_ALLOWANCE = itemgetter('allowance')
+_ZERO = Decimal(0)
+_CENT = Decimal('0.01')
+
+
+def to_cents(value):
+    """Round a Decimal/number amount to integer cents; None counts as 0."""
+    if value is None or isinstance(value, bool):
+        return 0
+    return int(round(float(value) * 100))
+
+
+def from_cents(cents):
+    """Integer cents back to a 2-place Decimal, the type DynamoDB items use."""
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def line_cost(item):
+    """A line item's cost as a number: totalCost, else quantity * unitCost."""
+    total = item.get('totalCost')
+    if total is not None:
+        return total
+    quantity, unit_cost = item.get('quantity'), item.get('unitCost')
+    if quantity is None or unit_cost is None:
+        return 0
+    return float(quantity) * float(unit_cost)
+
+
+def _grow(array, size):
+    if size <= len(array):
+        return array
+    grown = np.zeros(max(size, len(array) * 2, _INITIAL_CAPACITY), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class CostRollup:
+    """
+    Category and project cost totals for a set of line items.
+
+    Build one with CostRollup(line_items, categories), then read
+    category_totals() / project_totals(). upsert() and remove() apply
+    single line-item edits; set_category() changes a category's allowance.
+    """
+
+    def __init__(self, line_items=(), categories=()):
+        self.project_ids = []
+        self.category_ids = []
+        self._project_codes = {}
+        self._category_codes = {}
+
+        # One row per line item; a removed item's row keeps category -1.
+        self._rows = {}
+        self._size = 0
+        self.item_category = np.zeros(0, dtype=np.int32)
+        self.item_cost = np.zeros(0, dtype=np.int64)
+        self.item_allowance = np.zeros(0, dtype=np.int64)
+
+        self.category_project = np.zeros(0, dtype=np.int32)
+        self.category_allowance = np.zeros(0, dtype=np.int64)
+        self.category_has_allowance = np.zeros(0, dtype=bool)
+        self.category_cost = np.zeros(0, dtype=np.int64)
+        self.category_item_allowance = np.zeros(0, dtype=np.int64)
+        self.category_items = np.zeros(0, dtype=np.int64)
+        self.category_names = []
+
+        for category in categories:
+            self.set_category(category)
+        self._load(line_items)
+
+    def _project_code(self, project_id):
+        code = self._project_codes.get(project_id)
+        if code is None:
+            code = self._project_codes[project_id] = len(self.project_ids)
+            self.project_ids.append(project_id)
+        return code
+
+    def _category_code(self, category_id, project_id):
+        code = self._category_codes.get(category_id)
+        if code is None:
+            code = self._category_codes[category_id] = len(self.category_ids)
+            self.category_ids.append(category_id)
+            self.category_names.append(None)
+            size = code + 1
+            self.category_project = _grow(self.category_project, size)
+            self.category_allowance = _grow(self.category_allowance, size)
+            self.category_has_allowance = _grow(self.category_has_allowance, size)
+            self.category_cost = _grow(self.category_cost, size)
+            self.category_item_allowance = _grow(self.category_item_allowance, size)
+            self.category_items = _grow(self.category_items, size)
+            self.category_project[code] = self._project_code(project_id)
+        return code
+
+    def _load(self, line_items):
+        """
+        Columnar bulk load, LOAD_CHUNK items at a time: each column is
+        gathered with map()/np.fromiter rather than a Python loop per item,
+        then one bincount per sum.
+        """
+        items = iter(line_items)
+        ids, codes, costs, allowances = [], [], [], []
+        while True:
+            chunk = list(islice(items, LOAD_CHUNK))
+            if not chunk:
+                break
+            ids.extend(map(_ID, chunk))
+            codes.append(self._chunk_codes(chunk))
+            costs.append(_chunk_dollars(chunk, _TOTAL_COST, line_cost))
+            allowances.append(_chunk_dollars(chunk, _ALLOWANCE, lambda item: item.get('allowance') or 0))
+        if not ids:
+            return
+
+        count = len(ids)
+        self.item_category = np.concatenate(codes)
+        self.item_cost = np.rint(np.concatenate(costs) * 100).astype(np.int64)
+        self.item_allowance = np.rint(np.concatenate(allowances) * 100).astype(np.int64)
+        self._rows = dict(zip(ids, range(count)))
+        self._size = count
+        if len(self._rows) < count:
+            # Duplicate ids: the last copy wins, as it would through upsert().
+            live = np.zeros(count, dtype=bool)
+            live[list(self._rows.values())] = True
+            self.item_category[~live] = -1
+
+        live = self.item_category >= 0
+        code_array = self.item_category[live]
+        size = len(self.category_ids)
+        self.category_cost[:size] += _sum_by(code_array, self.item_cost[live], size)
+        self.category_item_allowance[:size] += _sum_by(code_array, self.item_allowance[live], size)
+        self.category_items[:size] += np.bincount(code_array, minlength=size)
+
+    def _chunk_codes(self, chunk):
+        """Category codes of a chunk of line items, registering new categories in order of appearance."""
+        try:
+            category_ids = list(map(_CATEGORY_ID, chunk))
+        except KeyError:
+            category_ids = [item.get('categoryId') for item in chunk]
+        try:
+            return np.fromiter(map(self._category_codes.__getitem__, category_ids), np.int32, len(chunk))
+        except KeyError:
+            for category_id, item in zip(category_ids, chunk):
+                if category_id not in self._category_codes:
+                    self._category_code(category_id, item.get('projectId'))
+            return np.fromiter(map(self._category_codes.__getitem__, category_ids), np.int32, len(chunk))
+
+    def set_category(self, category):
+        """Register a category or change its allowance."""
+        code = self._category_code(category['id'], category.get('projectId'))
+        allowance = category.get('allowance')
+        self.category_has_allowance[code] = allowance is not None
+        self.category_allowance[code] = to_cents(allowance)
+        if category.get('name') is not None:
+            self.category_names[code] = category['name']
+
+    def _apply(self, row, sign):
+        code = self.item_category[row]
+        self.category_cost[code] += sign * self.item_cost[row]
+        self.category_item_allowance[code] += sign * self.item_allowance[row]
+        self.category_items[code] += sign
+
+    def upsert(self, item):
+        """Add or replace one line item; O(1) apart from occasional array growth."""
+        row = self._rows.get(item['id'])
+        if row is None:
+            row = self._rows[item['id']] = self._size
+            self._size += 1
+            self.item_category = _grow(self.item_category, self._size)
+            self.item_cost = _grow(self.item_cost, self._size)
+            self.item_allowance = _grow(self.item_allowance, self._size)
+        else:
+            self._apply(row, -1)
+        self.item_category[row] = self._category_code(item.get('categoryId'), item.get('projectId'))
+        self.item_cost[row] = to_cents(line_cost(item))
+        self.item_allowance[row] = to_cents(item.get('allowance'))
+        self._apply(row, 1)
+
+    def remove(self, item_id):
+        """Drop one line item; returns False if it was not in the rollup."""
+        row = self._rows.pop(item_id, None)
+        if row is None:
+            return False
+        self._apply(row, -1)
+        self.item_category[row] = -1
+        return True
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _category_arrays(self):
+        size = len(self.category_ids)
+        cost = self.category_cost[:size]
+        allowance = np.where(self.category_has_allowance[:size],
+                             self.category_allowance[:size],
+                             self.category_item_allowance[:size])
+        return size, cost, allowance, allowance - cost
+
+    def category_totals(self, project_id=None):
+        """
+        Per-category dicts: categoryId, projectId, name, items, actualCost,
+        allowance, itemAllowance and variance (Decimal dollars).
+        """
+        size, cost, allowance, variance = self._category_arrays()
+        codes = range(size)
+        if project_id is not None:
+            project_code = self._project_codes.get(project_id)
+            if project_code is None:
+                return []
+            codes = np.flatnonzero(self.category_project[:size] == project_code)
+        return [{
+            'categoryId': self.category_ids[code],
+            'projectId': self.project_ids[self.category_project[code]],
+            'name': self.category_names[code],
+            'items': int(self.category_items[code]),
+            'actualCost': from_cents(cost[code]),
+            'allowance': from_cents(allowance[code]),
+            'itemAllowance': from_cents(self.category_item_allowance[code]),
+            'variance': from_cents(variance[code]),
+        } for code in codes]
+
+    def project_arrays(self):
+        """(items, cost, allowance, variance, categories over budget) arrays indexed by project code."""
+        size, cost, allowance, variance = self._category_arrays()
+        projects = len(self.project_ids)
+        owner = self.category_project[:size]
+        items = _sum_by(owner, self.category_items[:size], projects)
+        project_cost = _sum_by(owner, cost, projects)
+        project_allowance = _sum_by(owner, allowance, projects)
+        over = np.bincount(owner[variance < 0], minlength=projects)
+        return items, project_cost, project_allowance, project_allowance - project_cost, over
+
+    def project_totals(self):
+        """
+        Per-project dicts: projectId, items, actualCost, allowance, variance
+        and categoriesOverBudget, sorted most over budget first.
+        """
+        items, cost, allowance, variance, over = self.project_arrays()
+        order = np.argsort(variance, kind='stable')
+        return [{
+            'projectId': self.project_ids[code],
+            'items': int(items[code]),
+            'actualCost': from_cents(cost[code]),
+            'allowance': from_cents(allowance[code]),
+            'variance': from_cents(variance[code]),
+            'categoriesOverBudget': int(over[code]),
+        } for code in order]
+
+
+def _chunk_dollars(chunk, getter, fallback):
+    """
+    float64 amounts of one field across a chunk: map(float) over the
+    attribute, or `fallback(item)` per item when some are missing or None.
+    """
+    try:
+        return np.fromiter(map(float, map(getter, chunk)), np.float64, len(chunk))
+    except (KeyError, TypeError):
+        return np.fromiter((float(fallback(item)) for item in chunk), np.float64, len(chunk))
+
+
+def _sum_by(codes, values, size):
+    """Exact int64 group sums; bincount's float64 weights are exact below 2**53 cents."""
+    if not len(codes):
+        return np.zeros(size, dtype=np.int64)
+    return np.rint(np.bincount(codes, weights=values, minlength=size)).astype(np.int64)
+
+
+class DecimalRollup:
+    """
+    Read-only category and project totals from one pass of Decimal sums.
+
+    Same category_totals() / project_totals() output as CostRollup, for
+    reports that read the totals once. Line items are counted as given
+    (no de-duplication by id) and there are no edits.
+    """
+
+    def __init__(self, line_items=(), categories=()):
+        # categoryId -> [projectId, name, allowance or None, items, cost, item allowance]
+        self._categories = {}
+        for category in categories:
+            entry = self._entry(category['id'], category.get('projectId'))
+            entry[2] = category.get('allowance')
+            if category.get('name') is not None:
+                entry[1] = category['name']
+        self._count = 0
+        entries = self._categories
+        for item in line_items:
+            entry = entries.get(item.get('categoryId'))
+            if entry is None:
+                entry = self._entry(item.get('categoryId'), item.get('projectId'))
+            cost = item.get('totalCost')
+            entry[3] += 1
+            entry[4] += _decimal_line_cost(item) if cost is None else cost
+            entry[5] += item.get('allowance') or 0
+            self._count += 1
+
+    def _entry(self, category_id, project_id):
+        entry = self._categories.get(category_id)
+        if entry is None:
+            entry = self._categories[category_id] = [project_id, None, None, 0, _ZERO, _ZERO]
+        return entry
+
+    def __len__(self):
+        return self._count
+
+    def category_totals(self, project_id=None):
+        """Per-category dicts, as CostRollup.category_totals()."""
+        rows = []
+        for category_id, (owner, name, allowance, items, cost, item_allowance) in self._categories.items():
+            if project_id is not None and owner != project_id:
+                continue
+            cost, item_allowance = _money(cost), _money(item_allowance)
+            allowance = item_allowance if allowance is None else _money(allowance)
+            rows.append({
+                'categoryId': category_id,
+                'projectId': owner,
+                'name': name,
+                'items': items,
+                'actualCost': cost,
+                'allowance': allowance,
+                'itemAllowance': item_allowance,
+                'variance': allowance - cost,
+            })
+        return rows
+
+    def project_totals(self):
+        """Per-project dicts, as CostRollup.project_totals(), most over budget first."""
+        projects = {}
+        for row in self.category_totals():
+            project = projects.get(row['projectId'])
+            if project is None:
+                project = projects[row['projectId']] = {
+                    'projectId': row['projectId'], 'items': 0, 'actualCost': _ZERO, 'allowance': _ZERO,
+                    'variance': _ZERO, 'categoriesOverBudget': 0}
+            project['items'] += row['items']
+            project['actualCost'] += row['actualCost']
+            project['allowance'] += row['allowance']
+            project['variance'] += row['variance']
+            project['categoriesOverBudget'] += row['variance'] < 0
+        return sorted(projects.values(), key=lambda project: project['variance'])
+
+
+def _decimal_line_cost(item):
+    """line_cost() in Decimal arithmetic: quantity * unitCost when totalCost is missing."""
+    quantity, unit_cost = item.get('quantity'), item.get('unitCost')
+    if quantity is None or unit_cost is None:
+        return _ZERO
+    return Decimal(str(quantity)) * Decimal(str(unit_cost))
+
+
+def _money(value):
+    """A Decimal/number amount rounded to a 2-place Decimal, as from_cents() returns."""
+    if value is None or isinstance(value, bool):
+        return Decimal('0.00')
+    return Decimal(str(value)).quantize(_CENT)
+
+
+def load_project(tables, project_id, index_name='ProjectIdIndex', one_shot=False):
+    """
+    Rollup for one project, read through the Categories and LineItems
+    ProjectIdIndex; a DecimalRollup with `one_shot`, else a CostRollup.
+    """
+    categories = query_index(tables['Categories'], index_name, 'projectId', project_id, CATEGORY_FIELDS)
+    line_items = query_index(tables['LineItems'], index_name, 'projectId', project_id, LINE_ITEM_FIELDS)
+    return (DecimalRollup if one_shot else CostRollup)(line_items, categories)
+
+
+def load_portfolio(tables, statuses=ACTIVE_STATUSES, one_shot=False):
+    """
+    Rollup across every project whose status is in `statuses` (None for all).
+
+    Reads the three tables with projected parallel scans and drops rows of
+    other projects before they reach the rollup. `one_shot` returns a
+    DecimalRollup instead of a CostRollup.
+    """
+    project_ids = None
+    if statuses is not None:
+        project_ids = {project['id'] for project in parallel_scan(tables['Projects'], projection=['id', 'status'])
+                       if project.get('status', 'planning') in statuses}
+
+    def wanted(items):
+        if project_ids is None:
+            return items
+        return (item for item in items if item.get('projectId') in project_ids)
+
+    categories = wanted(parallel_scan(tables['Categories'], projection=CATEGORY_FIELDS))
+    line_items = wanted(parallel_scan(tables['LineItems'], projection=LINE_ITEM_FIELDS))
+    return (DecimalRollup if one_shot else CostRollup)(line_items, categories)
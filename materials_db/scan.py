@@ -0,0 +1,148 @@
+"""
+Parallel segmented scans for full-table reads.
+
+DynamoDB splits a table into `TotalSegments` disjoint segments that can be
+scanned independently. parallel_scan() runs one worker thread per segment
+and yields items as soon as any segment returns a page, so a cold
+full-table read takes roughly 1/N of the single-threaded time until the
+table's read capacity (or the network) becomes the bottleneck.
+
+Workers share the table's low-level client, which is thread-safe, rather
+than the resource object, which is not.
+
+Bulk jobs pass their materials_db.scheduler Job so every page first takes
+read capacity (estimated from the segment's previous page and settled
+against the ConsumedCapacity reported); scans without a job are not
+rate-limited.
+"""
+
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from materials_db.scheduler import READ, consumed_units
+
+DEFAULT_SEGMENTS = int(os.environ.get('SCAN_SEGMENTS', '4'))
+
+# Pages buffered per segment before workers block; bounds memory when the
+# consumer is slower than DynamoDB.
+_PAGES_PER_SEGMENT = 2
+
+_DONE = object()
+
+
+def projection_kwargs(attributes, existing_names=None):
+    """
+    Build ProjectionExpression/ExpressionAttributeNames for attribute names.
+
+    Every name is aliased (#p0, #p1, ...) so reserved words such as `name`
+    and `status` can be projected without special handling.
+    """
+    names = dict(existing_names or {})
+    placeholders = []
+    for i, attribute in enumerate(attributes):
+        placeholder = f'#p{i}'
+        names[placeholder] = attribute
+        placeholders.append(placeholder)
+    return {
+        'ProjectionExpression': ', '.join(placeholders),
+        'ExpressionAttributeNames': names,
+    }
+
+
+def _scan_kwargs(table, projection, consistent_read, scan_kwargs):
+    kwargs = dict(scan_kwargs, TableName=table.name, ConsistentRead=consistent_read)
+    if projection:
+        kwargs.update(projection_kwargs(projection, kwargs.get('ExpressionAttributeNames')))
+    return kwargs
+
+
+def _scan_segment(client, kwargs, segment, total_segments, pages, stop, job=None):
+    kwargs = dict(kwargs, Segment=segment, TotalSegments=total_segments)
+    if job is not None:
+        kwargs['ReturnConsumedCapacity'] = 'TOTAL'
+    estimate = 1.0
+    try:
+        while not stop.is_set():
+            if job is not None:
+                job.acquire(estimate, READ)
+            response = client.scan(**kwargs)
+            if job is not None:
+                consumed = consumed_units(response)
+                job.settle(estimate, consumed, READ)
+                job.succeeded(READ)
+                estimate = consumed or estimate
+            items = response.get('Items', [])
+            while not stop.is_set():
+                try:
+                    pages.put(items, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key:
+                break
+            kwargs['ExclusiveStartKey'] = last_key
+    except Exception:
+        # Stop the other segments; the error is re-raised to the consumer.
+        stop.set()
+        raise
+    finally:
+        pages.put(_DONE)
+
+
+def parallel_scan_pages(table, total_segments=DEFAULT_SEGMENTS, projection=None,
+                        consistent_read=False, job=None, **scan_kwargs):
+    """
+    Yield pages (lists of items) from every segment in arrival order.
+
+    `projection` is an optional list of attribute names to return.
+    `consistent_read` selects strongly consistent reads (twice the read
+    capacity). `job` schedules read capacity for each page. Extra keyword
+    arguments such as FilterExpression are passed to every Scan call.
+    """
+    total_segments = max(1, int(total_segments))
+    client = table.meta.client
+    kwargs = _scan_kwargs(table, projection, consistent_read, scan_kwargs)
+    pages = queue.Queue(maxsize=total_segments * _PAGES_PER_SEGMENT)
+    stop = threading.Event()
+
+    with ThreadPoolExecutor(max_workers=total_segments, thread_name_prefix='scan') as pool:
+        futures = [
+            pool.submit(_scan_segment, client, kwargs, segment, total_segments, pages, stop, job)
+            for segment in range(total_segments)
+        ]
+        try:
+            remaining = total_segments
+            while remaining:
+                page = pages.get()
+                if page is _DONE:
+                    remaining -= 1
+                    continue
+                yield page
+        finally:
+            stop.set()
+            # Drain so blocked workers can post their _DONE and exit.
+            while any(not f.done() for f in futures):
+                try:
+                    pages.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+        for future in futures:
+            future.result()
+
+
+def parallel_scan(table, total_segments=DEFAULT_SEGMENTS, projection=None,
+                  consistent_read=False, job=None, **scan_kwargs):
+    """Yield every item in the table, merged across segments as they arrive."""
+    for page in parallel_scan_pages(table, total_segments, projection,
+                                    consistent_read, job, **scan_kwargs):
+        yield from page
+
+
+def scan_all(table, total_segments=DEFAULT_SEGMENTS, projection=None,
+             consistent_read=False, job=None, **scan_kwargs):
+    """Return every item in the table as a list."""
+    return list(parallel_scan(table, total_segments, projection,
+                              consistent_read, job, **scan_kwargs))
@@ -0,0 +1,513 @@
+"""
+Capacity-aware rate scheduling shared by the bulk jobs.
+
+Seed scripts, URL feeds and imports used to send requests as fast as their
+thread pools allowed and only noticed throttling after the fact, which
+during business hours meant the production API got throttled with them.
+Every bulk write now asks a process-wide Scheduler for capacity first:
+
+- Token buckets per table and operation kind (read / write), refilled at
+  the table's capacity: provisioned RCU/WCU from DescribeTable (for writes,
+  the smallest of the table and its GSIs, since every write lands in each
+  index), or BULK_ON_DEMAND_RCU / BULK_ON_DEMAND_WCU for on-demand tables.
+  Requests take an estimate up front and settle the difference once the
+  response reports the ConsumedCapacity actually used.
+- AIMD: a throttle (ProvisionedThroughputExceededException and friends,
+  including the ones botocore retries internally) halves the table's rate
+  at most once per second; every second without one adds 5% of capacity
+  back, up to the provisioned capacity (on-demand tables may grow up to
+  ON_DEMAND_CEILING).
+- Priorities: 'live' may use the whole rate, 'interactive' BULK_INTERACTIVE_SHARE
+  of it and 'background' BULK_BACKGROUND_SHARE, dropping to
+  BULK_BUSINESS_SHARE inside BUSINESS_HOURS (local time, weekdays), so
+  backfills leave the API its capacity. Within a process a waiting request
+  of higher priority is always served before lower ones on the same table.
+- Process pools: buckets live in each process, so a pool's workers call
+  set_process_fraction(1 / workers) from their initializer and each gets
+  that fraction of every table's capacity; together the pool stays
+  within what one process would be allowed.
+- Jobs: scheduler.job() returns a Job that counts finished work and reports
+  rate, ETA, time spent waiting for capacity and throttles; progress()
+  lists every running job and start_reporting() prints them periodically.
+
+BULK_RATE_LIMIT=off turns the limits off (jobs still report progress).
+"""
+
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+PRIORITIES = ('live', 'interactive', 'background')
+READ, WRITE = 'read', 'write'
+
+ENABLED = os.environ.get('BULK_RATE_LIMIT', 'on').lower() not in ('off', '0', 'false', 'no')
+INTERACTIVE_SHARE = float(os.environ.get('BULK_INTERACTIVE_SHARE', '0.75'))
+BACKGROUND_SHARE = float(os.environ.get('BULK_BACKGROUND_SHARE', '0.5'))
+BUSINESS_SHARE = float(os.environ.get('BULK_BUSINESS_SHARE', '0.2'))
+BUSINESS_HOURS = os.environ.get('BUSINESS_HOURS', '08:00-18:00')
+ON_DEMAND_CAPACITY = {
+    READ: float(os.environ.get('BULK_ON_DEMAND_RCU', '3000')),
+    WRITE: float(os.environ.get('BULK_ON_DEMAND_WCU', '1000')),
+}
+ON_DEMAND_CEILING = {READ: 12000.0, WRITE: 4000.0}  # default on-demand table throughput limits
+
+DECREASE_FACTOR = 0.5
+DECREASE_COOLDOWN = 1.0
+INCREASE_INTERVAL = 1.0
+INCREASE_STEP = 0.05  # of capacity, per INCREASE_INTERVAL without throttles
+MIN_RATE = 1.0
+# Smoothing for a job's reported rate (per second of samples).
+RATE_SMOOTHING = 0.3
+
+READ_OPERATIONS = {'GetItem', 'BatchGetItem', 'Query', 'Scan', 'TransactGetItems'}
+_CONTEXT_KEY = 'materials_db_scheduler_tables'
+
+
+def _parse_hours(text):
+    start, end = text.split('-')
+    return tuple(int(part.split(':')[0]) * 60 + int((part.split(':') + ['0'])[1]) for part in (start, end))
+
+
+def in_business_hours(now=None, hours=BUSINESS_HOURS):
+    """True on weekdays between the BUSINESS_HOURS bounds (local time)."""
+    if not hours:
+        return False
+    now = now or datetime.now()
+    start, end = _parse_hours(hours)
+    minute = now.hour * 60 + now.minute
+    return now.weekday() < 5 and start <= minute < end
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return '?'
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f'{seconds // 3600}h{seconds % 3600 // 60:02d}m'
+    if seconds >= 60:
+        return f'{seconds // 60}m{seconds % 60:02d}s'
+    return f'{seconds}s'
+
+
+class TokenBucket:
+    """
+    Tokens refilled at `rate` per second up to `burst`. take() may leave the
+    bucket in debt (negative), which later requests wait out.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+
+    @property
+    def capacity(self):
+        return self.burst if self.burst is not None else max(self.rate, 1.0)
+
+    def refill(self, now=None):
+        now = self.clock() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, units, now=None):
+        """Seconds until `units` (capped at the burst) are available."""
+        self.refill(now)
+        needed = min(units, self.capacity) - self.tokens
+        return max(0.0, needed / self.rate) if self.rate > 0 else float('inf')
+
+    def take(self, units):
+        self.tokens -= units
+
+
+class _Limit:
+    """Rate state of one (table, kind): capacity, AIMD rate and a bucket per priority."""
+
+    def __init__(self, capacity, ceiling, shares, clock):
+        self.capacity = capacity
+        self.ceiling = ceiling
+        self.rate = capacity
+        self.shares = shares
+        self.shared = TokenBucket(capacity, clock=clock)
+        self.buckets = {priority: TokenBucket(capacity * shares[priority], clock=clock) for priority in PRIORITIES}
+        self.waiting = dict.fromkeys(PRIORITIES, 0)
+        self.last_decrease = self.last_change = clock()
+        self.throttles = 0
+
+    def set_rate(self, rate, now):
+        for bucket in (self.shared, *self.buckets.values()):
+            bucket.refill(now)
+        self.rate = rate
+        self.shared.rate = rate
+        for priority, bucket in self.buckets.items():
+            bucket.rate = max(MIN_RATE * self.shares[priority], rate * self.shares[priority])
+        self.last_change = now
+
+    def blocked_by(self, priority):
+        """True while a request of higher priority is waiting."""
+        return any(self.waiting[other] for other in PRIORITIES[:PRIORITIES.index(priority)])
+
+
+class Scheduler:
+    """
+    Hands out read/write capacity per table to the bulk jobs of a process;
+    see the module docstring. Thread-safe.
+    """
+
+    def __init__(self, enabled=ENABLED, shares=None, business_hours=BUSINESS_HOURS,
+                 capacity=None, clock=time.monotonic, fraction=1.0):
+        self.enabled = enabled
+        self.business_hours = business_hours
+        self._shares = shares
+        self._capacity = capacity or {}  # {(table name, kind): units/s} overrides
+        self.fraction = fraction  # of each table's capacity available to this process
+        self.clock = clock
+        self._limits = {}
+        self._jobs = []
+        self._condition = threading.Condition()
+        self._attached = set()
+        self._reporter = None
+
+    def shares(self, now=None):
+        """{priority: fraction of a table's rate} at `now`."""
+        if self._shares is not None:
+            return dict(self._shares)
+        background = BUSINESS_SHARE if in_business_hours(now, self.business_hours) else BACKGROUND_SHARE
+        return {'live': 1.0, 'interactive': INTERACTIVE_SHARE, 'background': background}
+
+    # Capacity --------------------------------------------------------
+
+    def _describe(self, table, kind):
+        """(capacity, ceiling) of a table from DescribeTable; on-demand defaults otherwise."""
+        override = self._capacity.get((table.name, kind))
+        if override:
+            return override, override
+        try:
+            description = table.meta.client.describe_table(TableName=table.name)['Table']
+        except Exception:
+            return ON_DEMAND_CAPACITY[kind], ON_DEMAND_CEILING[kind]
+        field = 'ReadCapacityUnits' if kind == READ else 'WriteCapacityUnits'
+        throughputs = [description.get('ProvisionedThroughput') or {}]
+        if kind == WRITE:
+            throughputs += [index.get('ProvisionedThroughput') or {}
+                            for index in description.get('GlobalSecondaryIndexes') or ()]
+        provisioned = [throughput.get(field) for throughput in throughputs if throughput.get(field)]
+        billing = (description.get('BillingModeSummary') or {}).get('BillingMode')
+        if billing == 'PAY_PER_REQUEST' or not provisioned:
+            return ON_DEMAND_CAPACITY[kind], ON_DEMAND_CEILING[kind]
+        capacity = float(min(provisioned))
+        return capacity, capacity
+
+    def set_fraction(self, fraction):
+        """Use `fraction` of each table's capacity from now on (e.g. 1 / pool workers)."""
+        if not 0 < fraction <= 1:
+            raise ValueError('fraction must be in (0, 1]')
+        with self._condition:
+            self.fraction = fraction
+            # Rebuilt at the new capacity on next use (limits inherited over fork included).
+            self._limits.clear()
+
+    def _limit(self, table, kind):
+        key = (table.name, kind)
+        limit = self._limits.get(key)
+        if limit is None:
+            capacity, ceiling = (value * self.fraction for value in self._describe(table, kind))
+            with self._condition:
+                limit = self._limits.get(key)
+                if limit is None:
+                    limit = self._limits[key] = _Limit(capacity, ceiling, self.shares(), self.clock)
+        return limit
+
+    def attach(self, client):
+        """Count throttles that botocore retries inside `client` too (once per client)."""
+        if id(client) in self._attached or not hasattr(client, 'meta'):
+            return client
+        from materials_db.bulk import THROTTLING_ERRORS
+
+        def before_parameter_build(params, model, context, **kwargs):
+            context[_CONTEXT_KEY] = [params['TableName']] if 'TableName' in params \
+                else list(params.get('RequestItems') or ())
+
+        def needs_retry(response, request_dict, operation, **kwargs):
+            if response is None or response[1].get('Error', {}).get('Code') not in THROTTLING_ERRORS:
+                return None
+            tables = (request_dict or {}).get('context', {}).get(_CONTEXT_KEY) or ()
+            kind = READ if operation.name in READ_OPERATIONS else WRITE
+            with self._condition:
+                for table_name in tables:
+                    limit = self._limits.get((table_name, kind))
+                    if limit is not None:
+                        self._decrease(limit)
+            return None
+
+        unique_id = f'materials-db-scheduler-{id(self)}'
+        client.meta.events.register('before-parameter-build.dynamodb', before_parameter_build,
+                                    unique_id=f'{unique_id}-params')
+        client.meta.events.register('needs-retry.dynamodb', needs_retry, unique_id=f'{unique_id}-retry')
+        self._attached.add(id(client))
+        return client
+
+    # Acquire / feedback ----------------------------------------------
+
+    def acquire(self, table, units, kind=WRITE, priority='background'):
+        """Block until `units` of `kind` capacity on `table` are granted; returns seconds waited."""
+        if not self.enabled or units <= 0:
+            return 0.0
+        limit = self._limit(table, kind)
+        self.attach(table.meta.client)
+        started = self.clock()
+        with self._condition:
+            limit.waiting[priority] += 1
+            try:
+                while True:
+                    now = self.clock()
+                    shares = self.shares()
+                    if shares != limit.shares:
+                        limit.shares = shares
+                        limit.set_rate(limit.rate, now)
+                    bucket = limit.buckets[priority]
+                    delay = max(limit.shared.delay(units, now), bucket.delay(units, now))
+                    if delay <= 0 and not limit.blocked_by(priority):
+                        limit.shared.take(units)
+                        bucket.take(units)
+                        break
+                    self._condition.wait(min(delay, 1.0) if delay > 0 else 0.05)
+            finally:
+                limit.waiting[priority] -= 1
+                self._condition.notify_all()
+        return self.clock() - started
+
+    def settle(self, table, estimated, consumed, kind=WRITE, priority='background'):
+        """Charge (or refund) the difference between an estimate and the reported ConsumedCapacity."""
+        if not self.enabled or consumed is None:
+            return
+        limit = self._limits.get((table.name, kind))
+        if limit is None:
+            return
+        difference = consumed - estimated
+        with self._condition:
+            limit.shared.take(difference)
+            limit.buckets[priority].take(difference)
+            if difference < 0:
+                self._condition.notify_all()
+
+    def throttled(self, table, kind=WRITE):
+        """Multiplicative decrease after DynamoDB throttled a request on `table`."""
+        limit = self._limits.get((table.name, kind))
+        if limit is None:
+            return
+        with self._condition:
+            self._decrease(limit)
+
+    def _decrease(self, limit):
+        now = self.clock()
+        limit.throttles += 1
+        if now - limit.last_decrease < DECREASE_COOLDOWN:
+            return
+        limit.last_decrease = now
+        limit.set_rate(max(MIN_RATE, limit.rate * DECREASE_FACTOR), now)
+        # Stop any saved-up burst from going straight back out.
+        for bucket in (limit.shared, *limit.buckets.values()):
+            bucket.tokens = min(bucket.tokens, 0.0)
+
+    def succeeded(self, table, kind=WRITE):
+        """Additive increase once per INCREASE_INTERVAL without throttles."""
+        limit = self._limits.get((table.name, kind))
+        if limit is None or limit.rate >= limit.ceiling:
+            return
+        now = self.clock()
+        if now - limit.last_change < INCREASE_INTERVAL or now - limit.last_decrease < INCREASE_INTERVAL:
+            return
+        with self._condition:
+            limit.set_rate(min(limit.ceiling, limit.rate + limit.capacity * INCREASE_STEP), now)
+            self._condition.notify_all()
+
+    def rates(self):
+        """{(table name, kind): {'capacity', 'rate', 'throttles'}}."""
+        with self._condition:
+            return {key: {'capacity': limit.capacity, 'rate': round(limit.rate, 1), 'throttles': limit.throttles}
+                    for key, limit in self._limits.items()}
+
+    # Jobs and progress -------------------------------------------------
+
+    def job(self, name, table=None, total=None, priority='background'):
+        """Register a running Job; call job.finish() (or use it as a context manager) when done."""
+        if priority not in PRIORITIES:
+            raise ValueError(f'priority must be one of {", ".join(PRIORITIES)}')
+        job = Job(self, name, table, total, priority)
+        with self._condition:
+            self._jobs.append(job)
+        return job
+
+    def _finished(self, job):
+        with self._condition:
+            if job in self._jobs:
+                self._jobs.remove(job)
+
+    def progress(self):
+        """Snapshot of every running job (see Job.snapshot())."""
+        with self._condition:
+            jobs = list(self._jobs)
+        return [job.snapshot() for job in jobs]
+
+    def report(self, stream=None):
+        """Print one progress line per running job."""
+        stream = stream or sys.stderr
+        for job in list(self._jobs):
+            print(f'  ⏳ {job.line()}', file=stream, flush=True)
+
+    def start_reporting(self, interval=10.0, stream=None):
+        """Print progress every `interval` seconds from a daemon thread until stop_reporting()."""
+        if self._reporter is not None:
+            return
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                self.report(stream)
+
+        thread = threading.Thread(target=run, name='scheduler-progress', daemon=True)
+        self._reporter = (thread, stop)
+        thread.start()
+
+    def stop_reporting(self):
+        if self._reporter is not None:
+            thread, stop = self._reporter
+            stop.set()
+            thread.join()
+            self._reporter = None
+
+
+class Job:
+    """
+    One bulk job's view of the scheduler: capacity requests tagged with its
+    table and priority, plus progress counters for reporting and ETA.
+    """
+
+    def __init__(self, scheduler, name, table, total, priority):
+        self.scheduler = scheduler
+        self.name = name
+        self.table = table
+        self.total = total
+        self.priority = priority
+        self.done = 0
+        self.waited = 0.0
+        self.throttles = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._rate = None
+        self._sample = (self.started, 0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.finish()
+
+    def acquire(self, units, kind=WRITE, table=None):
+        waited = self.scheduler.acquire(table or self.table, units, kind, self.priority)
+        if waited:
+            with self._lock:
+                self.waited += waited
+        return waited
+
+    def settle(self, estimated, consumed, kind=WRITE, table=None):
+        self.scheduler.settle(table or self.table, estimated, consumed, kind, self.priority)
+
+    def throttled(self, kind=WRITE, table=None):
+        with self._lock:
+            self.throttles += 1
+        self.scheduler.throttled(table or self.table, kind)
+
+    def succeeded(self, kind=WRITE, table=None):
+        self.scheduler.succeeded(table or self.table, kind)
+
+    def advance(self, count=1):
+        """Record `count` more units of finished work (items, rows)."""
+        now = time.monotonic()
+        with self._lock:
+            self.done += count
+            since, done = self._sample
+            if now - since >= 1.0:
+                rate = (self.done - done) / (now - since)
+                self._rate = rate if self._rate is None else \
+                    RATE_SMOOTHING * rate + (1 - RATE_SMOOTHING) * self._rate
+                self._sample = (now, self.done)
+
+    def finish(self):
+        self.scheduler._finished(self)
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self):
+        """Recent items per second (smoothed); the overall average until a second has passed."""
+        if self._rate is not None:
+            return self._rate
+        return self.done / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def eta(self):
+        """Seconds left at the current rate, or None without a total."""
+        if self.total is None:
+            return None
+        remaining = max(0, self.total - self.done)
+        if not remaining:
+            return 0.0
+        rate = self.rate
+        return remaining / rate if rate else None
+
+    def snapshot(self):
+        return {
+            'name': self.name,
+            'table': getattr(self.table, 'name', None),
+            'priority': self.priority,
+            'done': self.done,
+            'total': self.total,
+            'rate': round(self.rate, 1),
+            'eta': None if self.eta is None else round(self.eta, 1),
+            'elapsed': round(self.elapsed, 1),
+            'waited': round(self.waited, 1),
+            'throttles': self.throttles,
+        }
+
+    def line(self):
+        done = f'{self.done:,}' + (f'/{self.total:,} ({self.done / self.total:.0%})' if self.total else '')
+        eta = f'  ETA {format_duration(self.eta)}' if self.total is not None else ''
+        return (f'{self.name} [{self.priority}]: {done}  {self.rate:,.0f}/s{eta}  '
+                f'waited {format_duration(self.waited)}, {self.throttles} throttles')
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_scheduler():
+    """The process-wide Scheduler, configured from the environment."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = Scheduler()
+    return _default
+
+
+def set_process_fraction(fraction):
+    """Give this process `fraction` of every table's capacity (pool worker initializers)."""
+    get_scheduler().set_fraction(fraction)
+
+
+def consumed_units(response, table_name=None):
+    """CapacityUnits from a response's ConsumedCapacity (for `table_name` when it is a list)."""
+    consumed = response.get('ConsumedCapacity')
+    if consumed is None:
+        return None
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    return sum(entry.get('CapacityUnits', 0.0) for entry in consumed
+               if table_name is None or entry.get('TableName') == table_name)
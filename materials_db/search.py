@@ -0,0 +1,530 @@
+"""
+Local full-text search over the product catalog.
+
+Products (name, modelNumber, description, category and the manufacturer's
+name) are tokenized into an inverted index that lives in one file and is
+memory-mapped on open, so a Lambda cold start pays for reading a JSON
+header, not for loading postings; pages are faulted in as queries touch
+them. The NumPy import (~90 ms) is most of the cost of opening an index.
+
+Tokenization folds accents and case and splits on anything that is not a
+letter or digit. Model numbers are also indexed by their letter/digit runs
+and canonical form, so 'S 2165BZ-CG' is found by 's2165', '2165' or
+'s 2165bz', and 'K-26640-2MB' by 'k26640' or '26640 2mb'.
+
+Queries AND their words together; the last word is a prefix unless the
+query ends in a space, which is what a type-ahead box wants. A prefix
+expands to the typed word itself plus its most frequent completions, up to
+MAX_EXPANSIONS terms and MAX_PREFIX_POSTINGS postings, so one- or
+two-letter prefixes stay fast. Ranking is BM25 with field weights (name and
+model number count three times, manufacturer twice); a prefix word scores
+as its best expansion. Category and manufacturer filters are applied to the
+smallest group of postings before it is intersected with the rest of the
+query.
+
+BM25 is computed at build time and stored per posting (an impact index),
+so a query only gathers, adds and compares scores; the statistics it
+depends on (document count and average length) are fixed per file.
+
+File layout: 8-byte magic, uint32 header length, JSON header, then
+8-byte-aligned little-endian arrays:
+
+- term_offsets / term_blob: sorted terms, UTF-8, concatenated;
+- postings_start: per term, first position in post_docs / post_tf;
+- post_docs (uint32) / post_tf (uint16) / post_score (float32): postings
+  sorted by doc number, with field-weighted term frequencies (kept for
+  incremental builds) and their BM25 scores;
+- doc_len, doc_category, doc_manufacturer, doc_fingerprint: per product;
+- text_offsets / text_blob: id, name and modelNumber of each product.
+
+build_index() rewrites the file (atomically) but only tokenizes products
+whose indexed fields changed since the previous build; postings of the
+others are carried over with vectorized remapping.
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+import time
+import unicodedata
+import zlib
+from bisect import bisect_left
+from collections import Counter
+
+import numpy as np
+
+from materials_db.model_numbers import canonical_model
+from materials_db.scan import parallel_scan
+
+MAGIC = b'MSSRCH01'
+FORMAT_VERSION = 1
+
+K1 = 1.2
+B = 0.75
+FIELD_WEIGHTS = {'name': 3, 'modelNumber': 3, 'manufacturer': 2, 'category': 1, 'description': 1}
+
+DEFAULT_PATH = os.environ.get('SEARCH_INDEX_PATH', 'products.idx')
+
+MAX_EXPANSIONS = 256
+MAX_PREFIX_POSTINGS = 100000
+DEFAULT_LIMIT = 10
+
+PRODUCT_FIELDS = ['id', 'name', 'modelNumber', 'description', 'category', 'manufacturerId']
+
+_WORD = re.compile(r'[0-9a-z]+')
+_RUNS = re.compile(r'[a-z]+|[0-9]+')
+_HEADER = struct.Struct('<8sI')
+_ALIGN = 8
+
+
+def _fold(text):
+    if not text:
+        return ''
+    text = str(text)
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return text.lower()
+
+
+def tokenize(text):
+    """'Wall-Mount Towel Ring' -> ['wall', 'mount', 'towel', 'ring']."""
+    return _WORD.findall(_fold(text))
+
+
+def model_tokens(model_number):
+    """Words, letter/digit runs and the canonical form of a model number."""
+    words = tokenize(model_number)
+    tokens = set(words)
+    for word in words:
+        tokens.update(_RUNS.findall(word))
+    canonical = canonical_model(model_number).lower()
+    if canonical:
+        tokens.add(canonical)
+    return tokens
+
+
+def document_terms(product, manufacturer_name=None):
+    """Counter of term -> field-weighted frequency for one product."""
+    counts = Counter()
+    for field in ('name', 'description', 'category'):
+        weight = FIELD_WEIGHTS[field]
+        for token in tokenize(product.get(field)):
+            counts[token] += weight
+    for token in model_tokens(product.get('modelNumber')):
+        counts[token] += FIELD_WEIGHTS['modelNumber']
+    for token in tokenize(manufacturer_name):
+        counts[token] += FIELD_WEIGHTS['manufacturer']
+    return counts
+
+
+def fingerprint(product, manufacturer_name=None):
+    """crc32 of the indexed fields; equal fingerprints mean nothing to re-tokenize."""
+    values = [product.get(field) for field in PRODUCT_FIELDS] + [manufacturer_name]
+    return zlib.crc32(json.dumps(values, default=str).encode())
+
+
+class _Terms:
+    """Sequence view of the sorted term table, so bisect works on the mapped bytes."""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, position):
+        return self.blob[self.offsets[position]:self.offsets[position + 1]].tobytes()
+
+
+class SearchIndex:
+    """A memory-mapped product search index; see the module docstring."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_length = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f'{path} is not a product search index')
+        header = json.loads(self._mmap[_HEADER.size:_HEADER.size + header_length])
+        if header['version'] != FORMAT_VERSION:
+            self._mmap.close()
+            raise ValueError(f'{path} has index format {header["version"]}, expected {FORMAT_VERSION}')
+        self.header = header
+        base = _aligned(_HEADER.size + header_length)
+        for name, (offset, dtype, count) in header['sections'].items():
+            setattr(self, name, np.frombuffer(self._mmap, dtype=dtype, count=count, offset=base + offset))
+        self.terms = _Terms(self.term_offsets, self.term_blob)
+        self.doc_count = header['docs']
+        self.categories = header['categories']
+        self.manufacturers = header['manufacturers']
+        self._category_codes = {name.lower(): code for code, name in enumerate(self.categories) if code}
+        self._manufacturer_codes = {mid: code for code, mid in enumerate(self.manufacturers) if code}
+
+    @classmethod
+    def open(cls, path):
+        return cls(path)
+
+    def __len__(self):
+        return self.doc_count
+
+    def close(self):
+        """Drop the array views and unmap the file."""
+        for name in self.header['sections']:
+            setattr(self, name, None)
+        self.terms = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # a caller still holds an array; the map closes when it is freed
+
+    def document(self, doc):
+        """Stored fields of one product: {'id', 'name', 'modelNumber', ...}."""
+        base = 3 * doc
+        offsets = self.text_offsets[base:base + 4].tolist()
+        blob = self.text_blob
+        product_id, name, model_number = (blob[offsets[i]:offsets[i + 1]].tobytes().decode()
+                                          for i in range(3))
+        return {
+            'id': product_id,
+            'name': name,
+            'modelNumber': model_number,
+            'category': self.categories[self.doc_category[doc]] or None,
+            'manufacturerId': self.manufacturers[self.doc_manufacturer[doc]] or None,
+        }
+
+    def product_ids(self):
+        """Product id of every doc number, in order."""
+        offsets = self.text_offsets.tolist()
+        blob = self.text_blob.tobytes()
+        return [blob[offsets[3 * doc]:offsets[3 * doc + 1]].decode() for doc in range(self.doc_count)]
+
+    def search(self, query, limit=DEFAULT_LIMIT, category=None, manufacturer_id=None):
+        """
+        Top `limit` products matching every word of `query`, best first.
+
+        Each result is the product's stored fields plus 'score'. An unknown
+        category or manufacturer filter matches nothing.
+        """
+        words = tokenize(query)
+        if not words or not self.doc_count:
+            return []
+        prefix_last = not str(query)[-1:].isspace()
+        groups = []
+        for position, word in enumerate(words):
+            group = self._prefix_group(word) if prefix_last and position == len(words) - 1 \
+                else self._term_group(word)
+            if group is None:
+                return []
+            groups.append(group)
+        groups.sort(key=lambda group: group.size)
+
+        docs, scores = groups[0].resolve()
+        keep = None
+        if category is not None:
+            code = self._category_codes.get(str(category).lower())
+            keep = self.doc_category[docs] == code if code else np.zeros(len(docs), dtype=bool)
+        if manufacturer_id is not None:
+            code = self._manufacturer_codes.get(manufacturer_id)
+            matches = self.doc_manufacturer[docs] == code if code else np.zeros(len(docs), dtype=bool)
+            keep = matches if keep is None else keep & matches
+        if keep is not None:
+            docs, scores = docs[keep], scores[keep]
+
+        for group in groups[1:]:
+            if not len(docs):
+                break
+            found, group_scores = group.probe(docs)
+            docs, scores = docs[found], scores[found] + group_scores
+
+        if not len(docs):
+            return []
+        if len(docs) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            docs, scores = docs[top], scores[top]
+        order = np.lexsort((docs, -scores))
+        results = []
+        for doc, value in zip(docs[order].tolist(), scores[order].tolist()):
+            result = self.document(doc)
+            result['score'] = round(value, 4)
+            results.append(result)
+        return results
+
+    def _term_group(self, word):
+        """_TermGroup for one exact term, or None."""
+        key = word.encode()
+        term = bisect_left(self.terms, key)
+        if term >= len(self.terms) or self.terms[term] != key:
+            return None
+        return _TermGroup(self, term)
+
+    def _prefix_group(self, word):
+        """_TermGroup or _PrefixGroup for the terms starting with `word`, or None."""
+        key = word.encode()
+        low = bisect_left(self.terms, key)
+        high = bisect_left(self.terms, key + b'\xff', low)
+        if low == high:
+            return None
+        if high - low == 1:
+            return _TermGroup(self, low)
+        starts = self.postings_start[low:high + 1].astype(np.int64)
+        if starts[-1] - starts[0] <= MAX_PREFIX_POSTINGS and high - low <= MAX_EXPANSIONS:
+            # Every completion fits: the postings are one contiguous run.
+            return _PrefixGroup(self, np.arange(starts[0], starts[-1]))
+        sizes = np.diff(starts)
+        candidates = np.argsort(-sizes, kind='stable').tolist()
+        if self.terms[low] == key:
+            candidates.remove(0)
+            candidates.insert(0, 0)
+        # Greedily take the exact term and the most frequent completions
+        # that still fit, skipping any single term too big for the budget.
+        chosen, budget = [], MAX_PREFIX_POSTINGS
+        for offset in candidates:
+            if sizes[offset] <= budget or not chosen:
+                chosen.append(offset)
+                budget -= sizes[offset]
+                if len(chosen) == MAX_EXPANSIONS or budget <= 0:
+                    break
+        if len(chosen) == 1:
+            return _TermGroup(self, low + chosen[0])
+        chosen = np.array(chosen)
+        counts = sizes[chosen]
+        ends = np.cumsum(counts)
+        return _PrefixGroup(self, np.arange(ends[-1]) + np.repeat(starts[chosen] - (ends - counts), counts))
+
+
+class _TermGroup:
+    """Postings of one term: resolve() lists them, probe() looks docs up by binary search."""
+
+    def __init__(self, index, term):
+        start, end = int(index.postings_start[term]), int(index.postings_start[term + 1])
+        self.docs = index.post_docs[start:end]
+        self.scores = index.post_score[start:end]
+        self.size = end - start
+
+    def resolve(self):
+        """(sorted docs, scores)."""
+        return self.docs, self.scores
+
+    def probe(self, docs):
+        """(mask of the `docs` that contain the term, their scores)."""
+        positions = np.searchsorted(self.docs, docs)
+        found = positions < self.size
+        found[found] = self.docs[positions[found]] == docs[found]
+        return found, self.scores[positions[found]]
+
+
+class _PrefixGroup:
+    """
+    Union of the postings at `positions`, each doc scoring as its best term.
+
+    Scores are folded into a dense per-doc array with a maximum, which
+    dedupes without sorting and makes probing candidate docs a lookup.
+    BM25 scores are positive, so zero means "not matched".
+    """
+
+    def __init__(self, index, positions):
+        self.size = len(positions)
+        self.best = np.zeros(index.doc_count, dtype=np.float32)
+        np.maximum.at(self.best, index.post_docs[positions], index.post_score[positions])
+
+    def resolve(self):
+        docs = (self.best > 0).nonzero()[0].astype(np.uint32)
+        return docs, self.best[docs]
+
+    def probe(self, docs):
+        scores = self.best[docs]
+        found = scores > 0
+        return found, scores[found]
+
+
+def _aligned(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _write(path, arrays, meta):
+    """Write `arrays` ({name: ndarray}) and `meta` atomically to `path`."""
+    sections, offset = {}, 0
+    for name, array in arrays.items():
+        sections[name] = [offset, array.dtype.str, len(array)]
+        offset = _aligned(offset + array.nbytes)
+    header = json.dumps(dict(meta, version=FORMAT_VERSION, sections=sections)).encode()
+    temporary = f'{path}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, len(header)))
+        f.write(header)
+        f.write(b'\0' * (_aligned(_HEADER.size + len(header)) - _HEADER.size - len(header)))
+        for name, array in arrays.items():
+            f.write(array.tobytes())
+            f.write(b'\0' * (_aligned(array.nbytes) - array.nbytes))
+    os.replace(temporary, path)
+
+
+def _previous(path):
+    """Arrays of the existing index at `path` needed to carry postings over, or None."""
+    try:
+        index = SearchIndex(path)
+    except (OSError, ValueError, KeyError):
+        return None
+    previous = {
+        'ids': {product_id: doc for doc, product_id in enumerate(index.product_ids())},
+        'fingerprints': np.array(index.doc_fingerprint),
+        'lengths': np.array(index.doc_len),
+        'terms': np.repeat(np.arange(len(index.terms), dtype=np.int64), np.diff(index.postings_start)),
+        'docs': np.array(index.post_docs),
+        'tfs': np.array(index.post_tf),
+        'term_offsets': np.array(index.term_offsets),
+        'term_blob': index.term_blob.tobytes(),
+    }
+    index.close()
+    return previous
+
+
+def build_index(path, products, manufacturers=None, full=False):
+    """
+    Write the search index for `products` to `path`; returns build stats.
+
+    `manufacturers` maps manufacturerId -> name, which is indexed with the
+    product. Unless `full`, an existing index at `path` is reused: products
+    whose indexed fields are unchanged keep their postings and only new or
+    edited products are tokenized; removed products drop out.
+    """
+    started = time.perf_counter()
+    manufacturers = manufacturers or {}
+    previous = None if full or not os.path.exists(path) else _previous(path)
+    old_ids = previous['ids'] if previous else {}
+
+    categories, category_codes = [''], {}
+    manufacturer_ids, manufacturer_codes = [''], {}
+    texts, lengths, category_of, manufacturer_of, fingerprints = [], [], [], [], []
+    carried_old, carried_new = [], []
+    new_terms, new_docs, new_tfs = [], [], []
+
+    for product in products:
+        doc = len(lengths)
+        manufacturer_id = product.get('manufacturerId') or ''
+        manufacturer_name = manufacturers.get(manufacturer_id)
+        stamp = fingerprint(product, manufacturer_name)
+        old = old_ids.pop(product['id'], None)
+        if old is not None and previous['fingerprints'][old] == stamp:
+            carried_old.append(old)
+            carried_new.append(doc)
+            lengths.append(int(previous['lengths'][old]))
+        else:
+            counts = document_terms(product, manufacturer_name)
+            new_terms.extend(counts)
+            new_docs.extend([doc] * len(counts))
+            new_tfs.extend(counts.values())
+            lengths.append(sum(counts.values()))
+
+        category = product.get('category') or ''
+        if category and category.lower() not in category_codes:
+            category_codes[category.lower()] = len(categories)
+            categories.append(category)
+        category_of.append(category_codes.get(category.lower(), 0))
+        if manufacturer_id and manufacturer_id not in manufacturer_codes:
+            manufacturer_codes[manufacturer_id] = len(manufacturer_ids)
+            manufacturer_ids.append(manufacturer_id)
+        manufacturer_of.append(manufacturer_codes.get(manufacturer_id, 0))
+        fingerprints.append(stamp)
+        texts.extend((product['id'], product.get('name') or '', product.get('modelNumber') or ''))
+
+    # Carry over postings of unchanged products, renumbered to their new doc.
+    old_terms = []
+    term_ids = np.zeros(0, dtype=np.int64)
+    docs = np.zeros(0, dtype=np.int64)
+    tfs = np.zeros(0, dtype=np.int64)
+    if previous is not None and carried_old:
+        remap = np.full(len(previous['fingerprints']), -1, dtype=np.int64)
+        remap[carried_old] = carried_new
+        docs = remap[previous['docs']]
+        kept = docs >= 0
+        term_ids, docs, tfs = previous['terms'][kept], docs[kept], previous['tfs'][kept].astype(np.int64)
+        used = np.flatnonzero(np.bincount(term_ids, minlength=len(previous['term_offsets']) - 1))
+        offsets, blob = previous['term_offsets'].tolist(), previous['term_blob']
+        old_terms = [blob[offsets[term]:offsets[term + 1]].decode() for term in used.tolist()]
+        # Old term id -> position among the used terms.
+        compact = np.zeros(len(offsets) - 1, dtype=np.int64)
+        compact[used] = np.arange(len(used))
+        term_ids = compact[term_ids]
+
+    vocabulary = sorted(set(old_terms).union(new_terms))
+    position = {term: code for code, term in enumerate(vocabulary)}
+    if old_terms:
+        term_ids = np.array([position[term] for term in old_terms], dtype=np.int64)[term_ids]
+    term_ids = np.concatenate([term_ids, np.fromiter(map(position.__getitem__, new_terms), dtype=np.int64,
+                                                     count=len(new_terms))])
+    docs = np.concatenate([docs, np.array(new_docs, dtype=np.int64)])
+    tfs = np.concatenate([tfs, np.array(new_tfs, dtype=np.int64)])
+    order = np.lexsort((docs, term_ids))
+    term_ids, docs, tfs = term_ids[order], docs[order], tfs[order]
+
+    frequencies = np.bincount(term_ids, minlength=len(vocabulary))
+    postings_start = np.zeros(len(vocabulary) + 1, dtype=np.uint32)
+    postings_start[1:] = np.cumsum(frequencies)
+    doc_len = np.array(lengths, dtype=np.uint32)
+    avgdl = float(np.mean(doc_len)) if lengths else 0.0
+    encoded_terms = [term.encode() for term in vocabulary]
+    encoded_texts = [text.encode() for text in texts]
+    arrays = {
+        'term_offsets': _offsets(encoded_terms),
+        'term_blob': np.frombuffer(b''.join(encoded_terms), dtype=np.uint8),
+        'postings_start': postings_start,
+        'post_docs': docs.astype(np.uint32),
+        'post_tf': np.minimum(tfs, 0xFFFF).astype(np.uint16),
+        'post_score': _bm25(tfs, frequencies[term_ids], doc_len[docs], len(lengths), avgdl),
+        'doc_len': doc_len,
+        'doc_category': np.array(category_of, dtype=np.uint32),
+        'doc_manufacturer': np.array(manufacturer_of, dtype=np.uint32),
+        'doc_fingerprint': np.array(fingerprints, dtype=np.uint32),
+        'text_offsets': _offsets(encoded_texts),
+        'text_blob': np.frombuffer(b''.join(encoded_texts), dtype=np.uint8),
+    }
+    _write(path, arrays, {
+        'docs': len(lengths),
+        'avgdl': avgdl,
+        'categories': categories,
+        'manufacturers': manufacturer_ids,
+        'builtAt': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    })
+    return {
+        'docs': len(lengths),
+        'reused': len(carried_old),
+        'tokenized': len(lengths) - len(carried_old),
+        'removed': len(old_ids),
+        'terms': len(vocabulary),
+        'postings': len(docs),
+        'bytes': os.path.getsize(path),
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def _bm25(tfs, frequencies, lengths, doc_count, avgdl):
+    """float32 BM25 of each posting, given its term's document frequency and its doc's length."""
+    tfs = tfs.astype(np.float64)
+    idf = np.log1p((doc_count - frequencies + 0.5) / (frequencies + 0.5))
+    return (idf * tfs * (K1 + 1) / (tfs + K1 * (1 - B + B * lengths / (avgdl or 1.0)))).astype(np.float32)
+
+
+def _offsets(chunks):
+    offsets = np.zeros(len(chunks) + 1, dtype=np.uint32)
+    offsets[1:] = np.cumsum([len(chunk) for chunk in chunks])
+    return offsets
+
+
+def refresh_index(tables, path, full=False, total_segments=None):
+    """
+    (Re)build the index at `path` from the Products and Manufacturers tables.
+
+    One projected parallel scan of each; only products whose indexed
+    fields changed since the last build are re-tokenized.
+    """
+    kwargs = {'total_segments': total_segments} if total_segments else {}
+    manufacturers = {item['id']: item.get('name')
+                     for item in parallel_scan(tables['Manufacturers'], projection=['id', 'name'], **kwargs)}
+    products = parallel_scan(tables['Products'], projection=PRODUCT_FIELDS, **kwargs)
+    return build_index(path, products, manufacturers, full=full)
@@ -0,0 +1,189 @@
+"""
+JSON response encoding for DynamoDB items.
+
+The boto3 resource layer hands back Decimal for every number, set for SS/NS
+attributes and Binary for B attributes, none of which the json module can
+encode on its own. encode_json() converts them inside the C encoder's
+`default` hook in a single pass and returns UTF-8 bytes ready to send.
+
+Two number modes are available:
+
+- exact (default): integers stay integers and fractional values keep their
+  decimal digits, so a budget of 45000.10 is never sent as 45000.099999...
+  Values with at most 15 significant digits go through float, which is
+  guaranteed to print back the same digits; longer ones are spliced into
+  the output verbatim.
+- float: every Decimal becomes a float, matching the old DecimalEncoder but
+  using the builtin float() as the hook so no Python frame runs per value.
+
+Responses can be compressed with gzip, or brotli when the optional
+`brotli` package is installed, negotiated from the Accept-Encoding header.
+"""
+
+import base64
+import gzip
+import json
+import re
+import sys
+from decimal import Decimal
+from uuid import uuid4
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed; the headers would cost
+# more than the savings.
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 5
+
+_SEPARATORS = (',', ':')
+# DBL_DIG: any decimal with this many significant digits survives a float
+# round trip with its digits intact.
+_FLOAT_SAFE_LENGTH = 16
+
+
+def _encode_other(obj):
+    """Encode the non-number DynamoDB types; raises TypeError otherwise."""
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    # Binary only exists once boto3's DynamoDB layer is loaded; looking it
+    # up here keeps this module importable without pulling in boto3.
+    types = sys.modules.get('boto3.dynamodb.types')
+    if types is not None and isinstance(obj, types.Binary):
+        obj = obj.value
+    if isinstance(obj, (bytes, bytearray)):
+        return base64.b64encode(obj).decode('ascii')
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def _float_default(obj):
+    if type(obj) is Decimal:
+        return float(obj)
+    return _encode_other(obj)
+
+
+class _ExactDefault:
+    """`default` hook that keeps Decimal digits; collects values too long for float."""
+
+    def __init__(self):
+        self.raw = []
+        self.marker = None
+
+    def __call__(self, obj):
+        if type(obj) is not Decimal:
+            return _encode_other(obj)
+        text = str(obj)
+        if 'E' not in text:
+            if '.' not in text:
+                return int(text)
+            if len(text) <= _FLOAT_SAFE_LENGTH + (text[0] == '-'):
+                return float(text)
+        if not obj.is_finite():
+            raise ValueError(f'Cannot encode {text} as JSON')
+        if self.marker is None:
+            self.marker = uuid4().hex
+        self.raw.append(text)
+        return f'\x00{self.marker}:{len(self.raw) - 1}\x00'
+
+    def splice(self, encoded):
+        """Replace the placeholder strings with the raw decimal text."""
+        if not self.raw:
+            return encoded
+        pattern = re.compile(r'"\\u0000%s:(\d+)\\u0000"' % self.marker)
+        return pattern.sub(lambda m: self.raw[int(m.group(1))], encoded)
+
+
+def encode_json(obj, exact_decimals=True):
+    """Encode `obj` (typically DynamoDB items) as compact UTF-8 JSON bytes."""
+    if not exact_decimals:
+        encoder = json.JSONEncoder(default=_float_default, separators=_SEPARATORS,
+                                   ensure_ascii=False, check_circular=False)
+        return encoder.encode(obj).encode('utf-8')
+    default = _ExactDefault()
+    encoder = json.JSONEncoder(default=default, separators=_SEPARATORS,
+                               ensure_ascii=False, check_circular=False)
+    return default.splice(encoder.encode(obj)).encode('utf-8')
+
+
+def encode_item_pages(pages, key, extra=None, exact_decimals=True):
+    """
+    Encode `{key: [...items from every page...], **extra}` page by page.
+
+    Yields byte chunks so the caller can drop each page of items once it is
+    encoded instead of holding the whole list.
+    """
+    yield b'{' + encode_json(key) + b':['
+    first = True
+    for items in pages:
+        if not items:
+            continue
+        encoded = encode_json(items, exact_decimals)
+        if not first:
+            yield b','
+        yield encoded[1:-1]
+        first = False
+    yield b']'
+    for name, value in (extra or {}).items():
+        yield b',' + encode_json(name) + b':' + encode_json(value, exact_decimals)
+    yield b'}'
+
+
+def _parse_accept_encoding(header):
+    weights = {}
+    for part in (header or '').split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[token] = quality
+    return weights
+
+
+def negotiate_encoding(accept_encoding):
+    """Pick 'br', 'gzip' or None from an Accept-Encoding header value."""
+    weights = _parse_accept_encoding(accept_encoding)
+    wildcard = weights.get('*', 0.0)
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best, best_quality = None, 0.0
+    for encoding in candidates:
+        quality = weights.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body, encoding):
+    """Compress bytes with a negotiated encoding; None returns them unchanged."""
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return body
+
+
+def lambda_body(body, accept_encoding=None):
+    """
+    Build the body fields of an API Gateway proxy response from JSON bytes.
+
+    Returns (fields, headers): `fields` holds `body` and, when compressed,
+    `isBase64Encoded`; `headers` holds Content-Encoding/Vary as needed.
+    """
+    encoding = negotiate_encoding(accept_encoding) if len(body) >= MIN_COMPRESS_SIZE else None
+    if encoding is None:
+        return {'body': body.decode('utf-8')}, {'Vary': 'Accept-Encoding'}
+    fields = {
+        'body': base64.b64encode(compress(body, encoding)).decode('ascii'),
+        'isBase64Encoded': True,
+    }
+    return fields, {'Content-Encoding': encoding, 'Vary': 'Accept-Encoding'}
@@ -0,0 +1,266 @@
+"""
+Synthetic MaterialsSelection-* data at configurable scale.
+
+The seed scripts insert about a dozen hand-written products, too few to
+show any scaling problem. generate() builds a full, internally consistent
+data set instead: projects, categories, line items, vendors,
+manufacturers, products and the product-vendor graph, with the same kinds
+of skew the seeded scenarios describe:
+
+- project sizes and category sizes are long-tailed (a few remodels with
+  hundreds of items, many small jobs);
+- a handful of manufacturers and vendors account for most products and
+  relationships (Zipf-like popularity);
+- products carry 0, 1 or many vendors, with and without a primary, and
+  line items mostly point at popular products;
+- ordered and received line items have purchase orders (one per project
+  and vendor), split order items and partial deliveries, with a few short
+  shipments, over-receipts and damaged units mixed in.
+
+The same seed always yields the same data, so runs can be compared
+across commits.
+"""
+
+import random
+from bisect import bisect_right
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+# Table -> single-key GSIs, as described in docs/DATABASE_SCHEMA.md.
+TABLE_INDEXES = {
+    'Projects': (),
+    'Categories': (('ProjectIdIndex', 'projectId'),),
+    'LineItems': (('ProjectIdIndex', 'projectId'), ('CategoryIdIndex', 'categoryId')),
+    'Vendors': (),
+    'Manufacturers': (),
+    'Products': (('ManufacturerIdIndex', 'manufacturerId'),),
+    'ProductVendors': (('ProductIdIndex', 'productId'), ('VendorIdIndex', 'vendorId')),
+    'Orders': (('VendorIdIndex', 'vendorId'),),
+    'OrderItems': (('OrderIdIndex', 'orderId'), ('LineItemIdIndex', 'lineItemId')),
+    'Receipts': (('OrderItemIdIndex', 'orderItemId'),),
+}
+
+CATEGORY_NAMES = ['Plumbing', 'Electrical', 'Lighting', 'Flooring', 'Tile', 'Hardware', 'Cabinets',
+                  'Countertops', 'Accessories', 'Storage', 'Paint', 'Appliances', 'Doors', 'Trim']
+UNITS = ['ea', 'ea', 'ea', 'sq ft', 'ln ft', 'box', 'gal']
+STATUSES = ['pending', 'pending', 'approved', 'ordered', 'ordered', 'received', 'installed']
+# The app's project statuses (src/types/index.ts), weighted towards in-progress.
+PROJECT_STATUSES = ['planning', 'in-progress', 'in-progress', 'in-progress', 'on-hold', 'completed']
+SKEW = 1.1
+
+
+class _Zipf:
+    """Draw indexes 0..n-1 with probability proportional to 1 / (rank + 1) ** s."""
+
+    def __init__(self, rng, n, s=SKEW):
+        self.rng = rng
+        self.cumulative = list(accumulate(1 / (rank + 1) ** s for rank in range(n)))
+
+    def __call__(self):
+        return bisect_right(self.cumulative, self.rng.random() * self.cumulative[-1])
+
+
+def _money(rng, low, high):
+    return Decimal(rng.randrange(int(low * 100), int(high * 100))).scaleb(-2)
+
+
+def _long_tail(rng, mean, cap):
+    """A positive integer with the given mean and a long right tail."""
+    return max(1, min(cap, int(rng.expovariate(1 / mean)) + 1))
+
+
+def generate(projects=100, items_per_project=60, vendors=40, manufacturers=60, products=2000, seed=7):
+    """
+    {table short name: [items]} for every MaterialsSelection-* table.
+
+    `items_per_project` is a mean; actual project sizes are long-tailed.
+    """
+    rng = random.Random(seed)
+    data = {name: [] for name in TABLE_INDEXES}
+
+    for v in range(vendors):
+        data['Vendors'].append({'id': f'vendor-{v:05d}', 'name': f'Vendor {v}',
+                                'contact': f'Contact {v}', 'phone': f'555-{v:04d}',
+                                'email': f'orders@vendor{v}.example', 'website': f'https://vendor{v}.example'})
+    for m in range(manufacturers):
+        data['Manufacturers'].append({'id': f'mfr-{m:05d}', 'name': f'Manufacturer {m}',
+                                      'website': f'https://mfr{m}.example'})
+
+    pick_manufacturer = _Zipf(rng, manufacturers)
+    for p in range(products):
+        manufacturer = pick_manufacturer()
+        data['Products'].append({
+            'id': f'prod-{p:07d}',
+            'manufacturerId': f'mfr-{manufacturer:05d}',
+            'name': f'Product {p}',
+            'modelNumber': f'M{manufacturer}-{p:06d}-{rng.choice(["2MB", "BN", "0", "CP"])}',
+            'description': f'Synthetic catalog entry {p}',
+            'category': rng.choice(CATEGORY_NAMES),
+            'unit': rng.choice(UNITS),
+            'imageUrl': '',
+        })
+
+    # Popular products are carried by many vendors; some by none at all.
+    pick_vendor = _Zipf(rng, vendors)
+    relationship = 0
+    list_prices = {}
+    for p, product in enumerate(data['Products']):
+        list_price = list_prices[product['id']] = _money(rng, 5, 2500)
+        carriers = 0 if rng.random() < 0.05 else min(vendors, _long_tail(rng, 1 + 6 / (1 + p / 50), vendors))
+        chosen = set()
+        while len(chosen) < carriers:
+            chosen.add(pick_vendor())
+        primary = rng.choice(sorted(chosen)) if chosen and rng.random() < 0.7 else None
+        for vendor in sorted(chosen):
+            data['ProductVendors'].append({
+                'id': f'pv-{relationship:08d}',
+                'productId': product['id'],
+                'vendorId': f'vendor-{vendor:05d}',
+                'cost': (list_price * Decimal(rng.uniform(0.8, 1.2))).quantize(Decimal('0.01')),
+                'isPrimary': vendor == primary,
+                'createdAt': '2026-01-01T00:00:00',
+                'updatedAt': '2026-01-01T00:00:00',
+            })
+            relationship += 1
+
+    pick_product = _Zipf(rng, products, s=0.9)
+    category_id = item_id = 0
+    start = date(2025, 1, 1)
+    for p in range(projects):
+        project_id = f'proj-{p:06d}'
+        began = start + timedelta(days=rng.randrange(0, 540))
+        size = _long_tail(rng, items_per_project, items_per_project * 20)
+        data['Projects'].append({
+            'id': project_id,
+            'name': f'Project {p}',
+            'description': f'Synthetic remodel {p}',
+            'startDate': began.isoformat(),
+            'endDate': (began + timedelta(days=rng.randrange(30, 240))).isoformat(),
+            'status': rng.choice(PROJECT_STATUSES),
+            'budget': Decimal(rng.randrange(5000, 250000)),
+        })
+        names = rng.sample(CATEGORY_NAMES, min(len(CATEGORY_NAMES), 2 + size // 10))
+        categories = []
+        for name in names:
+            categories.append({
+                'id': f'cat-{category_id:07d}',
+                'projectId': project_id,
+                'name': name,
+                'description': f'{name} for project {p}',
+                'allowance': _money(rng, 500, 40000),
+            })
+            category_id += 1
+        data['Categories'].extend(categories)
+        pick_category = _Zipf(rng, len(categories))
+        for _ in range(size):
+            category = categories[pick_category()]
+            product = data['Products'][pick_product()]
+            quantity = Decimal(_long_tail(rng, 4, 400))
+            unit_cost = list_prices[product['id']]
+            item = {
+                'id': f'item-{item_id:08d}',
+                'projectId': project_id,
+                'categoryId': category['id'],
+                'name': product['name'],
+                'material': product['description'],
+                'quantity': quantity,
+                'unit': product['unit'],
+                'unitCost': unit_cost,
+                'totalCost': quantity * unit_cost,
+                'allowance': (quantity * unit_cost * Decimal(rng.uniform(0.7, 1.4))).quantize(Decimal('0.01')),
+                'status': rng.choice(STATUSES),
+                'manufacturerId': product['manufacturerId'],
+                'productId': product['id'],
+                'modelNumber': product['modelNumber'],
+            }
+            if rng.random() < 0.6:
+                item['vendorId'] = f'vendor-{pick_vendor():05d}'
+            data['LineItems'].append(item)
+            item_id += 1
+    _purchase_orders(random.Random(seed + 1), data, pick_vendor)
+    return data
+
+
+def _purchase_orders(rng, data, pick_vendor):
+    """
+    Orders, OrderItems and Receipts for line items that have been ordered.
+
+    Uses its own random stream so the other tables are the same as before
+    these were added.
+    """
+    started = {project['id']: date.fromisoformat(project['startDate']) for project in data['Projects']}
+    orders = {}
+    for item in data['LineItems']:
+        if item['status'] not in ('ordered', 'received', 'installed'):
+            continue
+        vendor_id = item.get('vendorId') or f'vendor-{pick_vendor():05d}'
+        key = (item['projectId'], vendor_id)
+        order = orders.get(key)
+        if order is None:
+            ordered = started[item['projectId']] + timedelta(days=rng.randrange(0, 90))
+            order = orders[key] = {
+                'id': f'order-{len(orders):07d}',
+                'vendorId': vendor_id,
+                'orderNumber': f'PO-{ordered.year}-{len(orders):06d}',
+                'orderDate': ordered.isoformat(),
+                'notes': '',
+                'createdAt': f'{ordered.isoformat()}T09:00:00',
+            }
+            data['Orders'].append(order)
+        # A few line items are split across two order items (reorders).
+        quantities = [item['quantity']]
+        if item['quantity'] > 1 and rng.random() < 0.05:
+            first = Decimal(rng.randrange(1, int(item['quantity'])))
+            quantities = [first, item['quantity'] - first]
+        for quantity in quantities:
+            order_item = {
+                'id': f'oi-{len(data["OrderItems"]):08d}',
+                'orderId': order['id'],
+                'lineItemId': item['id'],
+                'orderedQuantity': quantity,
+                'orderedPrice': item['unitCost'],
+                'createdAt': order['createdAt'],
+            }
+            data['OrderItems'].append(order_item)
+            _receipts(rng, data['Receipts'], order_item, order['orderDate'], item['status'])
+
+
+def _receipts(rng, receipts, order_item, order_date, status):
+    ordered = order_item['orderedQuantity']
+    roll = rng.random()
+    if status == 'ordered':
+        # Mostly still on order; some partially delivered.
+        received = Decimal(0) if roll < 0.7 or ordered < 2 else Decimal(rng.randrange(1, int(ordered)))
+    elif roll < 0.03 and ordered > 1:
+        received = ordered - Decimal(rng.randrange(1, int(ordered)))  # short shipment
+    elif roll < 0.04:
+        received = ordered + Decimal(rng.randrange(1, 3))  # over-receipt
+    else:
+        received = ordered
+    if not received:
+        return
+    deliveries = [received]
+    if received > 1 and rng.random() < 0.2:
+        first = Decimal(rng.randrange(1, int(received)))
+        deliveries = [first, received - first]
+    day = date.fromisoformat(order_date)
+    for quantity in deliveries:
+        day += timedelta(days=rng.randrange(2, 20))
+        receipt = {
+            'id': f'rcpt-{len(receipts):08d}',
+            'orderItemId': order_item['id'],
+            'receivedDate': day.isoformat(),
+            'receivedQuantity': quantity,
+            'notes': '',
+            'createdAt': f'{day.isoformat()}T14:00:00',
+        }
+        if rng.random() < 0.02:
+            receipt['damagedQuantity'] = Decimal(1)
+            receipt['notes'] = 'Damaged in transit'
+        receipts.append(receipt)
+
+
+def counts(data):
+    """{table short name: item count}."""
+    return {name: len(items) for name, items in data.items()}
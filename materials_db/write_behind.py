@@ -0,0 +1,358 @@
+"""
+Write-behind buffer for bulk edits of existing items.
+
+Marking a delivery received, or pasting an Ordered Date / Staging Location
+column from a spreadsheet, touches hundreds of line items at once. One
+update_item per cell costs one round trip each; WriteBehind buffers the
+edits instead and writes them from a background thread:
+
+- Edits to the same item are coalesced: the last value of each attribute
+  wins, so a row edited three times before the flush is written once.
+- A flush starts as soon as a full transaction (100 items) is pending or
+  the oldest buffered edit has waited `max_delay` seconds, so no edit is
+  held back longer than that.
+- update() and put() block while `max_pending` items are buffered or in
+  flight, so a fast producer cannot outrun DynamoDB.
+
+Partial updates go out as TransactWriteItems, 100 items per call and up to
+`concurrency` calls at once, each conditional on the item existing so a
+row deleted in the meantime is not recreated as a stub. Whole items given
+to put() go out as 25-item BatchWriteItem calls through materials_db.bulk
+at half the write cost. Flushes run one at a time, so two edits of the
+same item are always applied in the order they were made. Both kinds of
+write take capacity from the shared scheduler (materials_db.scheduler) as
+one job, at 'interactive' priority unless told otherwise.
+
+    with WriteBehind(line_items_table) as writes:
+        for line_item_id in delivery:
+            writes.update(line_item_id, {'receivedDate': today, 'status': 'received'})
+    print(writes.stats.summary())
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from uuid import uuid4
+
+from botocore.exceptions import ClientError
+
+from materials_db.bulk import THROTTLING_ERRORS, backoff_delay, key_attributes, write_requests
+from materials_db.scheduler import consumed_units, get_scheduler
+
+TRANSACTION_SIZE = 100  # TransactWriteItems hard limit
+DEFAULT_MAX_DELAY = 0.5
+DEFAULT_MAX_PENDING = 2000
+DEFAULT_CONCURRENCY = 4
+MAX_ATTEMPTS = 8
+TRANSACTION_UNITS = 2  # WCU per item of 1 KB or less in a transaction
+
+# Whole-transaction errors worth retrying with the same idempotency token.
+_RETRYABLE_ERRORS = THROTTLING_ERRORS | {'TransactionInProgressException', 'InternalServerError'}
+# Per-item cancellation reasons that clear up on retry.
+_RETRYABLE_REASONS = {'TransactionConflict', 'ThrottlingError', 'ProvisionedThroughputExceeded'}
+
+
+class WriteStats:
+    """Counters for a WriteBehind buffer, updated as flushes complete."""
+
+    def __init__(self):
+        self.edits = 0
+        self.coalesced = 0
+        self.written = 0
+        self.transactions = 0
+        self.batches = 0
+        self.flushes = 0
+        self.retries = 0
+        self.missing = []
+        self.failed = []
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def add_missing(self, key):
+        with self._lock:
+            self.missing.append(key)
+
+    def add_failure(self, key, error):
+        with self._lock:
+            self.failed.append((key, error))
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        line = (f'{self.edits} edits in {elapsed:.2f}s: {self.written} items written '
+                f'({self.coalesced} edits coalesced) in {self.transactions} transactions, '
+                f'{self.batches} batches, {self.flushes} flushes, {self.retries} retries')
+        if self.missing:
+            line += f', {len(self.missing)} missing'
+        if self.failed:
+            line += f', {len(self.failed)} failed'
+        return line
+
+
+class _Edit:
+    """Coalesced state of one item: attributes to set/remove, or a whole item."""
+
+    __slots__ = ('key', 'fields', 'removed', 'item', 'since')
+
+    def __init__(self, key):
+        self.key = key
+        self.fields = {}
+        self.removed = set()
+        self.item = None
+        self.since = time.monotonic()
+
+
+class WriteBehind:
+    """Buffer, coalesce and batch writes to one table; see the module docstring."""
+
+    def __init__(self, table, max_delay=DEFAULT_MAX_DELAY, max_pending=DEFAULT_MAX_PENDING,
+                 concurrency=DEFAULT_CONCURRENCY, priority='interactive'):
+        self.table = table
+        self.client = table.meta.client
+        self.key_names = key_attributes(table)
+        self.max_delay = max_delay
+        self.max_pending = max(TRANSACTION_SIZE, max_pending)
+        self.concurrency = max(1, concurrency)
+        self.stats = WriteStats()
+        self.job = get_scheduler().job(f'write-behind {table.name}', table, priority=priority)
+        self._pending = {}
+        self._buffered = 0  # pending plus in flight, bounded by max_pending
+        self._flush_waiters = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='write-behind')
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def update(self, key, fields=None, remove=()):
+        """
+        Set `fields` and remove the `remove` attributes on an existing item.
+
+        `key` is the item's key dict, or just the id for tables keyed on
+        `id`. updatedAt is set to the flush time unless `fields` has one.
+        """
+        fields = {name: value for name, value in (fields or {}).items() if name not in self.key_names}
+
+        def apply(edit):
+            if edit.item is not None:
+                edit.item.update(fields)
+                for name in remove:
+                    edit.item.pop(name, None)
+                return
+            edit.fields.update(fields)
+            edit.removed.difference_update(fields)
+            for name in remove:
+                edit.fields.pop(name, None)
+                edit.removed.add(name)
+
+        self._submit(key, apply)
+
+    def put(self, item):
+        """Write a whole item, replacing it and any pending update of it."""
+        item = dict(item)
+
+        def apply(edit):
+            edit.item = item
+            edit.fields.clear()
+            edit.removed.clear()
+
+        self._submit({name: item[name] for name in self.key_names}, apply)
+
+    def flush(self):
+        """Write everything buffered so far and return the stats."""
+        with self._cond:
+            self._flush_waiters += 1
+            self._cond.notify_all()
+            while self._buffered:
+                self._cond.wait()
+            self._flush_waiters -= 1
+        return self.stats
+
+    def close(self):
+        """Flush, then stop the background thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._pool.shutdown()
+        self.job.finish()
+        return self.stats
+
+    def _submit(self, key, apply):
+        if not isinstance(key, dict):
+            key = {self.key_names[0]: key}
+        ident = tuple(key[name] for name in self.key_names)
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError('WriteBehind is closed')
+                edit = self._pending.get(ident)
+                if edit is not None:
+                    self.stats.add(edits=1, coalesced=1)
+                    break
+                if self._buffered < self.max_pending:
+                    edit = self._pending[ident] = _Edit(key)
+                    self._buffered += 1
+                    self.stats.add(edits=1)
+                    if len(self._pending) == TRANSACTION_SIZE or len(self._pending) == 1:
+                        self._cond.notify_all()
+                    break
+                self._cond.wait()
+            apply(edit)
+
+    def _next_batch(self):
+        """Block until a flush is due; returns the edits to write, or None to stop."""
+        with self._cond:
+            while True:
+                if self._pending:
+                    waited = time.monotonic() - next(iter(self._pending.values())).since
+                    if (len(self._pending) >= TRANSACTION_SIZE or self._flush_waiters or self._closed
+                            or waited >= self.max_delay):
+                        edits, self._pending = list(self._pending.values()), {}
+                        return edits
+                    self._cond.wait(self.max_delay - waited)
+                elif self._closed:
+                    return None
+                else:
+                    self._cond.wait()
+
+    def _run(self):
+        while True:
+            edits = self._next_batch()
+            if edits is None:
+                return
+            try:
+                self._write(edits)
+            except Exception as e:  # _write fails edits per chunk; this only keeps flush() from hanging
+                self._fail(edits, e)
+            with self._cond:
+                self._buffered -= len(edits)
+                self._cond.notify_all()
+
+    def _fail(self, edits, error):
+        for edit in edits:
+            self.stats.add_failure(edit.key, str(error))
+
+    def _write(self, edits):
+        """
+        Write one flush. An error fails only the edits it affected: the
+        transaction chunk that raised, or the puts, never the whole flush.
+        """
+        self.stats.add(flushes=1)
+        puts = [edit for edit in edits if edit.item is not None]
+        updates = [edit for edit in edits if edit.item is None]
+        chunks = [updates[start:start + TRANSACTION_SIZE] for start in range(0, len(updates), TRANSACTION_SIZE)]
+        futures = [(chunk, self._pool.submit(self._transact, chunk)) for chunk in chunks]
+        if puts:
+            try:
+                self._put([edit.item for edit in puts])
+            except Exception as e:
+                self._fail(puts, e)
+        for chunk, future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                self._fail(chunk, e)
+
+    def _put(self, items):
+        loaded = write_requests(self.table, ({'PutRequest': {'Item': item}} for item in items),
+                                concurrency=self.concurrency, job=self.job)
+        self.stats.add(written=loaded.written, batches=loaded.batches, retries=loaded.retries)
+        for request in loaded.unprocessed:
+            item = request['PutRequest']['Item']
+            self.stats.add_failure({name: item[name] for name in self.key_names}, 'unprocessed')
+
+    def _action(self, edit, now):
+        names, values, assignments = {}, {}, []
+        fields = dict(edit.fields)
+        fields.setdefault('updatedAt', now)
+        for position, (name, value) in enumerate(fields.items()):
+            names[f'#f{position}'] = name
+            values[f':v{position}'] = value
+            assignments.append(f'#f{position} = :v{position}')
+        expression = 'SET ' + ', '.join(assignments)
+        if edit.removed:
+            removals = []
+            for position, name in enumerate(sorted(edit.removed)):
+                names[f'#r{position}'] = name
+                removals.append(f'#r{position}')
+            expression += ' REMOVE ' + ', '.join(removals)
+        names['#key'] = self.key_names[0]
+        return {
+            'Update': {
+                'TableName': self.table.name,
+                'Key': edit.key,
+                'UpdateExpression': expression,
+                'ConditionExpression': 'attribute_exists(#key)',
+                'ExpressionAttributeNames': names,
+                'ExpressionAttributeValues': values,
+            }
+        }
+
+    def _transact(self, edits):
+        """
+        Apply up to 100 updates in one transaction.
+
+        Items that no longer exist, or that DynamoDB rejects outright, are
+        recorded and dropped and the rest are retried at once. Conflicts
+        and throttling are retried with backoff under the same
+        ClientRequestToken, so a retry of a call that did land is a no-op.
+        """
+        now = datetime.now().isoformat()
+        token = str(uuid4())
+        attempt = 0
+        while edits:
+            estimate = TRANSACTION_UNITS * len(edits)
+            self.job.acquire(estimate)
+            try:
+                response = self.client.transact_write_items(
+                    TransactItems=[self._action(edit, now) for edit in edits],
+                    ClientRequestToken=token,
+                    ReturnConsumedCapacity='TOTAL',
+                )
+                self.job.settle(estimate, consumed_units(response, self.table.name))
+                self.job.succeeded()
+                self.job.advance(len(edits))
+                self.stats.add(written=len(edits), transactions=1)
+                return
+            except ClientError as e:
+                code = e.response['Error']['Code']
+                if code in THROTTLING_ERRORS:
+                    self.job.throttled()
+                reasons = e.response.get('CancellationReasons') or []
+                if code == 'TransactionCanceledException' and len(reasons) == len(edits):
+                    remaining = []
+                    for edit, reason in zip(edits, reasons):
+                        reason_code = reason.get('Code') or 'None'
+                        if reason_code == 'ConditionalCheckFailed':
+                            self.stats.add_missing(edit.key)
+                        elif reason_code in ('None', *_RETRYABLE_REASONS):
+                            remaining.append(edit)
+                        else:
+                            self.stats.add_failure(edit.key, reason.get('Message') or reason_code)
+                    if len(remaining) < len(edits):
+                        # A different item set needs a fresh idempotency token.
+                        edits, token = remaining, str(uuid4())
+                        continue
+                elif code not in _RETRYABLE_ERRORS:
+                    for edit in edits:
+                        self.stats.add_failure(edit.key, str(e))
+                    return
+                attempt += 1
+                if attempt >= MAX_ATTEMPTS:
+                    for edit in edits:
+                        self.stats.add_failure(edit.key, code)
+                    return
+                self.stats.add(retries=1)
+                time.sleep(backoff_delay(attempt))
@@ -0,0 +1,58 @@
+"""
+Search the product catalog from the command line.
+
+Queries the local index written by materials_db.search (SEARCH_INDEX_PATH,
+default products.idx). --build refreshes it from the Products and
+Manufacturers tables first, re-tokenizing only products that changed;
+--full rebuilds it from scratch.
+
+Usage:
+    python search_products.py --build
+    python search_products.py kohler towel ri
+    python search_products.py s2165 --category Plumbing --limit 5
+    python search_products.py --build --full faucet
+"""
+
+import argparse
+import sys
+import time
+
+from materials_db.repository import table
+from materials_db.search import DEFAULT_LIMIT, DEFAULT_PATH, SearchIndex, refresh_index
+
+parser = argparse.ArgumentParser(description='Full-text search over products.')
+parser.add_argument('query', nargs='*', help='Words to match; the last one may be a prefix')
+parser.add_argument('--index', default=DEFAULT_PATH, help=f'Index file (default {DEFAULT_PATH})')
+parser.add_argument('--build', action='store_true', help='Refresh the index from DynamoDB first')
+parser.add_argument('--full', action='store_true', help='With --build, re-tokenize every product')
+parser.add_argument('--category', help='Only products in this category')
+parser.add_argument('--manufacturer', help='Only products of this manufacturerId')
+parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT)
+args = parser.parse_args()
+
+if args.build:
+    stats = refresh_index({'Products': table('Products'), 'Manufacturers': table('Manufacturers')},
+                          args.index, full=args.full)
+    print(f"✓ Indexed {stats['docs']} products in {stats['seconds']:.2f}s "
+          f"({stats['tokenized']} tokenized, {stats['reused']} unchanged, {stats['removed']} removed); "
+          f"{stats['terms']} terms, {stats['bytes'] / 1e6:.1f} MB")
+elif not args.query:
+    parser.error('give a query, --build, or both')
+
+if not args.query:
+    sys.exit(0)
+
+try:
+    index = SearchIndex(args.index)
+except FileNotFoundError:
+    sys.exit(f'✗ No index at {args.index}; run with --build first')
+
+query = ' '.join(args.query)
+start = time.perf_counter()
+results = index.search(query, args.limit, category=args.category, manufacturer_id=args.manufacturer)
+elapsed = (time.perf_counter() - start) * 1000
+
+for result in results:
+    print(f"{result['score']:>8.3f}  {result['modelNumber']:<24} {result['name']:<50} "
+          f"{result['category'] or '':<16} {result['id']}")
+print(f"\n{len(results)} results for '{query}' in {elapsed:.2f}ms ({len(index)} products indexed)")
@@ -1,7 +1,27 @@
-import boto3
-from uuid import uuid4
+"""
+Seed the Vendors and Manufacturers tables.
+
+Re-running is safe: a name that already exists keeps its row (the lowest
+id if earlier runs left duplicates, the same one the other seed scripts
+pick), and new names get a uuid5 id derived from the name, so the same
+name always maps to the same row.
+"""
+
+from materials_db.bulk import put_items
+from materials_db.model_numbers import name_id
+from materials_db.repository import get_resource
+from materials_db.scan import scan_all
+
+dynamodb = get_resource()
+
+
+def existing_ids(table):
+    """{name: id} of rows already in the table; duplicates resolve to the lowest id."""
+    ids = {}
+    for item in sorted(scan_all(table, projection=['id', 'name']), key=lambda item: item['id']):
+        ids.setdefault(item['name'].strip(), item['id'])
+    return ids
 
-dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
 
 # Seed Vendors
 vendors_table = dynamodb.Table('MaterialsSelection-Vendors')
@@ -19,15 +39,17 @@ vendors = [
 ]
 
 print("Seeding Vendors...")
+existing = existing_ids(vendors_table)
+stats = put_items(vendors_table, [{
+    'id': existing.get(vendor) or name_id('vendor', vendor),
+    'name': vendor,
+    'contact': '',
+    'website': '',
+    'notes': ''
+} for vendor in vendors])
 for vendor in vendors:
-    vendors_table.put_item(Item={
-        'id': str(uuid4()),
-        'name': vendor,
-        'contact': '',
-        'website': '',
-        'notes': ''
-    })
     print(f"  ✓ {vendor}")
+print(f"  {stats.summary('vendors')}")
 
 # Seed Manufacturers
 manufacturers_table = dynamodb.Table('MaterialsSelection-Manufacturers')
@@ -43,13 +65,15 @@ manufacturers = [
 ]
 
 print("\nSeeding Manufacturers...")
+existing = existing_ids(manufacturers_table)
+stats = put_items(manufacturers_table, [{
+    'id': existing.get(manufacturer) or name_id('manufacturer', manufacturer),
+    'name': manufacturer,
+    'website': '',
+    'notes': ''
+} for manufacturer in manufacturers])
 for manufacturer in manufacturers:
-    manufacturers_table.put_item(Item={
-        'id': str(uuid4()),
-        'name': manufacturer,
-        'website': '',
-        'notes': ''
-    })
     print(f"  ✓ {manufacturer}")
+print(f"  {stats.summary('manufacturers')}")
 
 print("\n✅ Seed data complete!")
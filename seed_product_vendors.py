@@ -7,14 +7,33 @@ This script creates product-vendor relationships covering various test scenarios
 - Products with 2+ vendors (with and without primary designation)
 - Multiple vendors for same product with different costs
 - Products from different manufacturers carried by same vendor
+
+Model numbers match products by canonical form ('S 2165BZ-CG' ==
+'S2165BZCG'). A model number with no such match is reported with its
+closest catalog spelling and skipped, so prices are never attached to a
+different product; --accept-fuzzy writes those close matches instead.
+
+Usage:
+    python seed_product_vendors.py
+    python seed_product_vendors.py --accept-fuzzy
 """
 
-import boto3
-from uuid import uuid4
+import argparse
 from datetime import datetime
 from decimal import Decimal
 
-dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+from materials_db.bulk import put_items, write_requests
+from materials_db.model_numbers import ModelIndex, relationship_id
+from materials_db.product_vendors import resolve_primaries
+from materials_db.repository import get_resource
+from materials_db.scan import scan_all
+
+parser = argparse.ArgumentParser(description='Seed product-vendor relationships.')
+parser.add_argument('--accept-fuzzy', action='store_true',
+                    help='Attach rows whose model number only fuzzily matches a product')
+args = parser.parse_args()
+
+dynamodb = get_resource()
 
 # Get existing data
 vendors_table = dynamodb.Table('MaterialsSelection-Vendors')
@@ -22,17 +41,24 @@ products_table = dynamodb.Table('MaterialsSelection-Products')
 manufacturers_table = dynamodb.Table('MaterialsSelection-Manufacturers')
 product_vendors_table = dynamodb.Table('MaterialsSelection-ProductVendors')
 
-vendors_response = vendors_table.scan()
-vendors = {item['name'].strip(): item['id'] for item in vendors_response['Items']}
+# Rows are taken in id order so that, if earlier non-idempotent runs left
+# duplicates, the same vendor/product wins every time and relationship ids
+# stay stable.
+vendors = {}
+for item in sorted(scan_all(vendors_table, projection=['id', 'name']), key=lambda item: item['id']):
+    vendors.setdefault(item['name'].strip(), item['id'])
 
-products_response = products_table.scan()
-products = {}
-for item in products_response['Items']:
-    # Key by model number for easier matching
-    products[item['modelNumber']] = item
+products = {item['id']: item
+            for item in scan_all(products_table, projection=['id', 'name', 'modelNumber', 'manufacturerId'])}
+# Match by canonical model number ('S 2165BZ-CG' == 'S2165BZCG'); the
+# closest catalog spelling is only a suggestion unless --accept-fuzzy
+product_index = ModelIndex(products[product_id] for product_id in sorted(products))
+duplicates = product_index.duplicates()
+if duplicates:
+    print(f"⚠️  {len(duplicates)} model numbers belong to more than one product; using the first id of each")
 
-manufacturers_response = manufacturers_table.scan()
-manufacturers = {item['id']: item['name'] for item in manufacturers_response['Items']}
+manufacturers = {item['id']: item['name']
+                 for item in scan_all(manufacturers_table, projection=['id', 'name'])}
 
 print(f"Found {len(vendors)} vendors")
 for name in vendors.keys():
@@ -41,13 +67,10 @@ for name in vendors.keys():
 print(f"\nFound {len(products)} products")
 print(f"Found {len(manufacturers)} manufacturers\n")
 
-# Clear existing product-vendor relationships (for clean testing)
-print("Clearing existing product-vendor relationships...")
-existing_pv = product_vendors_table.scan()
-for item in existing_pv.get('Items', []):
-    product_vendors_table.delete_item(Key={'id': item['id']})
-    print(f"  Deleted: {item['id']}")
-print()
+# Relationship ids are derived from (product, vendor), so re-running the
+# seed overwrites the same rows; anything else is removed below.
+existing = {item['id']: item.get('createdAt')
+            for item in scan_all(product_vendors_table, projection=['id', 'createdAt'])}
 
 # Define comprehensive product-vendor relationships
 # Format: (product_model_number, vendor_name, cost, is_primary)
@@ -132,15 +155,25 @@ relationships = [
 print("Seeding product-vendor relationships...")
 added_count = 0
 skipped_count = 0
+review_count = 0
 error_count = 0
+pending = []  # items to batch-write, in relationship order
+matches = product_index.match_many([model_number for model_number, *_ in relationships])
 
-for model_number, vendor_name, cost, is_primary in relationships:
+for (model_number, vendor_name, cost, is_primary), match in zip(relationships, matches):
     # Find product
-    product = products.get(model_number)
-    if not product:
+    if not match:
         print(f"  ⚠️  Product not found: {model_number}")
         skipped_count += 1
         continue
+    if match.score < 1:
+        if not args.accept_fuzzy:
+            print(f"  ⚠️  Needs review: {model_number} not in catalog; closest is {match.modelNumber} "
+                  f"(score {match.score:.2f}), skipped")
+            review_count += 1
+            continue
+        print(f"  ≈ {model_number} matched {match.modelNumber} (score {match.score:.2f})")
+    product = products[match.productId]
     
     # Find vendor
     vendor_id = vendors.get(vendor_name)
@@ -149,51 +182,48 @@ for model_number, vendor_name, cost, is_primary in relationships:
         skipped_count += 1
         continue
     
-    try:
-        # If setting as primary, check if another primary exists and unset it
-        if is_primary:
-            # Query existing relationships for this product
-            existing_response = product_vendors_table.scan(
-                FilterExpression='productId = :pid AND isPrimary = :true',
-                ExpressionAttributeValues={
-                    ':pid': product['id'],
-                    ':true': True
-                }
-            )
-            
-            # Unset any existing primary
-            for existing in existing_response.get('Items', []):
-                product_vendors_table.update_item(
-                    Key={'id': existing['id']},
-                    UpdateExpression='SET isPrimary = :false',
-                    ExpressionAttributeValues={':false': False}
-                )
-        
-        # Create product-vendor relationship
-        pv_id = str(uuid4())
-        product_vendors_table.put_item(Item={
-            'id': pv_id,
-            'productId': product['id'],
-            'vendorId': vendor_id,
-            'cost': cost,
-            'isPrimary': is_primary,
-            'createdAt': datetime.now().isoformat(),
-            'updatedAt': datetime.now().isoformat(),
-        })
-        
-        manufacturer_name = manufacturers.get(product.get('manufacturerId', ''), 'Unknown')
-        primary_flag = ' [PRIMARY]' if is_primary else ''
-        print(f"  ✓ {product['name']} ({manufacturer_name}) → {vendor_name} @ ${cost:.2f}{primary_flag}")
-        added_count += 1
-        
-    except Exception as e:
-        print(f"  ✗ Error adding {model_number} + {vendor_name}: {e}")
-        error_count += 1
+    now = datetime.now().isoformat()
+    item_id = relationship_id(product['id'], vendor_id)
+    pending.append({
+        'id': item_id,
+        'productId': product['id'],
+        'vendorId': vendor_id,
+        'cost': cost,
+        'isPrimary': is_primary,
+        'createdAt': existing.get(item_id) or now,
+        'updatedAt': now,
+    })
+    
+    manufacturer_name = manufacturers.get(product.get('manufacturerId', ''), 'Unknown')
+    primary_flag = ' [PRIMARY]' if is_primary else ''
+    print(f"  • {product['name']} ({manufacturer_name}) → {vendor_name} @ ${cost:.2f}{primary_flag}")
+
+# The same (product, vendor) listed twice collapses to one row; the last wins.
+pending = list({item['id']: item for item in pending}.values())
+
+# Every relationship not in the seed set is stale. Removing those first, then
+# letting the last primary in the list win, leaves one primary per product
+# even if the script fails part-way.
+wanted = {item['id'] for item in pending}
+stale = [item_id for item_id in existing if item_id not in wanted]
+if stale:
+    removed = write_requests(product_vendors_table,
+                             ({'DeleteRequest': {'Key': {'id': item_id}}} for item_id in stale))
+    print(f"\n  Removed stale relationships: {removed.summary('deleted')}")
+resolve_primaries(pending)
+
+stats = put_items(product_vendors_table, pending)
+added_count = stats.written
+error_count += len(stats.unprocessed)
+for request in stats.unprocessed:
+    print(f"  ✗ Error adding relationship {request['PutRequest']['Item']['id']}")
+print(f"\n  {stats.summary('relationships')}")
 
 print(f"\n{'='*80}")
 print(f"✅ Seed complete!")
 print(f"   Added: {added_count} relationships")
 print(f"   Skipped: {skipped_count}")
+print(f"   Needs review (fuzzy match, use --accept-fuzzy): {review_count}")
 print(f"   Errors: {error_count}")
 print(f"{'='*80}\n")
 
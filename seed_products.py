@@ -1,12 +1,17 @@
-import boto3
-from uuid import uuid4
+from materials_db.bulk import put_items
+from materials_db.model_numbers import canonical_model, product_id
+from materials_db.repository import get_resource
+from materials_db.scan import scan_all
 
-dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+dynamodb = get_resource()
 
-# Get existing manufacturers to link products
+# Get existing manufacturers to link products. Rows are taken in id order so
+# that, if earlier runs left two manufacturers with the same name, the same
+# one (as in seed_data.py and seed_product_vendors.py) wins every time.
 manufacturers_table = dynamodb.Table('MaterialsSelection-Manufacturers')
-manufacturers_response = manufacturers_table.scan()
-manufacturers = {item['name'].strip(): item['id'] for item in manufacturers_response['Items']}
+manufacturers = {}
+for item in sorted(scan_all(manufacturers_table, projection=['id', 'name']), key=lambda item: item['id']):
+    manufacturers.setdefault(item['name'].strip(), item['id'])
 
 print(f"Found {len(manufacturers)} manufacturers")
 for name, id in manufacturers.items():
@@ -196,8 +201,22 @@ all_products = [
     (manufacturers.get('WW Woods'), ww_woods_products),
 ]
 
+# Existing products by (manufacturer, canonical model number): re-running the
+# seed updates these in place (keeping ids and fields such as productUrl)
+# instead of adding duplicates. Id order picks the same row among duplicates
+# on every run.
+existing = {}
+for item in sorted(scan_all(products_table), key=lambda item: item['id']):
+    key = (item.get('manufacturerId'), canonical_model(item.get('modelNumber')))
+    if key in existing:
+        print(f"  ⚠️  Duplicate product {item.get('modelNumber')}: {existing[key]['id']}, {item['id']}")
+        continue
+    existing[key] = item
+
 print("\nSeeding Products...")
-total_added = 0
+items = []
+seen = set()
+updated = 0
 
 for manufacturer_id, products in all_products:
     if not manufacturer_id:
@@ -208,19 +227,29 @@ for manufacturer_id, products in all_products:
     print(f"\n{manufacturer_name} products:")
     
     for product in products:
-        try:
-            products_table.put_item(Item={
-                'id': str(uuid4()),
-                'manufacturerId': manufacturer_id,
-                'name': product['name'],
-                'modelNumber': product['modelNumber'],
-                'description': product['description'],
-                'category': product.get('category', ''),
-                'imageUrl': '',
-            })
-            print(f"  ✓ {product['name']} ({product['modelNumber']})")
-            total_added += 1
-        except Exception as e:
-            print(f"  ✗ Failed to add {product['name']}: {e}")
-
-print(f"\n✅ Seed complete! Added {total_added} products")
+        key = (manufacturer_id, canonical_model(product['modelNumber']))
+        if key in seen:
+            print(f"  ⚠️  Skipping duplicate {product['modelNumber']}")
+            continue
+        seen.add(key)
+        current = existing.get(key)
+        item = dict(current) if current else {'id': product_id(*key), 'imageUrl': ''}
+        item.update({
+            'manufacturerId': manufacturer_id,
+            'name': product['name'],
+            'modelNumber': product['modelNumber'],
+            'description': product['description'],
+            'category': product.get('category', ''),
+        })
+        items.append(item)
+        updated += bool(current)
+        print(f"  • {product['name']} ({product['modelNumber']}){' [updated]' if current else ''}")
+
+stats = put_items(products_table, items)
+for request in stats.unprocessed:
+    item = request['PutRequest']['Item']
+    print(f"  ✗ Failed to add {item['name']} ({item['modelNumber']})")
+total_added = stats.written - updated
+
+print(f"\n  {stats.summary('products')}")
+print(f"\n✅ Seed complete! Added {total_added} products, updated {updated}")
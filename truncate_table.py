@@ -0,0 +1,47 @@
+"""
+Delete every item from a MaterialsSelection-* table.
+
+Reads keys only, deletes in concurrent 25-item batches and backs off on
+throttling. Meant for resetting staging and test environments.
+
+Usage:
+    python truncate_table.py ProductVendors --dry-run
+    python truncate_table.py MaterialsSelection-ProductVendors --yes
+"""
+
+import argparse
+import sys
+
+from materials_db import repository
+from materials_db.bulk import DEFAULT_CONCURRENCY, delete_all
+from materials_db.scan import DEFAULT_SEGMENTS
+
+parser = argparse.ArgumentParser(description='Delete every item from a MaterialsSelection-* table.')
+parser.add_argument('table', help='Table name, with or without the MaterialsSelection- prefix')
+parser.add_argument('--dry-run', action='store_true', help='Only count the items that would be deleted')
+parser.add_argument('--yes', action='store_true', help='Skip the confirmation prompt')
+parser.add_argument('--segments', type=int, default=DEFAULT_SEGMENTS, help='Parallel scan segments')
+parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Concurrent delete batches')
+args = parser.parse_args()
+
+table_name = repository.table_name(args.table)
+table = repository.table(table_name)
+
+if args.dry_run:
+    stats = delete_all(table, dry_run=True, total_segments=args.segments)
+    print(f"{table_name}: {stats.written} items would be deleted")
+    sys.exit(0)
+
+if not args.yes:
+    answer = input(f"Delete ALL items from {table_name}? Type the table name to confirm: ")
+    if answer.strip() != table_name:
+        print("Aborted.")
+        sys.exit(1)
+
+print(f"Deleting all items from {table_name}...")
+stats = delete_all(table, total_segments=args.segments, concurrency=args.concurrency)
+print(f"  {stats.summary('deleted')}")
+if stats.unprocessed:
+    print(f"  ✗ {len(stats.unprocessed)} deletes still unprocessed after retries")
+    sys.exit(1)
+print(f"\n✅ {table_name} is empty")
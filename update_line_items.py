@@ -0,0 +1,87 @@
+"""
+Apply spreadsheet-style bulk edits to line items.
+
+Edits come from a CSV with an `id` column and one column per attribute to
+set (orderedDate, receivedDate, stagingLocation, returnNotes, status,
+unitCost, ...); blank cells are left alone. --set applies the same value to
+every row, which is how a whole delivery is marked received. Setting
+orderedDate or receivedDate also moves the status along unless the edit
+sets status itself.
+
+All edits go through materials_db.write_behind: repeated edits of a row are
+coalesced and the rest are written 100 per transaction, so a 300-item
+delivery is three TransactWriteItems calls rather than 300 update_item
+round trips.
+
+Usage:
+    python update_line_items.py delivery.csv --set receivedDate=2026-02-10 --set stagingLocation="Garage"
+    python update_line_items.py ordered-dates.csv
+"""
+
+import argparse
+import csv
+from decimal import Decimal, InvalidOperation
+
+from materials_db.repository import get_resource, table_name
+from materials_db.write_behind import DEFAULT_CONCURRENCY, WriteBehind
+
+DECIMAL_FIELDS = {'unitCost', 'totalCost', 'allowance', 'quantity'}
+# Same progression as materials_db.excel_import: received beats ordered.
+STATUS_BY_DATE = (('receivedDate', 'received'), ('orderedDate', 'ordered'))
+
+
+def parse_assignment(text):
+    name, separator, value = text.partition('=')
+    if not separator or not name.strip():
+        raise argparse.ArgumentTypeError(f'expected FIELD=VALUE, got {text!r}')
+    return name.strip(), value.strip()
+
+
+def convert(name, value):
+    if name in DECIMAL_FIELDS:
+        try:
+            return Decimal(value.replace('$', '').replace(',', ''))
+        except InvalidOperation:
+            raise ValueError(f'{name} must be a number, got {value!r}')
+    return value
+
+
+def edits(path, assignments):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            line_item_id = (row.pop('id', None) or '').strip()
+            if not line_item_id:
+                continue
+            fields = {name: value.strip() for name, value in row.items() if name and value and value.strip()}
+            fields.update(assignments)
+            fields = {name: convert(name, value) for name, value in fields.items()}
+            if 'status' not in fields:
+                for date_field, status in STATUS_BY_DATE:
+                    if fields.get(date_field):
+                        fields['status'] = status
+                        break
+            if fields:
+                yield line_item_id, fields
+
+
+parser = argparse.ArgumentParser(description='Apply bulk edits to line items.')
+parser.add_argument('edits', help='CSV with an id column and one column per attribute')
+parser.add_argument('--set', dest='assignments', action='append', type=parse_assignment, default=[],
+                    metavar='FIELD=VALUE', help='Set FIELD on every row (repeatable)')
+parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Parallel transactions')
+args = parser.parse_args()
+
+line_items_table = get_resource().Table(table_name('LineItems'))
+
+print(f"Applying edits from {args.edits}...")
+with WriteBehind(line_items_table, concurrency=args.concurrency) as writes:
+    for line_item_id, fields in edits(args.edits, dict(args.assignments)):
+        writes.update(line_item_id, fields)
+stats = writes.stats
+
+for key in stats.missing:
+    print(f"  ⚠️  Line item not found: {key['id']}")
+for key, error in stats.failed:
+    print(f"  ✗ Failed to update {key['id']}: {error}")
+
+print(f"\n✅ {stats.summary()}")
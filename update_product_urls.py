@@ -1,11 +1,24 @@
-import boto3
+"""
+Set productUrl on catalog products from a manufacturer URL feed.
 
-dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
-products_table = dynamodb.Table('MaterialsSelection-Products')
+With no feed file, applies the built-in URL list below. Feeds may be CSV
+(modelNumber,productUrl), JSON Lines or JSON; see
+materials_db.catalog.iter_url_mapping. Updates run at background priority
+by default, so a large feed yields to the API's own traffic (see
+materials_db.scheduler); --progress prints rate and throttles periodically.
+
+Usage:
+    python update_product_urls.py
+    python update_product_urls.py kohler-urls.csv --concurrency 16
+    python update_product_urls.py feed.jsonl --index ModelNumberIndex
+    python update_product_urls.py big-feed.csv --quiet --progress 30
+"""
+
+import argparse
 
-# Get all products and add URLs for some of them based on real manufacturer sites
-response = products_table.scan()
-products = response['Items']
+from materials_db.catalog import DEFAULT_CONCURRENCY, GsiModelIndex, LocalModelIndex, apply_url_feed, iter_url_mapping
+from materials_db.repository import get_resource
+from materials_db.scheduler import PRIORITIES, get_scheduler
 
 # Map model numbers to actual product URLs
 product_urls = {
@@ -19,21 +32,41 @@ product_urls = {
     'FV-0510VSL1': 'https://na.panasonic.com/us/home-and-building-solutions/ventilation-indoor-air-quality/ventilation-fans/whispervalue-dc-led-fv-0510vsl1',
 }
 
+parser = argparse.ArgumentParser(description='Set productUrl on catalog products from a URL feed.')
+parser.add_argument('feed', nargs='?', help='CSV, JSON Lines or JSON file of model number -> URL')
+parser.add_argument('--index', help='modelNumber GSI to query instead of building a local index')
+parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Parallel updates')
+parser.add_argument('--quiet', action='store_true', help='Do not print a line per updated product')
+parser.add_argument('--priority', choices=PRIORITIES, default='background',
+                    help='Scheduling priority of the updates (default background)')
+parser.add_argument('--progress', type=float, metavar='SECONDS',
+                    help='Print job progress every SECONDS')
+args = parser.parse_args()
+
+dynamodb = get_resource()
+products_table = dynamodb.Table('MaterialsSelection-Products')
+
+if args.index:
+    index = GsiModelIndex(products_table, args.index)
+    print(f"Looking up products through {args.index}")
+else:
+    index = LocalModelIndex(products_table)
+    print(f"Indexed {len(index)} model numbers")
+
+rows = iter_url_mapping(args.feed) if args.feed else product_urls.items()
+
+def report(product_id, model_number, url):
+    if not args.quiet:
+        print(f"  ✓ Updated {model_number} ({product_id})")
+
 print("Updating products with URLs...")
-updated_count = 0
-
-for product in products:
-    model_number = product.get('modelNumber', '')
-    if model_number in product_urls:
-        try:
-            products_table.update_item(
-                Key={'id': product['id']},
-                UpdateExpression='SET productUrl = :url',
-                ExpressionAttributeValues={':url': product_urls[model_number]}
-            )
-            print(f"  ✓ Updated {product['name']} ({model_number})")
-            updated_count += 1
-        except Exception as e:
-            print(f"  ✗ Failed to update {product['name']}: {e}")
-
-print(f"\n✅ Updated {updated_count} products with URLs")
+if args.progress:
+    get_scheduler().start_reporting(args.progress)
+stats = apply_url_feed(products_table, rows, index, concurrency=args.concurrency, on_update=report,
+                       priority=args.priority)
+get_scheduler().stop_reporting()
+
+for product_id, model_number, error in stats.failed:
+    print(f"  ✗ Failed to update {model_number} ({product_id}): {error}")
+
+print(f"\n✅ {stats.summary()}")
@@ -0,0 +1,71 @@
+"""
+Build the vendor price index snapshot and show vendor options for a project.
+
+The snapshot (gzipped JSON) lets services load cheapest/primary vendor
+lookups without scanning MaterialsSelection-ProductVendors.
+
+Usage:
+    python vendor_prices.py --snapshot vendor-prices.json.gz
+    python vendor_prices.py --snapshot vendor-prices.json.gz --project 3f1c... --use-snapshot
+    python vendor_prices.py --project 3f1c... --within-allowance
+"""
+
+import argparse
+import time
+
+from materials_db.pagination import query_index
+from materials_db.price_index import VendorPriceIndex
+from materials_db.repository import Repository, get_resource
+from materials_db.rollup import LINE_ITEM_FIELDS
+
+parser = argparse.ArgumentParser(description='Build and query the vendor price index.')
+parser.add_argument('--snapshot', help='Snapshot file to write (or read with --use-snapshot)')
+parser.add_argument('--use-snapshot', action='store_true', help='Load the index from --snapshot instead of scanning')
+parser.add_argument('--project', help='Show vendor options for every line item in this project')
+parser.add_argument('--within-allowance', action='store_true', help="Only list offers whose cost x quantity fits each item's allowance")
+args = parser.parse_args()
+
+dynamodb = get_resource()
+
+start = time.perf_counter()
+if args.use_snapshot:
+    if not args.snapshot:
+        parser.error('--use-snapshot needs --snapshot')
+    index = VendorPriceIndex.load(args.snapshot)
+    source = args.snapshot
+else:
+    index = VendorPriceIndex.from_table(dynamodb.Table('MaterialsSelection-ProductVendors'))
+    source = 'MaterialsSelection-ProductVendors'
+print(f"Loaded {len(index)} vendor offers from {source} in {time.perf_counter() - start:.2f}s")
+
+if args.snapshot and not args.use_snapshot:
+    index.save(args.snapshot)
+    print(f"  ✓ Snapshot written to {args.snapshot}")
+
+if args.project:
+    line_items = list(query_index(dynamodb.Table('MaterialsSelection-LineItems'), 'ProjectIdIndex',
+                                 'projectId', args.project, LINE_ITEM_FIELDS + ['name', 'productId']))
+    options = index.lookup_line_items(line_items, args.within_allowance)
+    # Only the vendors that appear in these offers, in 100-key batches.
+    vendor_ids = {offer.vendorId for result in options.values() for offer in result['offers']}
+    with Repository() as repo:
+        vendors = {vendor_id: item['name']
+                   for vendor_id, item in repo.get_many('Vendors', vendor_ids, projection=['name']).items()}
+    print(f"\n{len(options)} of {len(line_items)} line items are linked to products")
+    for item in line_items:
+        result = options.get(item['id'])
+        if result is None:
+            continue
+        cheapest, primary = result['cheapest'], result['primary']
+        print(f"\n  {item.get('name', item['id'])}")
+        if cheapest is None:
+            print("    ✗ No vendors carry this product")
+            continue
+        if not result['offers']:
+            print(f"    ⚠️  No offers within the ${item['allowance']:,.2f} allowance "
+                  f"(cheapest is ${cheapest.cost:,.2f})")
+            continue
+        for offer in result['offers']:
+            tags = [tag for tag, match in (('cheapest', offer == cheapest), ('primary', offer == primary)) if match]
+            print(f"    ${offer.cost:>10,.2f}  {vendors.get(offer.vendorId, offer.vendorId)}"
+                  + (f"  ({', '.join(tags)})" if tags else ''))